@@ -1,19 +1,34 @@
+import numpy as np
 import pandas as pd
 import os
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 import logging
 import traceback
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 from app.agents.base_agent import BaseAgent
 from app.utils.prompt_loader import load_prompt
 from app.core.connectors.base_connector import BaseConnector
-from app.utils.data_cleaners import limpar_numero
+from app.utils.data_cleaners import limpar_numeros
 from app.utils.data_formatters import formatar_markdown_consolidado
-from app.utils.marketing_metrics import roi, cps, tkm, conversion_rate, cpc, cpm, percent_change
+from app.utils.marketing_metrics import (
+    roi, cps, tkm, conversion_rate, cpc, cpm, percent_change,
+    calculate_roi, calculate_cps, calculate_tkm, calculate_conversion_rate, calculate_cpc, calculate_cpm
+)
 from app.utils.save_json import salvar_json_kpis
 from app.utils.file_utils import create_directory_if_not_exists
+from app.utils.timing import timed
+from app.utils.custom_exceptions import (
+    PlanilhaNaoEncontradaError,
+    AbaNaoEncontradaError,
+    ColunaNaoEncontradaError,
+    ErroLeituraDadosError,
+    ErroCalculoMetricas,
+    LLMConnectionError,
+    ErroProcessamentoDadosAgente,
+    ErroGeracaoRelatorio
+)
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -25,13 +40,14 @@ class MediaAgent(BaseAgent):
     def __init__(self, llm_service, data_connector: BaseConnector):
         super().__init__(llm_service)
         self.data_connector = data_connector
+        # 'func' calcula a métrica sobre os totais de um período; 'vec_func' sobre colunas inteiras
         self.METRICAS_DISPONIVEIS = {
-            'ROI': {'func': roi, 'deps': ['Revenue', 'Spend']},
-            'CPS': {'func': cps, 'deps': ['Spend', 'Sessions']},
-            'TKM': {'func': tkm, 'deps': ['Revenue', 'Conversions']},
-            'Conversion_Rate': {'func': conversion_rate, 'deps': ['Conversions', 'Sessions']},
-            'CPC': {'func': cpc, 'deps': ['Spend', 'Clicks']},
-            'CPM': {'func': cpm, 'deps': ['Spend', 'Impressions']},
+            'ROI': {'func': roi, 'vec_func': calculate_roi, 'deps': ['Revenue', 'Spend']},
+            'CPS': {'func': cps, 'vec_func': calculate_cps, 'deps': ['Spend', 'Sessions']},
+            'TKM': {'func': tkm, 'vec_func': calculate_tkm, 'deps': ['Revenue', 'Conversions']},
+            'Conversion_Rate': {'func': conversion_rate, 'vec_func': calculate_conversion_rate, 'deps': ['Conversions', 'Sessions']},
+            'CPC': {'func': cpc, 'vec_func': calculate_cpc, 'deps': ['Spend', 'Clicks']},
+            'CPM': {'func': cpm, 'vec_func': calculate_cpm, 'deps': ['Spend', 'Impressions']},
         }
         self.COLUMN_MAPPING = {
             'Data': 'Date', 'Investimento': 'Spend', 'Receita': 'Revenue',
@@ -40,8 +56,19 @@ class MediaAgent(BaseAgent):
             'CPS (Custo por Sessão)': 'CPS', 'TKM (Ticket Médio)': 'TKM',
             'Taxa de Conversão': 'Conversion_Rate',
         }
+        # Janelas comparadas ao mês atual: deslocamento do início e duração em meses.
+        # Em janelas de vários meses, as métricas base são comparadas pela média mensal.
+        # O sufixo nomeia os comparativos (`<métrica>_<sufixo>`) e não deve conter '_'.
+        self.JANELAS_COMPARACAO = {
+            'mom': {'sufixo': 'MoM', 'deslocamento': relativedelta(months=1), 'meses': 1},
+            'yoy': {'sufixo': 'YoY', 'deslocamento': relativedelta(years=1), 'meses': 1},
+            # Mês atual contra o mês de três meses antes (compara meses, não trimestres)
+            'm3': {'sufixo': 'M3', 'deslocamento': relativedelta(months=3), 'meses': 1},
+            't3m': {'sufixo': 'T3M', 'deslocamento': relativedelta(months=3), 'meses': 3},
+        }
+        self.COMPARACOES_PADRAO = ['mom', 'yoy']
 
-    def _normalize_metrics(self, metricas: List[str]) -> List[str]:
+    def normalize_metrics(self, metricas: List[str]) -> List[str]:
         """Normaliza a lista de métricas para corresponder ao case esperado."""
         normalized = []
         for m in metricas:
@@ -55,103 +82,172 @@ class MediaAgent(BaseAgent):
                 normalized.append(m.title())
         return normalized
 
-    def _fetch_and_clean_data(self, data_source: str, client_config: dict, mes_analise: str) -> pd.DataFrame:
-        """Busca e limpa os dados da fonte especificada."""
-        data = self.data_connector.get_data(
-            data_source=data_source, client_config=client_config, mes_analise=mes_analise
-        )
+    def get_analysis_windows(self, mes_analise: str, comparacoes: List[str] = None) -> Dict[str, Tuple[datetime, datetime]]:
+        """
+        Retorna as janelas de datas (início e fim inclusivos) usadas na análise:
+        o mês atual ('atual') e as janelas de comparação (por padrão, o mês
+        anterior (MoM) e o mesmo mês do ano anterior (YoY)).
+        """
+        data_analise_dt = datetime.strptime(mes_analise, "%Y-%m-%d")
+        start_current = data_analise_dt.replace(day=1)
+        windows = {'atual': (start_current, (start_current + relativedelta(months=1)) - relativedelta(days=1))}
+        for label in comparacoes or self.COMPARACOES_PADRAO:
+            if label not in self.JANELAS_COMPARACAO:
+                raise ValueError(f"Janela de comparação desconhecida: '{label}'.")
+            config = self.JANELAS_COMPARACAO[label]
+            start = start_current - config['deslocamento']
+            windows[label] = (start, (start + relativedelta(months=config['meses'])) - relativedelta(days=1))
+        return windows
+
+    def _fetch_and_clean_data(self, data_source: str, client_config: dict, mes_analise: str, data: pd.DataFrame = None, comparacoes: List[str] = None) -> pd.DataFrame:
+        """
+        Busca e limpa os dados da fonte especificada.
+        Se `data` for informado (ex: obtido em lote pelo Orchestrator), a busca é ignorada.
+        """
+        if data is None:
+            data = self.data_connector.get_data(
+                data_source=data_source, client_config=client_config, mes_analise=mes_analise,
+                date_windows=list(self.get_analysis_windows(mes_analise, comparacoes).values())
+            )
         if data.empty:
             return pd.DataFrame()
 
         df = data
         logger.debug(f"DataFrame após extração ({data_source}):\n{df.head()}")
-        
-        df.rename(columns={pt: en for pt, en in self.COLUMN_MAPPING.items()}, inplace=True)
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce', format='%d/%m/%Y')
-        df.dropna(subset=['Date'], inplace=True)
-
-        numeric_cols = [col for col in df.columns if col != 'Date']
-        for col in numeric_cols:
-            original_col = df[col].copy()
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-            failed_mask = df[col].isna() & original_col.notna()
-            if failed_mask.any():
-                logger.debug(f"Limpando valores não numéricos na coluna '{col}'...")
-                df.loc[failed_mask, col] = original_col[failed_mask].apply(limpar_numero)
+
+        with timed("media_clean"):
+            df.rename(columns={pt: en for pt, en in self.COLUMN_MAPPING.items()}, inplace=True)
+            df['Date'] = pd.to_datetime(df['Date'], errors='coerce', format='%d/%m/%Y')
+            df.dropna(subset=['Date'], inplace=True)
+
+            numeric_cols = [col for col in df.columns if col != 'Date']
+            for col in numeric_cols:
+                original_col = df[col].copy()
                 df[col] = pd.to_numeric(df[col], errors='coerce')
+                failed_mask = df[col].isna() & original_col.notna()
+                if failed_mask.any():
+                    logger.debug(f"Limpando valores não numéricos na coluna '{col}'...")
+                    df.loc[failed_mask, col] = limpar_numeros(original_col[failed_mask])
+                    df[col] = pd.to_numeric(df[col], errors='coerce')
         
-        df = df.fillna(0)
-        logger.debug(f"DataFrame após limpeza ({data_source}):\n{df.head()}\n{df.dtypes}")
+            df = df.fillna(0)
+            logger.debug(f"DataFrame após limpeza ({data_source}):\n{df.head()}\n{df.dtypes}")
         return df
 
-    def _calculate_metrics(self, df: pd.DataFrame, metricas: List[str]) -> pd.DataFrame:
-        """Calcula as métricas selecionadas e as adiciona ao DataFrame."""
+    @timed("media_metrics")
+    def _calculate_metrics(self, df: pd.DataFrame, metricas: List[str], colunas_utilizadas: List[str] = None) -> pd.DataFrame:
+        """
+        Calcula as métricas selecionadas, coluna a coluna, e as adiciona ao DataFrame.
+        Se `colunas_utilizadas` for informado, métricas fora dessa lista não são
+        calculadas, pois seu resultado não seria usado.
+        """
         for metrica_nome in metricas:
             if metrica_nome in self.METRICAS_DISPONIVEIS:
+                if colunas_utilizadas is not None and metrica_nome not in colunas_utilizadas:
+                    continue
                 config = self.METRICAS_DISPONIVEIS[metrica_nome]
                 if not all(dep in df.columns for dep in config['deps']):
                     continue
-                
-                # Usar apply com lambda para passar as colunas corretas para cada função
-                df[metrica_nome] = df.apply(
-                    lambda row: config['func'](*(row[dep] for dep in config['deps'])), 
-                    axis=1
-                )
+
+                df[metrica_nome] = config['vec_func'](*(df[dep] for dep in config['deps']))
         return df
 
-    def _summarize_and_compare(self, df: pd.DataFrame, mes_analise: str, metricas: List[str]) -> Dict[str, Any]:
-        """Filtra os dados por período e calcula os KPIs e comparativos."""
-        data_analise_dt = datetime.strptime(mes_analise, "%Y-%m-%d")
-        start_current = data_analise_dt.replace(day=1)
-        end_current = (start_current + relativedelta(months=1)) - relativedelta(days=1)
-        start_prev = start_current - relativedelta(months=1)
-        end_prev = (start_prev + relativedelta(months=1)) - relativedelta(days=1)
-        start_yoy = start_current - relativedelta(years=1)
-        end_yoy = (start_yoy + relativedelta(months=1)) - relativedelta(days=1)
-
-        periods = {
-            'atual': df[(df['Date'] >= start_current) & (df['Date'] <= end_current)],
-            'mom': df[(df['Date'] >= start_prev) & (df['Date'] <= end_prev)],
-            'yoy': df[(df['Date'] >= start_yoy) & (df['Date'] <= end_yoy)],
-        }
+    def _summary_columns(self, metricas: List[str]) -> List[str]:
+        """
+        Colunas lidas por `_summarize_and_compare`: as métricas base selecionadas e as
+        dependências das métricas compostas, que são recalculadas a partir dos totais
+        de cada período (e não a partir das colunas calculadas linha a linha).
+        """
+        deps = [dep for config in self.METRICAS_DISPONIVEIS.values() for dep in config['deps']]
+        return list(dict.fromkeys([m for m in metricas if m not in self.METRICAS_DISPONIVEIS] + deps))
+
+    def _aggregate_windows(self, df: pd.DataFrame, windows: Dict[str, Tuple[datetime, datetime]], colunas: List[str]) -> Dict[str, Tuple[int, Dict[str, Any]]]:
+        """
+        Soma as colunas em todas as janelas de uma só vez: os dados são ordenados
+        por data uma única vez e cada janela vira uma fatia localizada por busca
+        binária (`searchsorted`), sem máscaras sobre o DataFrame inteiro.
+
+        Returns:
+            Dict[str, Tuple[int, Dict[str, Any]]]: Por janela, o número de linhas e a soma de cada coluna.
+        """
+        datas = df['Date'].to_numpy()
+        colunas = [col for col in colunas if col in df.columns and col != 'Date']
+        valores = {col: df[col].to_numpy() for col in colunas}
+        if not df['Date'].is_monotonic_increasing:
+            ordem = np.argsort(datas, kind='stable')
+            datas = datas[ordem]
+            valores = {col: arr[ordem] for col, arr in valores.items()}
+
+        totais = {}
+        for label, (start, end) in windows.items():
+            lo = np.searchsorted(datas, np.datetime64(start), side='left')
+            hi = np.searchsorted(datas, np.datetime64(end), side='right')
+            totais[label] = (int(hi - lo), {col: arr[lo:hi].sum() for col, arr in valores.items()})
+        return totais
+
+    @timed("media_summary")
+    def _summarize_and_compare(self, df: pd.DataFrame, mes_analise: str, metricas: List[str], comparacoes: List[str] = None) -> Dict[str, Any]:
+        """
+        Agrega os dados de todas as janelas em uma única passada e calcula, a partir
+        da pequena tabela de totais resultante, os KPIs e os comparativos com cada
+        janela de comparação (por padrão MoM e YoY).
+        """
+        windows = self.get_analysis_windows(mes_analise, comparacoes)
+        metricas_base = [m for m in metricas if m not in self.METRICAS_DISPONIVEIS]
+        metricas_compostas = [m for m in metricas if m in self.METRICAS_DISPONIVEIS]
+        totais = self._aggregate_windows(df, windows, self._summary_columns(metricas))
 
         resumo_periodos = {}
-        for label, period_df in periods.items():
+        for label, (linhas, somas) in totais.items():
             kpis = {}
-            if not period_df.empty:
-                base_metrics_sum = {m: period_df[m].sum() for m in metricas if m not in self.METRICAS_DISPONIVEIS and m in period_df}
-                kpis.update(base_metrics_sum)
-                
+            if linhas:
+                kpis.update({m: somas[m] for m in metricas_base if m in somas})
+
                 # Recalcula métricas compostas com base nos totais do período
-                deps_sum = {dep: period_df[dep].sum() for dep in ['Spend', 'Revenue', 'Sessions', 'Conversions', 'Clicks', 'Impressions'] if dep in period_df}
-                for metrica in [m for m in metricas if m in self.METRICAS_DISPONIVEIS]:
+                for metrica in metricas_compostas:
                     config = self.METRICAS_DISPONIVEIS[metrica]
-                    deps_values = [deps_sum.get(dep, 0) for dep in config['deps']]
-                    kpis[metrica] = config['func'](*deps_values)
+                    kpis[metrica] = config['func'](*[somas.get(dep, 0) for dep in config['deps']])
             resumo_periodos[label] = kpis
 
         comparativos = {}
         for metrica in metricas:
             current_val = resumo_periodos['atual'].get(metrica, 0)
-            mom_val = resumo_periodos['mom'].get(metrica, 0)
-            yoy_val = resumo_periodos['yoy'].get(metrica, 0)
-            comparativos[f'{metrica}_MoM'] = percent_change(current_val, mom_val)
-            comparativos[f'{metrica}_YoY'] = percent_change(current_val, yoy_val)
+            for label in windows:
+                if label == 'atual':
+                    continue
+                config = self.JANELAS_COMPARACAO[label]
+                previous_val = resumo_periodos[label].get(metrica, 0)
+                if config['meses'] > 1 and metrica in metricas_base:
+                    previous_val = previous_val / config['meses']
+                comparativos[f"{metrica}_{config['sufixo']}"] = percent_change(current_val, previous_val)
 
         kpis_finais = {k: v for k, v in resumo_periodos['atual'].items() if k in metricas}
         return {"kpis": kpis_finais, "comparatives": comparativos, "resumo_periodos": resumo_periodos}
 
-    def _prepare_llm_prompt(self, data_source: str, client_name: str, client_config: dict, mes_analise: str, metricas: List[str], kpis: Dict, comparatives: Dict) -> str:
-        """Prepara o prompt final para ser enviado ao LLM."""
+    def _comparatives_heading(self, comparacoes: List[str] = None) -> str:
+        """Título da tabela de comparativos, com os sufixos das janelas selecionadas (ex: 'Comparativos (MoM e YoY)')."""
+        sufixos = [self.JANELAS_COMPARACAO[label]['sufixo'] for label in comparacoes or self.COMPARACOES_PADRAO]
+        nomes = sufixos[0] if len(sufixos) == 1 else f"{', '.join(sufixos[:-1])} e {sufixos[-1]}"
+        return f"Comparativos ({nomes})"
+
+    def _prepare_data_markdown(self, data_source: str, client_name: str, mes_analise: str, kpis: Dict, comparatives: Dict,
+                               comparacoes: List[str] = None) -> str:
+        """Formata os KPIs e comparativos da plataforma em markdown, como enviados ao LLM."""
         data_analise_dt = datetime.strptime(mes_analise, "%Y-%m-%d")
         markdown_parts = [f"## Análise de {data_source.replace('_', ' ').title()} para {client_name} - Mês de {data_analise_dt.strftime('%B %Y')}\n"]
-        
+
         kpis_df = pd.DataFrame([kpis])
         markdown_parts.append(formatar_markdown_consolidado(kpis_df, "KPIs do Período Atual"))
 
         comparatives_df = pd.DataFrame([comparatives])
-        markdown_parts.append(formatar_markdown_consolidado(comparatives_df, "Comparativos (MoM e YoY)"))
+        markdown_parts.append(formatar_markdown_consolidado(comparatives_df, self._comparatives_heading(comparacoes)))
+        return "\n".join(markdown_parts)
 
+    @timed("media_prompt")
+    def _prepare_llm_prompt(self, data_source: str, client_name: str, client_config: dict, mes_analise: str, metricas: List[str], kpis: Dict, comparatives: Dict,
+                            comparacoes: List[str] = None) -> str:
+        """Prepara o prompt final para ser enviado ao LLM."""
+        data_analise_dt = datetime.strptime(mes_analise, "%Y-%m-%d")
         metrics_list_md = "\n".join([f"- {m}" for m in metricas])
         prompt_template = load_prompt('media_analysis')
         
@@ -160,24 +256,31 @@ class MediaAgent(BaseAgent):
             cliente_contexto=client_config.get("contexto_cliente_prompt", ""),
             dados_markdown_summary_month_name=data_analise_dt.strftime('%B de %Y'),
             metrics_to_analyze_list_markdown=metrics_list_md,
-            dados_markdown="\n".join(markdown_parts)
+            dados_markdown=self._prepare_data_markdown(data_source, client_name, mes_analise, kpis, comparatives, comparacoes)
         )
 
-    def run(self, data_source: str, client_name: str, client_config: dict, mes_analise: str, metricas: list):
+    def run(self, data_source: str, client_name: str, client_config: dict, mes_analise: str, metricas: list, data: pd.DataFrame = None, comparacoes: List[str] = None, usar_cache: bool = True,
+            on_chunk=None, gerar_relatorio: bool = True):
         """
         Executa o fluxo de análise de dados de mídia orquestrando os métodos privados.
+        `data` permite reaproveitar dados já extraídos da fonte, `comparacoes`
+        escolhe as janelas de comparação (por padrão MoM e YoY) e `usar_cache`
+        permite ignorar o cache de respostas do LLM. Com `on_chunk(trecho)`, o
+        relatório é gerado em streaming e cada trecho é repassado à medida que chega.
+        Com `gerar_relatorio=False`, o LLM não é chamado: o resultado traz `report`
+        None e, em `dados_markdown`, os KPIs e comparativos formatados para um prompt.
         """
         logger.info(f"Executando MediaAgent para {data_source} do cliente {client_name}")
         try:
-            metricas_norm = self._normalize_metrics(metricas)
+            metricas_norm = self.normalize_metrics(metricas)
             
-            df = self._fetch_and_clean_data(data_source, client_config, mes_analise)
+            df = self._fetch_and_clean_data(data_source, client_config, mes_analise, data=data, comparacoes=comparacoes)
             if df.empty:
                 raise ErroLeituraDadosError(f"Não foram encontrados dados para {client_name} em {data_source} para o mês {mes_analise}.")
 
-            df_com_metricas = self._calculate_metrics(df, metricas_norm)
+            df_com_metricas = self._calculate_metrics(df, metricas_norm, colunas_utilizadas=self._summary_columns(metricas_norm))
             
-            analysis_results = self._summarize_and_compare(df_com_metricas, mes_analise, metricas_norm)
+            analysis_results = self._summarize_and_compare(df_com_metricas, mes_analise, metricas_norm, comparacoes)
             kpis_finais = analysis_results["kpis"]
             comparativos_finais = analysis_results["comparatives"]
 
@@ -186,18 +289,26 @@ class MediaAgent(BaseAgent):
             client_report_dir = os.path.join('app', 'reports', safe_client_name, safe_mes_analise)
             create_directory_if_not_exists(client_report_dir)
             
-            salvar_json_kpis(
-                plataforma=data_source.replace('_', ' ').title(),
-                mes_analise=mes_analise,
-                resumo_periodos=analysis_results["resumo_periodos"],
-                comparativos=comparativos_finais,
-                pasta_saida=client_report_dir,
-                sufixo_nome=data_source.replace('_', ' ').title(),
-                metricas_selecionadas=metricas_norm
-            )
+            with timed("kpis_write"):
+                salvar_json_kpis(
+                    plataforma=data_source.replace('_', ' ').title(),
+                    mes_analise=mes_analise,
+                    resumo_periodos=analysis_results["resumo_periodos"],
+                    comparativos=comparativos_finais,
+                    pasta_saida=client_report_dir,
+                    sufixo_nome=data_source.replace('_', ' ').title(),
+                    metricas_selecionadas=metricas_norm
+                )
+
+            if not gerar_relatorio:
+                dados_markdown = self._prepare_data_markdown(data_source, client_name, mes_analise, kpis_finais, comparativos_finais, comparacoes)
+                return {"report": None, "kpis": kpis_finais, "comparatives": comparativos_finais, "dados_markdown": dados_markdown}
 
-            prompt = self._prepare_llm_prompt(data_source, client_name, client_config, mes_analise, metricas_norm, kpis_finais, comparativos_finais)
-            report = self.llm_service.generate_text(prompt)
+            prompt = self._prepare_llm_prompt(data_source, client_name, client_config, mes_analise, metricas_norm, kpis_finais, comparativos_finais, comparacoes)
+            if on_chunk is None:
+                report = self.llm_service.generate_text(prompt, use_cache=usar_cache)
+            else:
+                report = self.llm_service.stream_text(prompt, on_chunk, use_cache=usar_cache)
             
             return {"report": report, "kpis": kpis_finais, "comparatives": comparativos_finais}
 
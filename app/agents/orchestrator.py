@@ -1,18 +1,49 @@
 import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Dict
 import pandas as pd
 
 from app.utils.prompt_loader import load_prompt
 from app.agents.media_agent import MediaAgent
 from app.core.llm_service import get_llm_service
 from app.utils.file_utils import save_to_file, get_report_path
+from app.utils.report_catalog import register_report
+from app.utils.timing import timed
 from app.core.connectors.google_sheets_connector import GoogleSheetsConnector
+from app.core.connectors.file_connector import FileConnector
 from app.utils.data_formatters import formatar_markdown_consolidado
-from app.utils.custom_exceptions import ErroProcessamentoDadosAgente, ErroGeracaoRelatorio
+from app.utils.report_sections import SectionStreamRouter, format_section_marker, split_sections
+from app.utils.custom_exceptions import ErroProcessamentoDadosAgente, ErroGeracaoRelatorio, PromptTemplateError
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Plataformas analisadas em cada fluxo (fonte de dados -> nome de exibição)
+PLATAFORMAS = {'google_ads': 'Google Ads', 'meta_ads': 'Meta Ads'}
+
+# Etapas do fluxo de análise, na ordem de execução, reportadas ao callback de progresso
+ETAPAS_ANALISE = ['coleta_dados', *PLATAFORMAS, 'consolidacao', 'salvamento']
+
+# Prompt do modo de chamada única, cadastrado como os demais (CRUD de prompts). Campos
+# do template: {client_name}, {mes_analise}, {cliente_contexto},
+# {metrics_to_analyze_list_markdown}, {platforms_data_markdown} (KPIs e comparativos
+# de cada plataforma), {kpis_consolidated_markdown} e {comparatives_consolidates_markdown}.
+# Sem ele, as análises usam o fluxo com três chamadas.
+SINGLE_CALL_PROMPT = 'consolidated_single_call'
+
+# Instruções de formato anexadas ao prompt de chamada única: a resposta traz uma
+# seção por plataforma e o relatório consolidado, separados por marcadores
+SINGLE_CALL_FORMAT_INSTRUCTIONS = "\n".join([
+    "",
+    "## Formato da resposta",
+    "Responda com as seções abaixo, nesta ordem, cada uma iniciada pelo seu marcador sozinho em uma linha:",
+    *[f"- `{format_section_marker(data_source)}`: análise detalhada do {nome}" for data_source, nome in PLATAFORMAS.items()],
+    f"- `{format_section_marker('consolidacao')}`: relatório consolidado final",
+])
+
 class Orchestrator:
     """
     Agente orquestrador que interpreta a tarefa do usuário e
@@ -20,99 +51,265 @@ class Orchestrator:
     """
     def __init__(self, llm_service):
         self.llm_service = llm_service
-        data_connector = GoogleSheetsConnector()
-        self.media_agent = MediaAgent(llm_service, data_connector=data_connector)
+        self.media_agent = MediaAgent(llm_service, data_connector=GoogleSheetsConnector())
+        # Clientes com arquivos de dados configurados são analisados a partir dos arquivos.
+        # Os arquivos podem usar os cabeçalhos da planilha ou os nomes canônicos (em inglês).
+        column_mapping = self.media_agent.COLUMN_MAPPING
+        file_connector = FileConnector(columns=set(column_mapping.keys()) | set(column_mapping.values()))
+        self.file_media_agent = MediaAgent(llm_service, data_connector=file_connector)
+
+    def warm_up(self):
+        """
+        Antecipa as inicializações feitas no primeiro uso (SDK do LLM e autenticação
+        no Google Sheets). Falhas são apenas registradas e voltam a ocorrer no uso real.
+        """
+        for name, warm_up in (("LLM", self.llm_service.warm_up), ("Google Sheets", self.media_agent.data_connector.warm_up)):
+            try:
+                warm_up()
+                logger.info(f"Warm-up de {name} concluído.")
+            except Exception as e:
+                logger.warning(f"Falha no warm-up de {name}: {e}")
+
+    @staticmethod
+    def _report_progress(progress_callback, etapa: str, status: str):
+        """Notifica o callback de progresso, sem deixar que uma falha nele interrompa a análise."""
+        if progress_callback is None:
+            return
+        try:
+            progress_callback(etapa, status)
+        except Exception as e:
+            logger.warning(f"Falha ao reportar o progresso da etapa '{etapa}': {e}")
 
-    def executar_fluxo_analise_cliente(self, cliente_config: dict, mes_analise_atual_str: str, metricas_selecionadas: list):
+    def _get_media_agent(self, cliente_config: dict, data_source: str) -> MediaAgent:
+        """
+        Seleciona o agente (e o conector de dados) de uma plataforma: o arquivo de
+        dados da plataforma, se configurado, ou a planilha do cliente.
+        """
+        if cliente_config.get(f'{data_source}_file_path'):
+            return self.file_media_agent
+        return self.media_agent
+
+    def _prefetch_platform_data(self, media_agents: Dict[str, MediaAgent], cliente_config: dict, mes_analise_atual_str: str) -> dict:
+        """
+        Busca os dados de todas as plataformas com uma leitura em lote por conector.
+        Se a leitura de um conector falhar, as suas plataformas ficam fora do
+        resultado e voltam a buscar seus próprios dados (preservando os erros
+        específicos por plataforma).
+        """
+        data_sources_by_agent = {}
+        for data_source, media_agent in media_agents.items():
+            data_sources_by_agent.setdefault(id(media_agent), (media_agent, []))[1].append(data_source)
+
+        prefetched_data = {}
+        for media_agent, data_sources in data_sources_by_agent.values():
+            try:
+                prefetched_data.update(media_agent.data_connector.get_many(
+                    data_sources=data_sources,
+                    client_config=cliente_config,
+                    mes_analise=mes_analise_atual_str,
+                    date_windows=list(media_agent.get_analysis_windows(mes_analise_atual_str).values())
+                ))
+            except Exception as e:
+                logger.warning(f"Falha na leitura em lote de {', '.join(data_sources)}, buscando individualmente: {e}")
+        return prefetched_data
+
+    def _run_platform_analysis(self, media_agent: MediaAgent, data_source: str, client_name: str, cliente_config: dict,
+                               mes_analise_atual_str: str, metricas_selecionadas: list, data=None, usar_cache: bool = True,
+                               progress_callback=None, stream_callback=None, gerar_relatorio: bool = True):
+        """
+        Executa a análise de uma plataforma, isolando seus erros.
+        Retorna uma tupla (resultados, mensagem de erro ou None).
+        """
+        platform_name = PLATAFORMAS[data_source]
+        self._report_progress(progress_callback, data_source, 'executando')
+        try:
+            with timed(data_source):
+                results = media_agent.run(
+                    data_source=data_source,
+                    client_name=client_name,
+                    client_config=cliente_config,
+                    mes_analise=mes_analise_atual_str,
+                    metricas=metricas_selecionadas,
+                    data=data,
+                    usar_cache=usar_cache,
+                    on_chunk=(lambda chunk: stream_callback(data_source, chunk)) if stream_callback else None,
+                    gerar_relatorio=gerar_relatorio
+                )
+            self._report_progress(progress_callback, data_source, 'concluido')
+            return results, None
+        except (ErroProcessamentoDadosAgente, ErroGeracaoRelatorio) as e:
+            error_message = f"Erro na análise do {platform_name}: {e}"
+            logger.error(error_message, exc_info=True)
+            self._report_progress(progress_callback, data_source, 'erro')
+            return {"report": f"Falha na geração do relatório do {platform_name}. Detalhes: {e}", "kpis": {}, "comparatives": {}}, error_message
+
+    @staticmethod
+    def _consolidated_tables(platform_results: dict):
+        """Formata os KPIs e os comparativos de todas as plataformas em tabelas markdown (uma linha por plataforma)."""
+        kpis_data = {PLATAFORMAS[data_source]: results.get('kpis', {}) for data_source, results in platform_results.items()}
+        kpis_df = pd.DataFrame(kpis_data).T.fillna(0)
+        kpis_markdown = formatar_markdown_consolidado(kpis_df, "Resumo de KPIs Consolidados")
+
+        comparatives_data = {PLATAFORMAS[data_source]: results.get('comparatives', {}) for data_source, results in platform_results.items()}
+        comparatives_df = pd.DataFrame(comparatives_data).T.fillna(0)
+        comparatives_markdown = formatar_markdown_consolidado(comparatives_df, "Resumo de Comparativos Consolidados (MoM & YoY)")
+        return kpis_markdown, comparatives_markdown
+
+    def _generate_single_call_report(self, client_name: str, cliente_config: dict, mes_analise_atual_str: str, metricas: list,
+                                     platform_results: dict, errors: list, usar_cache: bool = True, stream_callback=None) -> str:
+        """
+        Gera as análises das plataformas e o relatório consolidado em uma única chamada
+        ao LLM, com o prompt `SINGLE_CALL_PROMPT`. A resposta é dividida pelos
+        marcadores de seção: o texto de cada plataforma vai para o `report` dos seus
+        resultados (como no fluxo com três chamadas) e o consolidado é retornado.
+        """
+        kpis_markdown, comparatives_markdown = self._consolidated_tables(platform_results)
+        platforms_markdown = "\n\n".join(
+            results['dados_markdown'] for results in platform_results.values() if results.get('dados_markdown')
+        ) or "Nenhum dado de plataforma disponível."
+
+        prompt = load_prompt(SINGLE_CALL_PROMPT).format(
+            client_name=client_name,
+            mes_analise=datetime.strptime(mes_analise_atual_str, "%Y-%m-%d").strftime('%B de %Y'),
+            cliente_contexto=cliente_config.get("contexto_cliente_prompt", ""),
+            metrics_to_analyze_list_markdown="\n".join(f"- {m}" for m in metricas),
+            platforms_data_markdown=platforms_markdown,
+            kpis_consolidated_markdown=kpis_markdown,
+            comparatives_consolidates_markdown=comparatives_markdown
+        ) + SINGLE_CALL_FORMAT_INSTRUCTIONS
+
+        if stream_callback is None:
+            response = self.llm_service.generate_text(prompt, use_cache=usar_cache)
+        else:
+            # Os trechos são repassados na seção indicada pelo último marcador recebido
+            router = SectionStreamRouter(stream_callback, default_section='consolidacao')
+            response = self.llm_service.stream_text(prompt, router.feed, use_cache=usar_cache)
+            router.flush()
+
+        sections = split_sections(response)
+        for data_source, results in platform_results.items():
+            if results.get('report') is None:
+                results['report'] = sections.get(data_source, "")
+        if not sections.get('consolidacao'):
+            errors.append("A resposta da chamada única ao LLM não trouxe a seção consolidada; o relatório contém a resposta completa.")
+            return response
+        return sections['consolidacao']
+
+    @timed("analise_total")
+    def executar_fluxo_analise_cliente(self, cliente_config: dict, mes_analise_atual_str: str, metricas_selecionadas: list, usar_cache: bool = True,
+                                      progress_callback=None, stream_callback=None, chamada_unica: bool = None):
         """
         Executa o fluxo de análise de mídia para um cliente específico.
         Retorna o caminho do arquivo do relatório final em caso de sucesso,
         ou um dicionário de erro em caso de falha.
+        Com `usar_cache=False`, todas as chamadas ao LLM ignoram o cache de respostas.
+        `progress_callback(etapa, status)`, se informado, é chamado a cada mudança
+        de status ('executando', 'concluido' ou 'erro') das etapas de `ETAPAS_ANALISE`.
+        `stream_callback(secao, trecho)`, se informado, ativa o streaming das respostas
+        do LLM: cada trecho é repassado à medida que chega, com a seção sendo a
+        plataforma ('google_ads', 'meta_ads') ou 'consolidacao'. O relatório completo
+        continua sendo salvo ao final.
+        Com `chamada_unica=True`, as análises das plataformas e o consolidado são
+        gerados em uma única chamada ao LLM (ver `_generate_single_call_report`);
+        None usa a configuração do cliente (`chamada_unica_llm`). Se o prompt do
+        modo não estiver cadastrado, o fluxo com três chamadas é usado, com um aviso.
         """
         client_name = cliente_config.get("nome_exibicao", "Cliente Desconhecido")
-        google_results = None
-        meta_results = None
         errors = []
+        if chamada_unica is None:
+            chamada_unica = bool(cliente_config.get("chamada_unica_llm"))
+        if chamada_unica:
+            # Verificado antes das plataformas, que no modo de chamada única não chamam o LLM
+            try:
+                load_prompt(SINGLE_CALL_PROMPT)
+            except PromptTemplateError as e:
+                logger.warning(f"Modo de chamada única indisponível para {client_name}, usando três chamadas ao LLM: {e}")
+                errors.append(f"Modo de chamada única indisponível (prompt '{SINGLE_CALL_PROMPT}' não cadastrado); o relatório foi gerado com três chamadas ao LLM.")
+                chamada_unica = False
 
-        try:
-            google_results = self.media_agent.run(
-                data_source='google_ads',
-                client_name=client_name,
-                client_config=cliente_config,
-                mes_analise=mes_analise_atual_str,
-                metricas=metricas_selecionadas
-            )
-        except (ErroProcessamentoDadosAgente, ErroGeracaoRelatorio) as e:
-            error_message = f"Erro na análise do Google Ads: {e}"
-            logger.error(error_message, exc_info=True)
-            errors.append(error_message)
-            google_results = {"report": f"Falha na geração do relatório do Google Ads. Detalhes: {e}", "kpis": {}, "comparatives": {}}
+        media_agents = {data_source: self._get_media_agent(cliente_config, data_source) for data_source in PLATAFORMAS}
+        self._report_progress(progress_callback, 'coleta_dados', 'executando')
+        with timed('coleta_dados'):
+            prefetched_data = self._prefetch_platform_data(media_agents, cliente_config, mes_analise_atual_str)
+        self._report_progress(progress_callback, 'coleta_dados', 'concluido')
 
-        try:
-            meta_results = self.media_agent.run(
-                data_source='meta_ads',
-                client_name=client_name,
-                client_config=cliente_config,
-                mes_analise=mes_analise_atual_str,
-                metricas=metricas_selecionadas
-            )
-        except (ErroProcessamentoDadosAgente, ErroGeracaoRelatorio) as e:
-            error_message = f"Erro na análise do Meta Ads: {e}"
-            logger.error(error_message, exc_info=True)
-            errors.append(error_message)
-            meta_results = {"report": f"Falha na geração do relatório do Meta Ads. Detalhes: {e}", "kpis": {}, "comparatives": {}}
+        # As plataformas são independentes (leitura de dados e chamada ao LLM),
+        # então são analisadas em paralelo; os erros continuam isolados por plataforma.
+        # Cada tarefa roda em uma cópia do contexto atual, para que os tempos das
+        # etapas sejam coletados junto com os do fluxo (ver `app.utils.timing`).
+        with ThreadPoolExecutor(max_workers=len(PLATAFORMAS), thread_name_prefix="media_agent") as executor:
+            futures = {
+                data_source: executor.submit(
+                    contextvars.copy_context().run, self._run_platform_analysis, media_agents[data_source], data_source, client_name, cliente_config,
+                    mes_analise_atual_str, metricas_selecionadas, prefetched_data.get(data_source), usar_cache,
+                    progress_callback, stream_callback, not chamada_unica
+                )
+                for data_source in PLATAFORMAS
+            }
+        platform_results = {}
+        for data_source, future in futures.items():
+            platform_results[data_source], error_message = future.result()
+            if error_message:
+                errors.append(error_message)
+        google_results = platform_results['google_ads']
+        meta_results = platform_results['meta_ads']
 
         # Se ambas as análises falharam, retorna um erro geral.
         if google_results is None and meta_results is None:
             return {"error": "Todas as fontes de dados falharam.", "details": errors}
 
         final_report = "Erro ao gerar relatório consolidado."
+        self._report_progress(progress_callback, 'consolidacao', 'executando')
         try:
-            consolidated_prompt_template = load_prompt('consolidated_report')
-
-            all_platforms_reports_text = []
-            if google_results and google_results.get('report'):
-                all_platforms_reports_text.append(f"### Análise Detalhada do Google Ads\n\n{google_results['report']}")
-            if meta_results and meta_results.get('report'):
-                all_platforms_reports_text.append(f"### Análise Detalhada do Meta Ads\n\n{meta_results['report']}")
-            
-            all_platforms_reports_markdown = "\n\n".join(all_platforms_reports_text) if all_platforms_reports_text else "Nenhuma análise de plataforma disponível."
-
-            kpis_data = {
-                'Google Ads': google_results.get('kpis', {}),
-                'Meta Ads': meta_results.get('kpis', {})
-            }
-            kpis_df = pd.DataFrame(kpis_data).T.fillna(0)
-            kpis_markdown = formatar_markdown_consolidado(kpis_df, "Resumo de KPIs Consolidados")
+            with timed('consolidacao'):
+                if chamada_unica:
+                    final_report = self._generate_single_call_report(
+                        client_name, cliente_config, mes_analise_atual_str, self.media_agent.normalize_metrics(metricas_selecionadas),
+                        platform_results, errors, usar_cache, stream_callback
+                    )
+                else:
+                    consolidated_prompt_template = load_prompt('consolidated_report')
 
-            comparatives_data = {
-                'Google Ads': google_results.get('comparatives', {}),
-                'Meta Ads': meta_results.get('comparatives', {})
-            }
-            comparatives_df = pd.DataFrame(comparatives_data).T.fillna(0)
-            comparatives_markdown = formatar_markdown_consolidado(comparatives_df, "Resumo de Comparativos Consolidados (MoM & YoY)")
-
-            prompt = consolidated_prompt_template.format(
-                client_name=client_name,
-                mes_analise=datetime.strptime(mes_analise_atual_str, "%Y-%m-%d").strftime('%B de %Y'),
-                kpis_consolidated_markdown=kpis_markdown,
-                comparatives_consolidates_markdown=comparatives_markdown,
-                all_platforms_reports=all_platforms_reports_markdown
-            )
-            
-            final_report = self.llm_service.generate_text(prompt)
+                    all_platforms_reports_text = []
+                    if google_results and google_results.get('report'):
+                        all_platforms_reports_text.append(f"### Análise Detalhada do Google Ads\n\n{google_results['report']}")
+                    if meta_results and meta_results.get('report'):
+                        all_platforms_reports_text.append(f"### Análise Detalhada do Meta Ads\n\n{meta_results['report']}")
+
+                    all_platforms_reports_markdown = "\n\n".join(all_platforms_reports_text) if all_platforms_reports_text else "Nenhuma análise de plataforma disponível."
+                    kpis_markdown, comparatives_markdown = self._consolidated_tables(platform_results)
+
+                    prompt = consolidated_prompt_template.format(
+                        client_name=client_name,
+                        mes_analise=datetime.strptime(mes_analise_atual_str, "%Y-%m-%d").strftime('%B de %Y'),
+                        kpis_consolidated_markdown=kpis_markdown,
+                        comparatives_consolidates_markdown=comparatives_markdown,
+                        all_platforms_reports=all_platforms_reports_markdown
+                    )
+
+                    if stream_callback is None:
+                        final_report = self.llm_service.generate_text(prompt, use_cache=usar_cache)
+                    else:
+                        final_report = self.llm_service.stream_text(prompt, lambda chunk: stream_callback('consolidacao', chunk), use_cache=usar_cache)
+            self._report_progress(progress_callback, 'consolidacao', 'concluido')
 
         except Exception as e:
             logger.error(f"Erro ao gerar relatório consolidado com LLM: {e}", exc_info=True)
             errors.append(f"Erro na consolidação do relatório final: {e}")
+            self._report_progress(progress_callback, 'consolidacao', 'erro')
             # Retorna um dicionário de erro se a consolidação falhar.
             return {"error": "Falha ao gerar o relatório consolidado.", "details": errors}
 
+        self._report_progress(progress_callback, 'salvamento', 'executando')
         file_path = get_report_path(client_name, mes_analise_atual_str, file_type="consolidated")
         try:
-            save_to_file(file_path, final_report)
+            with timed('salvamento'):
+                save_to_file(file_path, final_report)
+                register_report(cliente_config.get("id"), client_name, mes_analise_atual_str, file_path)
+            self._report_progress(progress_callback, 'salvamento', 'concluido')
         except Exception as e:
             logger.error(f"Erro ao salvar relatório final: {e}", exc_info=True)
+            self._report_progress(progress_callback, 'salvamento', 'erro')
             # Retorna um dicionário de erro se o salvamento falhar.
             return {"error": "Erro ao salvar o relatório final.", "details": [str(e)]}
 
@@ -125,3 +322,15 @@ def get_orchestrator():
     """
     llm_service = get_llm_service()
     return Orchestrator(llm_service)
+
+_shared_orchestrator = None
+_shared_orchestrator_lock = threading.Lock()
+
+def get_shared_orchestrator():
+    """Retorna o Orchestrator compartilhado pela aplicação, criado no primeiro uso."""
+    global _shared_orchestrator
+    if _shared_orchestrator is None:
+        with _shared_orchestrator_lock:
+            if _shared_orchestrator is None:
+                _shared_orchestrator = get_orchestrator()
+    return _shared_orchestrator
@@ -1,6 +1,9 @@
 import json
 import os
 
+# Configuração global da aplicação (provedores de LLM, retentativas etc.)
+GLOBAL_CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'global_config.json')
+
 def load_config(file_path: str):
     """
     Carrega um arquivo de configuração JSON.
@@ -17,6 +20,10 @@ def load_config(file_path: str):
     with open(file_path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
+def load_global_config() -> dict:
+    """Carrega o `global_config.json` da aplicação."""
+    return load_config(GLOBAL_CONFIG_PATH)
+
 def load_credentials():
     """
     Carrega as credenciais do Google a partir do arquivo especificado
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -9,16 +11,41 @@ class Settings(BaseSettings):
 
     # Configurações do Banco de Dados
     DATABASE_URL: str = "sqlite:///./app/db/clients.db"
+    SQLITE_TUNED: bool = True # Modo de produção: WAL e pragmas abaixo; False usa os padrões do SQLite
+    SQLITE_SYNCHRONOUS: str = "NORMAL" # Seguro com WAL; FULL garante durabilidade a cada commit
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000 # Espera por locks de escrita antes de falhar com "database is locked"
+    SQLITE_MMAP_SIZE: int = 268435456 # Bytes do arquivo mapeados em memória (256 MB); 0 desativa
+    SQLITE_CACHE_SIZE_KB: int = 16384 # Cache de páginas por conexão (16 MB)
+    DB_POOL_SIZE: int = 10 # Conexões mantidas abertas no pool
+    DB_MAX_OVERFLOW: int = 20 # Conexões extras abertas em picos de concorrência
+    DB_POOL_TIMEOUT: int = 30 # Segundos de espera por uma conexão livre no pool
+
+    # Diretório de dados locais da aplicação (caches, armazenamentos auxiliares)
+    APP_DATA_DIR: str = "./app/data"
 
     # Configurações do LLM
-    LLM_PROVIDER: str = "google"
-    GOOGLE_API_KEY: str
+    LLM_PROVIDER: str = "google" # Provedor registrado em `app.core.llm_providers` ('google' ou 'stub')
+    LLM_MODEL_NAME: Optional[str] = None # Sobrescreve o modelo do provedor definido no global_config.json
+    LLM_STUB_LATENCY_SECONDS: Optional[float] = None # Latência simulada pelo provedor 'stub'; None usa o global_config.json
+    GOOGLE_API_KEY: Optional[str] = None # Obrigatória apenas com o provedor 'google'
+    LLM_CACHE_ENABLED: bool = True # Reaproveita respostas de prompts idênticos
+    LLM_CACHE_MAX_ENTRIES: int = 500 # Limite de entradas do cache (descarte LRU)
+    LLM_CACHE_TTL_SECONDS: Optional[int] = None # Validade das entradas; None para não expirar
 
     # Configurações do Google Sheets
     GOOGLE_CREDS_PATH: str
+    SHEETS_CACHE_ENABLED: bool = True # Reaproveita abas já baixadas enquanto a planilha não mudar
+    SHEETS_SYNC_ENABLED: bool = False # Sincroniza incrementalmente abas append-only em um armazenamento local
+
+    # Diretório base dos arquivos de dados (CSV/Parquet/XLSX) com caminho relativo
+    DATA_FILES_DIR: str = "./app/data/files"
 
     # Configurações do Servidor
     PORT: int = 8000
+    ANALYSIS_MAX_WORKERS: int = 2 # Análises executadas simultaneamente pela fila de jobs
+    JOB_HEARTBEAT_SECONDS: int = 15 # Intervalo em que cada worker confirma que seus jobs seguem ativos
+    JOB_STALE_SECONDS: int = 60 # Sem confirmação por este tempo, os jobs do worker são retomados por outro
+    WARMUP_ON_STARTUP: bool = False # Prepara o LLM e a autenticação do Google em segundo plano ao subir
 
 # Cria uma instância única das configurações para ser importada em outros módulos
 settings = Settings()
@@ -1,13 +1,33 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Tuple
 import pandas as pd
 
+# Cabeçalhos aceitos para a coluna de data das fontes de dados
+DATE_COLUMN_HEADERS = ('Data', 'Date')
+
+def filter_date_windows(df: pd.DataFrame, date_windows: List[Tuple[datetime, datetime]] = None) -> pd.DataFrame:
+    """
+    Mantém apenas as linhas cujas datas caem em alguma das janelas (início e fim inclusivos).
+    Datas em texto são interpretadas no formato dd/mm/aaaa. Se não houver janelas
+    ou coluna de data, o DataFrame é retornado sem alterações.
+    """
+    date_header = next((h for h in DATE_COLUMN_HEADERS if h in df.columns), None)
+    if not date_windows or df.empty or date_header is None:
+        return df
+    dates = pd.to_datetime(df[date_header], errors='coerce', format='%d/%m/%Y')
+    mask = pd.Series(False, index=df.index)
+    for start, end in date_windows:
+        mask |= (dates >= start) & (dates <= end)
+    return df[mask].reset_index(drop=True)
+
 class BaseConnector(ABC):
     """
     Classe base abstrata (interface) para conectores de dados.
     Define o contrato que todos os conectores de dados devem seguir.
     """
     @abstractmethod
-    def get_data(self, data_source: str, client_config: dict, mes_analise: str) -> pd.DataFrame:
+    def get_data(self, data_source: str, client_config: dict, mes_analise: str, date_windows: List[Tuple[datetime, datetime]] = None) -> pd.DataFrame:
         """
         Método principal que busca dados de uma fonte específica.
         Deve ser implementado por todas as subclasses.
@@ -16,8 +36,33 @@ class BaseConnector(ABC):
             data_source (str): A fonte dos dados (ex: 'google_ads', 'meta_ads').
             client_config (dict): A configuração do cliente.
             mes_analise (str): O mês da análise no formato 'AAAA-MM-DD'.
+            date_windows (List[Tuple[datetime, datetime]]): Janelas de datas (início e fim inclusivos)
+                necessárias para a análise. Opcional; conectores que não suportam leitura
+                parcial podem ignorá-lo e retornar todo o histórico.
 
         Returns:
             pd.DataFrame: Um DataFrame do pandas com os dados extraídos.
         """
         pass
+
+    def get_many(self, data_sources: List[str], client_config: dict, mes_analise: str, date_windows: List[Tuple[datetime, datetime]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Busca dados de várias fontes de uma só vez.
+        A implementação padrão chama `get_data` para cada fonte; conectores que
+        suportam leitura em lote devem sobrescrever este método.
+
+        Args:
+            data_sources (List[str]): As fontes dos dados (ex: ['google_ads', 'meta_ads']).
+            client_config (dict): A configuração do cliente.
+            mes_analise (str): O mês da análise no formato 'AAAA-MM-DD'.
+            date_windows (List[Tuple[datetime, datetime]]): Janelas de datas necessárias (opcional).
+
+        Returns:
+            Dict[str, pd.DataFrame]: Um DataFrame por fonte de dados.
+        """
+        return {
+            data_source: self.get_data(
+                data_source=data_source, client_config=client_config, mes_analise=mes_analise, date_windows=date_windows
+            )
+            for data_source in data_sources
+        }
@@ -0,0 +1,102 @@
+import os
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from app.config.settings import settings
+from app.utils.custom_exceptions import ErroLeituraDadosError
+from app.core.connectors.base_connector import BaseConnector, filter_date_windows
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.csv', '.parquet', '.xlsx')
+
+class FileConnector(BaseConnector):
+    """
+    Conector para extrair dados de arquivos locais (CSV, Parquet ou XLSX).
+    Implementa a interface BaseConnector.
+
+    O arquivo de cada fonte é definido na configuração do cliente
+    (`google_ads_file_path` e `meta_ads_file_path`); caminhos relativos são
+    resolvidos a partir de `settings.DATA_FILES_DIR`.
+    """
+    def __init__(self, columns: Iterable[str] = None):
+        """
+        Args:
+            columns (Iterable[str]): Colunas a serem lidas dos arquivos. Colunas ausentes
+                no arquivo são ignoradas; se None, todas as colunas são lidas.
+        """
+        self.base_dir = settings.DATA_FILES_DIR
+        self.columns = set(columns) if columns is not None else None
+
+    def _get_file_path(self, data_source: str, client_config: dict) -> str:
+        """Retorna o caminho absoluto do arquivo configurado para a fonte de dados."""
+        if data_source == 'google_ads':
+            file_path = client_config.get('google_ads_file_path')
+        elif data_source == 'meta_ads':
+            file_path = client_config.get('meta_ads_file_path')
+        else:
+            raise ValueError(f"Fonte de dados desconhecida para o FileConnector: {data_source}")
+
+        if not file_path:
+            raise ErroLeituraDadosError(f"Arquivo de dados não configurado para '{data_source}' do cliente '{client_config.get('nome_exibicao')}'.")
+        if not os.path.isabs(file_path):
+            file_path = os.path.join(self.base_dir, file_path)
+        return file_path
+
+    def _select_columns(self, available_columns: List[str]) -> List[str]:
+        """Retorna as colunas desejadas presentes no arquivo, na ordem do arquivo."""
+        if self.columns is None:
+            return list(available_columns)
+        return [col for col in available_columns if col in self.columns]
+
+    def _read_file(self, file_path: str) -> pd.DataFrame:
+        """Lê apenas as colunas necessárias do arquivo, usando leitores baseados em Arrow quando possível."""
+        extension = os.path.splitext(file_path)[1].lower()
+
+        if extension == '.parquet':
+            columns = self._select_columns(pq.read_schema(file_path).names)
+            return pd.read_parquet(file_path, columns=columns, memory_map=True)
+
+        if extension == '.csv':
+            columns = self._select_columns(pd.read_csv(file_path, nrows=0).columns)
+            return pd.read_csv(file_path, usecols=columns, engine='pyarrow')
+
+        if extension == '.xlsx':
+            usecols = None if self.columns is None else (lambda col: col in self.columns)
+            return pd.read_excel(file_path, usecols=usecols, engine='openpyxl')
+
+        raise ErroLeituraDadosError(f"Formato de arquivo não suportado: '{extension}'. Formatos aceitos: {', '.join(SUPPORTED_EXTENSIONS)}.")
+
+    def get_data(self, data_source: str, client_config: dict, mes_analise: str, date_windows: List[Tuple[datetime, datetime]] = None) -> pd.DataFrame:
+        """
+        Lê os dados do arquivo configurado para a fonte e mantém apenas as
+        linhas das janelas de datas informadas.
+        """
+        file_path = self._get_file_path(data_source, client_config)
+        if not os.path.exists(file_path):
+            raise ErroLeituraDadosError(f"Arquivo de dados '{file_path}' não encontrado para '{data_source}'.")
+
+        try:
+            df = self._read_file(file_path)
+        except ErroLeituraDadosError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro inesperado ao ler o arquivo de dados '{file_path}': {e}")
+            raise ErroLeituraDadosError(f"Erro inesperado ao ler o arquivo de dados: {e}")
+
+        return filter_date_windows(df, date_windows)
+
+    def get_many(self, data_sources: List[str], client_config: dict, mes_analise: str, date_windows: List[Tuple[datetime, datetime]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Lê os arquivos de várias fontes. Fontes sem arquivo configurado são omitidas
+        do resultado, para que o chamador recorra a `get_data` e receba o erro específico.
+        """
+        configured_sources = [
+            data_source for data_source in data_sources
+            if client_config.get(f'{data_source}_file_path')
+        ]
+        return super().get_many(configured_sources, client_config, mes_analise, date_windows)
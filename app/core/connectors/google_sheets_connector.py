@@ -1,9 +1,13 @@
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+from gspread.utils import absolute_range_name, fill_gaps, numericise_all, rightpad, rowcol_to_a1
 import os
+import threading
 import pandas as pd
 import traceback
 import logging
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 
 from app.config.settings import settings # Importar settings
 from app.utils.custom_exceptions import (
@@ -13,11 +17,92 @@ from app.utils.custom_exceptions import (
     ErroLeituraDadosError
 )
 from app.utils.data_cleaners import limpar_numero
-from app.core.connectors.base_connector import BaseConnector
+from app.core.connectors.base_connector import BaseConnector, DATE_COLUMN_HEADERS, filter_date_windows
+from app.core.connectors.sheet_cache import SheetCache
+from app.core.connectors.sheet_sync_store import SheetSyncStore
+from app.db.database import SessionLocal, update_client_spreadsheet_key
+from app.utils.timing import timed, record_cache_access
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+def _values_to_dataframe(values: List[List]) -> pd.DataFrame:
+    """
+    Converte os valores brutos de um intervalo (primeira linha como cabeçalho)
+    em um DataFrame, com a mesma numericização feita por `get_all_records`.
+    """
+    if not values or len(values) < 2:
+        return pd.DataFrame()
+
+    values = fill_gaps(values)
+    headers, rows = values[0], values[1:]
+    records = [dict(zip(headers, numericise_all(row))) for row in rows]
+    return pd.DataFrame(records)
+
+def _parse_sheet_date(value) -> Optional[datetime]:
+    """Converte uma data da planilha (dd/mm/aaaa) em datetime, ou None se inválida."""
+    try:
+        return datetime.strptime(str(value).strip(), '%d/%m/%Y')
+    except ValueError:
+        return None
+
+def _find_row_spans(dates: List[Optional[datetime]], date_windows: List[Tuple[datetime, datetime]]) -> Optional[List[Tuple[int, int]]]:
+    """
+    Encontra os intervalos de linhas (índices 0-based, inclusivos) cujas datas caem
+    em alguma das janelas. Usa busca binária quando a coluna de datas está ordenada.
+    Retorna None se nenhuma data puder ser interpretada.
+    """
+    parsed = [(i, d) for i, d in enumerate(dates) if d is not None]
+    if not parsed:
+        return None
+
+    spans = []
+    keys = [d for _, d in parsed]
+    if all(keys[k] <= keys[k + 1] for k in range(len(keys) - 1)):
+        for start, end in date_windows:
+            lo, hi = bisect_left(keys, start), bisect_right(keys, end)
+            if lo < hi:
+                spans.append((parsed[lo][0], parsed[hi - 1][0]))
+    else:
+        for i, d in parsed:
+            if any(start <= d <= end for start, end in date_windows):
+                spans.append((i, i))
+
+    # Une intervalos sobrepostos ou adjacentes para reduzir o número de ranges
+    merged = []
+    for first, last in sorted(spans):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+def _date_column_letter(headers: List) -> Optional[str]:
+    """Letra da coluna de data da aba (primeiro cabeçalho de `DATE_COLUMN_HEADERS` presente), ou None."""
+    date_header = next((h for h in DATE_COLUMN_HEADERS if h in headers), None)
+    if date_header is None:
+        return None
+    return rowcol_to_a1(1, headers.index(date_header) + 1)[:-1]
+
+def _cache_entry_name(sheet_tab_name: str, date_windows: List[Tuple[datetime, datetime]] = None) -> str:
+    """Nome da entrada de cache: a aba, acrescida das janelas de datas quando houver."""
+    if not date_windows:
+        return sheet_tab_name
+    windows_key = ",".join(f"{start:%Y%m%d}-{end:%Y%m%d}" for start, end in date_windows)
+    return f"{sheet_tab_name}@{windows_key}"
+
+class _SpreadsheetValues:
+    """
+    Acesso à API de valores de uma planilha pela chave, sem abri-la: evita a
+    chamada de metadados feita por `open_by_key` quando só os valores são lidos.
+    """
+    def __init__(self, http_client, spreadsheet_id: str):
+        self.client = http_client
+        self.id = spreadsheet_id
+
+    def values_batch_get(self, ranges: List[str], params: dict = None):
+        return self.client.values_batch_get(self.id, ranges, params=params)
+
 class GoogleSheetsConnector(BaseConnector):
     """
     Conector para extrair dados do Google Sheets.
@@ -26,41 +111,324 @@ class GoogleSheetsConnector(BaseConnector):
     def __init__(self):
         self.creds_path = settings.GOOGLE_CREDS_PATH
         
-        if not os.path.exists(self.creds_path):
-            raise FileNotFoundError(f"Arquivo de credenciais não encontrado: {self.creds_path}")
-        
         # O escopo padrão para a API do Google Sheets v4
         self.scope = [
             'https://www.googleapis.com/auth/spreadsheets',
             'https://www.googleapis.com/auth/drive'
         ]
-        self.creds = ServiceAccountCredentials.from_json_keyfile_name(self.creds_path, self.scope)
-        self.client = gspread.authorize(self.creds)
+        # A autenticação é feita no primeiro acesso a `client` (ou em `warm_up`)
+        self._client = None
+        self._client_lock = threading.Lock()
+
+        # Cache em disco das abas, revalidado pelo modifiedTime da planilha no Drive
+        self.cache = None
+        if settings.SHEETS_CACHE_ENABLED:
+            self.cache = SheetCache(os.path.join(settings.APP_DATA_DIR, 'sheets_cache'))
+
+        # Sincronização incremental (abas append-only) em um armazenamento local
+        self.sync_store = None
+        if settings.SHEETS_SYNC_ENABLED:
+            self.sync_store = SheetSyncStore(os.path.join(settings.APP_DATA_DIR, 'sheets_sync'), date_headers=DATE_COLUMN_HEADERS)
+
+    @property
+    def client(self) -> gspread.Client:
+        """Cliente gspread autenticado, criado no primeiro uso."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    if not os.path.exists(self.creds_path):
+                        raise FileNotFoundError(f"Arquivo de credenciais não encontrado: {self.creds_path}")
+                    from oauth2client.service_account import ServiceAccountCredentials
+                    creds = ServiceAccountCredentials.from_json_keyfile_name(self.creds_path, self.scope)
+                    self._client = gspread.authorize(creds)
+        return self._client
+
+    def warm_up(self):
+        """Autentica antecipadamente no Google, evitando o custo na primeira leitura."""
+        return self.client
+
+    def _save_spreadsheet_key(self, client_config: dict, planilha_key: str):
+        """Persiste a chave resolvida da planilha no cadastro do cliente."""
+        client_config['planilha_key'] = planilha_key
+        client_id = client_config.get('id')
+        if not client_id:
+            return
+        db = SessionLocal()
+        try:
+            update_client_spreadsheet_key(db, client_id, planilha_key)
+        except Exception as e:
+            logger.warning(f"Não foi possível salvar a chave da planilha do cliente '{client_id}': {e}")
+        finally:
+            db.close()
 
-    def get_data(self, data_source: str, client_config: dict, mes_analise: str) -> pd.DataFrame:
+    @timed("sheets_open")
+    def _open_spreadsheet(self, client_config: dict):
         """
-        Busca e limpa dados de uma aba específica do Google Sheets.
+        Abre a planilha do cliente. O nome é resolvido para a chave da planilha
+        (busca no Drive) apenas uma vez; a chave fica salva no cliente e as
+        aberturas seguintes usam `open_by_key`. Se a chave deixar de funcionar,
+        ela é descartada e o nome é resolvido novamente.
         """
-        spreadsheet_name = client_config.get("planilha_id_ou_nome")
-        
+        planilha_key = client_config.get('planilha_key')
+        if planilha_key:
+            try:
+                return self.client.open_by_key(planilha_key)
+            except (gspread.exceptions.SpreadsheetNotFound, PermissionError) as e:
+                logger.info(f"Chave da planilha '{planilha_key}' inválida, resolvendo o nome novamente: {e!r}")
+                self._save_spreadsheet_key(client_config, None)
+
+        spreadsheet = self.client.open(client_config.get("planilha_id_ou_nome"))
+        self._save_spreadsheet_key(client_config, spreadsheet.id)
+        return spreadsheet
+
+    @timed("sheets_version")
+    def _get_spreadsheet_version(self, spreadsheet_key: str) -> Optional[str]:
+        """
+        Retorna a versão atual da planilha (modifiedTime do Drive) com uma única
+        chamada de metadados pela chave, sem abrir a planilha. Retorna None se
+        não for possível obtê-la.
+        """
+        try:
+            return self.client.http_client.get_file_drive_metadata(spreadsheet_key)["modifiedTime"]
+        except Exception as e:
+            logger.warning(f"Não foi possível obter o modifiedTime da planilha '{spreadsheet_key}': {e}")
+            return None
+
+    def _get_stored_key_version(self, client_config: dict) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Consulta a versão da planilha pela chave salva no cliente, antes de abri-la,
+        para que uma leitura atendida pelo cache custe apenas essa chamada.
+        Retorna (chave, versão); (None, None) sem cache ou sem chave resolvida.
+        """
+        planilha_key = client_config.get('planilha_key') if self.cache else None
+        if not planilha_key:
+            return None, None
+        return planilha_key, self._get_spreadsheet_version(planilha_key)
+
+    def _get_sheet_tab_name(self, data_source: str, client_config: dict) -> str:
+        """Retorna o nome da aba configurada para a fonte de dados."""
         if data_source == 'google_ads':
-            sheet_tab_name = client_config.get('google_sheet_tab_name')
+            return client_config.get('google_sheet_tab_name')
         elif data_source == 'meta_ads':
-            sheet_tab_name = client_config.get('meta_sheet_tab_name')
-        else:
-            raise ValueError(f"Fonte de dados desconhecida para o GoogleSheetsConnector: {data_source}")
+            return client_config.get('meta_sheet_tab_name')
+        raise ValueError(f"Fonte de dados desconhecida para o GoogleSheetsConnector: {data_source}")
+
+    def _get_tab_layouts(self, spreadsheet, tab_names: Dict[str, str], version: str = None) -> Dict[str, Tuple[List, Optional[List]]]:
+        """
+        Retorna, por fonte, o cabeçalho da aba e os valores da coluna de data
+        (None se a aba não tiver coluna de data reconhecível).
+
+        Com `version`, o layout fica em cache e, na mesma versão, nenhuma chamada é
+        feita. Em uma versão nova, uma única chamada `values.batchGet` lê, por aba,
+        o cabeçalho e a coluna de data a partir da última linha já conhecida, e o
+        layout anterior é estendido com as linhas novas (abas append-only). Se o
+        cabeçalho ou essa última linha tiverem mudado, ou se a aba ainda não tiver
+        layout, a coluna de data é lida por inteiro em uma segunda chamada.
+        """
+        use_cache = bool(self.cache and version)
+        layouts, previous_layouts = {}, {}
+        for data_source, sheet_tab_name in tab_names.items():
+            layout = self.cache.get_layout(spreadsheet.id, sheet_tab_name) if use_cache else None
+            if layout is None:
+                continue
+            if layout["version"] == version:
+                layouts[data_source] = (layout["headers"], layout["dates"])
+            elif layout["dates"] is not None:
+                previous_layouts[data_source] = layout
+
+        pending = {ds: tab for ds, tab in tab_names.items() if ds not in layouts}
+        if not pending:
+            return layouts
+
+        ranges = []
+        for data_source, sheet_tab_name in pending.items():
+            ranges.append(absolute_range_name(sheet_tab_name, '1:1'))
+            previous = previous_layouts.get(data_source)
+            if previous:
+                # A linha 1 é o cabeçalho: a última data conhecida está na linha len(dates) + 1
+                column = _date_column_letter(previous["headers"])
+                ranges.append(absolute_range_name(sheet_tab_name, f"{column}{len(previous['dates']) + 1}:{column}"))
+        value_ranges = iter(spreadsheet.values_batch_get(ranges).get('valueRanges', []))
+
+        date_columns = {}
+        for data_source in pending:
+            headers = (next(value_ranges, {}).get('values') or [[]])[0]
+            previous = previous_layouts.get(data_source)
+            if previous:
+                tail = [row[0] if row else '' for row in next(value_ranges, {}).get('values', [])]
+                # Última célula conhecida da coluna (o próprio cabeçalho, se a aba não tinha linhas)
+                last_known = previous["dates"][-1] if previous["dates"] else next(h for h in DATE_COLUMN_HEADERS if h in previous["headers"])
+                if headers == previous["headers"] and tail[:1] == [last_known]:
+                    layouts[data_source] = (headers, previous["dates"] + tail[1:])
+                    continue
+                logger.info(f"Aba '{pending[data_source]}' alterada desde o último layout; relendo a coluna de data.")
+            layouts[data_source] = (headers, None)
+            column = _date_column_letter(headers)
+            if column is not None:
+                date_columns[data_source] = column
+
+        if date_columns:
+            dates_response = spreadsheet.values_batch_get([
+                absolute_range_name(pending[ds], f'{column}2:{column}') for ds, column in date_columns.items()
+            ])
+            for data_source, value_range in zip(date_columns, dates_response.get('valueRanges', [])):
+                dates = [row[0] if row else '' for row in value_range.get('values', [])]
+                layouts[data_source] = (layouts[data_source][0], dates)
+
+        if use_cache:
+            for data_source, sheet_tab_name in pending.items():
+                self.cache.put_layout(spreadsheet.id, sheet_tab_name, version, *layouts[data_source])
+        return layouts
+
+    @timed("sheets_download")
+    def _read_tabs(self, spreadsheet, tab_names: Dict[str, str], date_windows: List[Tuple[datetime, datetime]] = None,
+                   version: str = None) -> Dict[str, pd.DataFrame]:
+        """
+        Lê várias abas com chamadas `values.batchGet`.
+
+        Sem janelas de datas, todas as abas são lidas por inteiro em uma só chamada.
+        Com janelas, o layout de cada aba (cabeçalho e coluna de data, ver
+        `_get_tab_layouts`) localiza as linhas das janelas, e apenas essas linhas
+        são baixadas, em uma única chamada. Com o layout em cache para a versão
+        informada, essa é a única chamada; após uma alteração da planilha, o layout
+        é estendido com mais uma; sem layout anterior, são feitas mais duas.
+        Abas sem coluna de data reconhecível são lidas por inteiro.
+        """
+        full_reads = list(tab_names) if not date_windows else []
+        headers_by_source, row_spans = {}, {}
+
+        if date_windows:
+            for data_source, (headers, dates) in self._get_tab_layouts(spreadsheet, tab_names, version).items():
+                headers_by_source[data_source] = headers
+                spans = None if dates is None else _find_row_spans([_parse_sheet_date(value) for value in dates], date_windows)
+                if spans is None:
+                    full_reads.append(data_source)
+                else:
+                    row_spans[data_source] = spans
+
+        # Monta todos os ranges de dados e os lê em uma única chamada
+        ranges, owners = [], []
+        for data_source, spans in row_spans.items():
+            last_column = rowcol_to_a1(1, len(headers_by_source[data_source]))[:-1]
+            for first, last in spans:
+                # +2: linha 1 é o cabeçalho e as linhas da planilha começam em 1
+                ranges.append(absolute_range_name(tab_names[data_source], f'A{first + 2}:{last_column}{last + 2}'))
+                owners.append(data_source)
+        for data_source in full_reads:
+            ranges.append(absolute_range_name(tab_names[data_source]))
+            owners.append(data_source)
+
+        collected = {data_source: [] for data_source in tab_names}
+        for data_source in row_spans:
+            collected[data_source].append(headers_by_source[data_source])
+        if ranges:
+            response = spreadsheet.values_batch_get(ranges)
+            for data_source, value_range in zip(owners, response.get('valueRanges', [])):
+                collected[data_source].extend(value_range.get('values', []))
+
+        return {data_source: _values_to_dataframe(values) for data_source, values in collected.items()}
+
+    @timed("sheets_sync")
+    def _sync_tabs(self, spreadsheet, tab_names: Dict[str, str], date_windows: List[Tuple[datetime, datetime]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Sincroniza as abas (tratadas como logs append-only) com o armazenamento local
+        e retorna os dados a partir dele.
+
+        Para cada aba já sincronizada, uma única chamada `values.batchGet` lê o
+        cabeçalho e as linhas a partir da última linha registrada. Se o cabeçalho
+        ou essa última linha tiverem mudado, a aba não é mais append-only desde a
+        última sincronização e é baixada por inteiro novamente.
+        """
+        states = {ds: self.sync_store.get_state(spreadsheet.id, tab) for ds, tab in tab_names.items()}
+
+        ranges = []
+        for data_source, sheet_tab_name in tab_names.items():
+            state = states[data_source]
+            if state is None:
+                ranges.append(absolute_range_name(sheet_tab_name))
+            else:
+                last_column = rowcol_to_a1(1, len(state['headers']))[:-1]
+                ranges.append(absolute_range_name(sheet_tab_name, '1:1'))
+                ranges.append(absolute_range_name(sheet_tab_name, f"A{state['last_row']}:{last_column}"))
+
+        value_ranges = iter(spreadsheet.values_batch_get(ranges).get('valueRanges', []))
+        full_resync = {}
+        for data_source, sheet_tab_name in tab_names.items():
+            state = states[data_source]
+            if state is None:
+                self.sync_store.replace(spreadsheet.id, sheet_tab_name, next(value_ranges, {}).get('values', []))
+                continue
+
+            headers = (next(value_ranges, {}).get('values') or [[]])[0]
+            tail = next(value_ranges, {}).get('values', [])
+            if headers != state['headers'] or not tail or rightpad(tail[0], len(headers)) != state['last_row_values']:
+                logger.info(f"Aba '{sheet_tab_name}' alterada desde a última sincronização; sincronizando por inteiro.")
+                full_resync[data_source] = sheet_tab_name
+            else:
+                logger.info(f"Aba '{sheet_tab_name}': {len(tail) - 1} linha(s) nova(s) sincronizada(s).")
+                self.sync_store.append(spreadsheet.id, sheet_tab_name, state, tail[1:])
+
+        if full_resync:
+            response = spreadsheet.values_batch_get([absolute_range_name(tab) for tab in full_resync.values()])
+            for sheet_tab_name, value_range in zip(full_resync.values(), response.get('valueRanges', [])):
+                self.sync_store.replace(spreadsheet.id, sheet_tab_name, value_range.get('values', []))
+
+        return {
+            data_source: filter_date_windows(self.sync_store.read(spreadsheet.id, sheet_tab_name), date_windows)
+            for data_source, sheet_tab_name in tab_names.items()
+        }
+
+    @timed("sheets_get_data")
+    def get_data(self, data_source: str, client_config: dict, mes_analise: str, date_windows: List[Tuple[datetime, datetime]] = None) -> pd.DataFrame:
+        """
+        Busca e limpa dados de uma aba específica do Google Sheets.
+        Se `date_windows` for informado, apenas as linhas dessas janelas são baixadas.
+        """
+        spreadsheet_name = client_config.get("planilha_id_ou_nome")
+        sheet_tab_name = self._get_sheet_tab_name(data_source, client_config)
 
         if not spreadsheet_name or not sheet_tab_name:
             raise ErroLeituraDadosError(f"Configuração da planilha (nome ou aba) incompleta para '{data_source}' do cliente '{client_config.get('nome_exibicao')}'.")
 
         try:
-            worksheet = self.client.open(spreadsheet_name).worksheet(sheet_tab_name)
-            all_data = worksheet.get_all_records()
-            
-            if not all_data:
-                return pd.DataFrame() # Retorna DataFrame vazio se não houver dados
+            if self.sync_store:
+                spreadsheet = self._open_spreadsheet(client_config)
+                return self._sync_tabs(spreadsheet, {data_source: sheet_tab_name}, date_windows)[data_source]
+
+            cache_entry = _cache_entry_name(sheet_tab_name, date_windows)
+            planilha_key, version = self._get_stored_key_version(client_config)
+            if version:
+                cached_df = self.cache.get(planilha_key, cache_entry, version)
+                record_cache_access("sheets", cached_df is not None)
+                if cached_df is not None:
+                    logger.info(f"Usando cache da aba '{sheet_tab_name}' da planilha '{spreadsheet_name}'.")
+                    return cached_df
+
+            if version and date_windows:
+                # Chave confirmada no Drive e leitura só pela API de valores: a planilha não precisa ser aberta
+                spreadsheet = _SpreadsheetValues(self.client.http_client, planilha_key)
+            else:
+                spreadsheet = self._open_spreadsheet(client_config)
+                if self.cache and spreadsheet.id != planilha_key:
+                    # Chave resolvida agora (pelo nome): a versão é a da planilha aberta
+                    version = self._get_spreadsheet_version(spreadsheet.id)
+
+            if date_windows:
+                df = self._read_tabs(spreadsheet, {data_source: sheet_tab_name}, date_windows, version)[data_source]
+                if df.empty:
+                    return df
+            else:
+                with timed("sheets_download"):
+                    worksheet = spreadsheet.worksheet(sheet_tab_name)
+                    all_data = worksheet.get_all_records()
+
+                if not all_data:
+                    return pd.DataFrame() # Retorna DataFrame vazio se não houver dados
 
-            df = pd.DataFrame(all_data)
+                df = pd.DataFrame(all_data)
+
+            if version:
+                self.cache.put(spreadsheet.id, cache_entry, version, df)
             
             # A lógica de limpeza e transformação que estava no MediaAgent pode ser movida para cá
             # ou permanecer no agente, dependendo do nível de abstração desejado.
@@ -72,7 +440,72 @@ class GoogleSheetsConnector(BaseConnector):
             raise PlanilhaNaoEncontradaError(f"Planilha '{spreadsheet_name}' não encontrada.")
         except gspread.exceptions.WorksheetNotFound as e:
             raise AbaNaoEncontradaError(f"Aba '{sheet_tab_name}' não encontrada na planilha '{spreadsheet_name}'.")
+        except gspread.exceptions.APIError as e:
+            # Ranges de uma aba inexistente são rejeitados pela API de valores
+            if 'Unable to parse range' in str(e):
+                raise AbaNaoEncontradaError(f"Aba '{sheet_tab_name}' não encontrada na planilha '{spreadsheet_name}'.")
+            logger.error(f"Erro da API do Google Sheets ao extrair dados: {e}")
+            raise ErroLeituraDadosError(f"Erro ao ler dados da planilha: {e}")
         except Exception as e:
             logger.error(f"Erro inesperado ao extrair dados do Google Sheets: {e}")
             traceback.print_exc()
             raise ErroLeituraDadosError(f"Erro inesperado ao ler dados da planilha: {e}")
+
+    @timed("sheets_get_many")
+    def get_many(self, data_sources: List[str], client_config: dict, mes_analise: str, date_windows: List[Tuple[datetime, datetime]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Busca as abas de várias fontes de dados abrindo a planilha no máximo uma vez
+        (nenhuma, se a chave salva já foi confirmada pela consulta de versão) e lendo
+        todas as abas não cacheadas em chamadas `values.batchGet` conjuntas.
+        Se `date_windows` for informado, apenas as linhas dessas janelas são baixadas.
+
+        Fontes sem planilha ou aba configurada são omitidas do resultado, para que
+        o chamador recorra a `get_data` e receba o erro específico da fonte.
+        """
+        spreadsheet_name = client_config.get("planilha_id_ou_nome")
+        tab_names = {}
+        for data_source in data_sources:
+            sheet_tab_name = self._get_sheet_tab_name(data_source, client_config)
+            if spreadsheet_name and sheet_tab_name:
+                tab_names[data_source] = sheet_tab_name
+
+        if not tab_names:
+            return {}
+
+        try:
+            if self.sync_store:
+                spreadsheet = self._open_spreadsheet(client_config)
+                return self._sync_tabs(spreadsheet, tab_names, date_windows)
+
+            results = {}
+
+            planilha_key, version = self._get_stored_key_version(client_config)
+            if version:
+                for data_source, sheet_tab_name in tab_names.items():
+                    cached_df = self.cache.get(planilha_key, _cache_entry_name(sheet_tab_name, date_windows), version)
+                    record_cache_access("sheets", cached_df is not None)
+                    if cached_df is not None:
+                        logger.info(f"Usando cache da aba '{sheet_tab_name}' da planilha '{spreadsheet_name}'.")
+                        results[data_source] = cached_df
+
+            pending = {ds: tab for ds, tab in tab_names.items() if ds not in results}
+            if pending:
+                if version:
+                    # Chave confirmada no Drive: as abas são lidas só pela API de valores, sem abrir a planilha
+                    spreadsheet = _SpreadsheetValues(self.client.http_client, planilha_key)
+                else:
+                    spreadsheet = self._open_spreadsheet(client_config)
+                    if self.cache and spreadsheet.id != planilha_key:
+                        version = self._get_spreadsheet_version(spreadsheet.id)
+                for data_source, df in self._read_tabs(spreadsheet, pending, date_windows, version).items():
+                    if version and not df.empty:
+                        self.cache.put(spreadsheet.id, _cache_entry_name(pending[data_source], date_windows), version, df)
+                    results[data_source] = df
+
+            return results
+
+        except gspread.exceptions.SpreadsheetNotFound as e:
+            raise PlanilhaNaoEncontradaError(f"Planilha '{spreadsheet_name}' não encontrada.")
+        except Exception as e:
+            logger.error(f"Erro inesperado ao extrair dados em lote do Google Sheets: {e}")
+            raise ErroLeituraDadosError(f"Erro inesperado ao ler dados da planilha em lote: {e}")
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import uuid
+import logging
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.utils.file_lock import file_lock
+
+logger = logging.getLogger(__name__)
+
+# Chave dos metadados do cache no esquema do arquivo Parquet
+CACHE_METADATA_KEY = b"sheet_cache"
+
+class SheetCache:
+    """
+    Cache persistente em disco das abas extraídas do Google Sheets.
+
+    Cada entrada é identificada pelo par (planilha, aba) e é um arquivo Parquet
+    com o DataFrame extraído; a versão da planilha (o `modifiedTime` do Drive) no
+    momento do download fica nos metadados do esquema do próprio arquivo, de modo
+    que dados e versão são confirmados juntos, em um único `os.replace`.
+    A entrada só é reaproveitada se a versão atual da planilha for a mesma.
+
+    Também guarda o último layout de cada aba usado nas leituras por janelas de
+    datas (cabeçalho e valores da coluna de data, com a versão em que foi lido),
+    em um arquivo JSON próprio.
+
+    As escritas de uma entrada são serializadas por uma trava de arquivo e usam
+    arquivos temporários com nomes únicos; as leituras não precisam da trava.
+    """
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def _base_path(self, spreadsheet_id: str, tab_name: str) -> str:
+        entry_key = hashlib.sha256(f"{spreadsheet_id}\x00{tab_name}".encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.cache_dir, entry_key)
+
+    def _data_path(self, spreadsheet_id: str, tab_name: str) -> str:
+        return f"{self._base_path(spreadsheet_id, tab_name)}.parquet"
+
+    def _layout_path(self, spreadsheet_id: str, tab_name: str) -> str:
+        return f"{self._base_path(spreadsheet_id, tab_name)}.layout.json"
+
+    def _write_locked(self, spreadsheet_id: str, tab_name: str, path: str, write):
+        """Grava `path` com `write(caminho_temporário)` e `os.replace`, sob a trava da entrada."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with file_lock(f"{self._base_path(spreadsheet_id, tab_name)}.lock"):
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            try:
+                write(tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def get(self, spreadsheet_id: str, tab_name: str, version: str) -> Optional[pd.DataFrame]:
+        """
+        Retorna o DataFrame em cache se a versão armazenada for igual à versão informada.
+        Retorna None em caso de ausência, versão desatualizada ou falha de leitura.
+        """
+        data_path = self._data_path(spreadsheet_id, tab_name)
+        if not os.path.exists(data_path):
+            return None
+
+        try:
+            # Um único arquivo aberto: a versão lida é sempre a dos dados retornados
+            table = pq.read_table(data_path)
+            metadata = json.loads((table.schema.metadata or {}).get(CACHE_METADATA_KEY, b"{}"))
+            if metadata.get("version") != version:
+                logger.info(f"Cache desatualizado para a aba '{tab_name}' (versão {metadata.get('version')} != {version}).")
+                return None
+            return table.to_pandas()
+        except Exception as e:
+            logger.warning(f"Falha ao ler o cache da aba '{tab_name}': {e}")
+            return None
+
+    def put(self, spreadsheet_id: str, tab_name: str, version: str, df: pd.DataFrame):
+        """
+        Armazena o DataFrame extraído junto com a versão da planilha.
+        Falhas de escrita são apenas registradas, pois o cache é opcional.
+        """
+        try:
+            # Colunas com tipos mistos (ex: números e textos como "R$ 1.234,56") não
+            # são suportadas pelo Parquet; são gravadas como texto e limpas no agente.
+            df_to_store = df.copy()
+            for col in df_to_store.columns:
+                if df_to_store[col].dtype == object:
+                    df_to_store[col] = df_to_store[col].astype(str)
+
+            metadata = {
+                "spreadsheet_id": spreadsheet_id,
+                "tab_name": tab_name,
+                "version": version,
+                "rows": len(df_to_store),
+                "cached_at": datetime.now().isoformat(),
+            }
+            table = pa.Table.from_pandas(df_to_store, preserve_index=False)
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                CACHE_METADATA_KEY: json.dumps(metadata, ensure_ascii=False).encode("utf-8"),
+            })
+            self._write_locked(spreadsheet_id, tab_name, self._data_path(spreadsheet_id, tab_name),
+                               lambda tmp_path: pq.write_table(table, tmp_path))
+        except Exception as e:
+            logger.warning(f"Falha ao gravar o cache da aba '{tab_name}': {e}")
+
+    def get_layout(self, spreadsheet_id: str, tab_name: str) -> Optional[dict]:
+        """
+        Retorna o último layout armazenado da aba ({"version", "headers", "dates"},
+        com "dates" None se a aba não tiver coluna de data), de qualquer versão,
+        para que o chamador possa estendê-lo; ou None se não houver.
+        """
+        layout_path = self._layout_path(spreadsheet_id, tab_name)
+        if not os.path.exists(layout_path):
+            return None
+        try:
+            with open(layout_path, 'r', encoding='utf-8') as f:
+                layout = json.load(f)
+            return {"version": layout["version"], "headers": layout["headers"], "dates": layout["dates"]}
+        except Exception as e:
+            logger.warning(f"Falha ao ler o layout em cache da aba '{tab_name}': {e}")
+            return None
+
+    def put_layout(self, spreadsheet_id: str, tab_name: str, version: str, headers: list, dates: Optional[list]):
+        """Armazena o layout da aba junto com a versão da planilha. Falhas de escrita são apenas registradas."""
+        def write(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": version, "headers": headers, "dates": dates}, f, ensure_ascii=False)
+
+        try:
+            self._write_locked(spreadsheet_id, tab_name, self._layout_path(spreadsheet_id, tab_name), write)
+        except Exception as e:
+            logger.warning(f"Falha ao gravar o layout em cache da aba '{tab_name}': {e}")
+
+    def invalidate(self, spreadsheet_id: str, tab_name: str):
+        """Remove a entrada de cache (e o layout) do par (planilha, aba), se existir."""
+        for path in (self._data_path(spreadsheet_id, tab_name), self._layout_path(spreadsheet_id, tab_name)):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,167 @@
+import glob
+import hashlib
+import json
+import os
+import uuid
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional
+
+import pandas as pd
+from gspread.utils import rightpad
+
+from app.utils.file_lock import file_lock
+
+logger = logging.getLogger(__name__)
+
+# Quantidade de arquivos incrementais a partir da qual a entrada é compactada
+MAX_PARTS_BEFORE_COMPACTION = 32
+
+class SheetSyncStore:
+    """
+    Armazenamento local (Parquet) das abas sincronizadas incrementalmente.
+
+    Cada par (planilha, aba) tem um diretório com arquivos `part-*.parquet`
+    (um por sincronização que trouxe linhas novas) e um `state.json` com a
+    marca d'água da sincronização: cabeçalho, última linha lida da planilha,
+    valores dessa linha, a última data e a lista dos arquivos que compõem a aba.
+    Os valores são guardados como texto, exatamente como vêm da planilha; a
+    limpeza continua a cargo do agente.
+
+    O `state.json` é o ponto de confirmação: os arquivos de dados são gravados
+    (arquivo temporário + `os.replace`) antes de o estado passar a referenciá-los,
+    e arquivos substituídos só são removidos depois. Uma interrupção em qualquer
+    ponto deixa o estado anterior íntegro. Escritas e leituras de uma entrada são
+    serializadas por uma trava de arquivo, válida também entre processos.
+    """
+    def __init__(self, store_dir: str, date_headers=('Data', 'Date')):
+        self.store_dir = store_dir
+        self.date_headers = date_headers
+
+    def _entry_dir(self, spreadsheet_id: str, tab_name: str) -> str:
+        entry_key = hashlib.sha256(f"{spreadsheet_id}\x00{tab_name}".encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.store_dir, entry_key)
+
+    @contextmanager
+    def _locked(self, entry_dir: str):
+        os.makedirs(entry_dir, exist_ok=True)
+        with file_lock(os.path.join(entry_dir, ".lock")):
+            yield
+
+    def _read_state(self, entry_dir: str) -> Optional[dict]:
+        state_path = os.path.join(entry_dir, "state.json")
+        if not os.path.exists(state_path):
+            return None
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.warning(f"Falha ao ler o estado de sincronização em '{entry_dir}': {e}")
+            return None
+        if "parts" not in state:
+            # Estados gravados antes da lista de arquivos: todos os arquivos do diretório
+            state["parts"] = sorted(os.path.basename(path) for path in glob.glob(os.path.join(entry_dir, "part-*.parquet")))
+        return state
+
+    def _write_part(self, entry_dir: str, headers: List[str], rows: List[List]) -> str:
+        """Grava um novo arquivo de dados com as linhas informadas e retorna o seu nome."""
+        df = pd.DataFrame([rightpad(row, len(headers))[:len(headers)] for row in rows], columns=headers, dtype=str)
+        return self._write_frame(entry_dir, df)
+
+    @staticmethod
+    def _write_frame(entry_dir: str, df: pd.DataFrame) -> str:
+        part_name = f"part-{datetime.now():%Y%m%d%H%M%S%f}-{uuid.uuid4().hex[:8]}.parquet"
+        part_path = os.path.join(entry_dir, part_name)
+        df.to_parquet(f"{part_path}.tmp", index=False)
+        os.replace(f"{part_path}.tmp", part_path)
+        return part_name
+
+    def _write_state(self, entry_dir: str, spreadsheet_id: str, tab_name: str, headers: List[str], last_row: int,
+                     last_row_values: List, parts: List[str]):
+        last_row_values = rightpad(last_row_values, len(headers))[:len(headers)]
+        date_header = next((h for h in self.date_headers if h in headers), None)
+        state = {
+            "spreadsheet_id": spreadsheet_id,
+            "tab_name": tab_name,
+            "headers": headers,
+            "last_row": last_row,
+            "last_row_values": last_row_values,
+            "last_date": last_row_values[headers.index(date_header)] if date_header and last_row > 1 else None,
+            "parts": parts,
+            "synced_at": datetime.now().isoformat(),
+        }
+        state_path = os.path.join(entry_dir, "state.json")
+        with open(f"{state_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(f"{state_path}.tmp", state_path)
+
+    @staticmethod
+    def _remove_unreferenced(entry_dir: str, parts: List[str]):
+        """Remove os arquivos de dados que o estado não referencia (substituídos ou de gravações interrompidas)."""
+        for path in glob.glob(os.path.join(entry_dir, "part-*.parquet*")):
+            if os.path.basename(path) not in parts:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"Não foi possível remover o arquivo de sincronização '{path}': {e}")
+
+    def get_state(self, spreadsheet_id: str, tab_name: str) -> Optional[dict]:
+        """Retorna a marca d'água da aba, ou None se ela ainda não foi sincronizada."""
+        return self._read_state(self._entry_dir(spreadsheet_id, tab_name))
+
+    def replace(self, spreadsheet_id: str, tab_name: str, values: List[List]):
+        """
+        Substitui todo o conteúdo armazenado da aba (sincronização completa).
+        `values` inclui a linha de cabeçalho.
+        """
+        entry_dir = self._entry_dir(spreadsheet_id, tab_name)
+        with self._locked(entry_dir):
+            if not values:
+                state_path = os.path.join(entry_dir, "state.json")
+                if os.path.exists(state_path):
+                    os.remove(state_path)
+                self._remove_unreferenced(entry_dir, [])
+                return
+
+            headers, rows = values[0], values[1:]
+            parts = [self._write_part(entry_dir, headers, rows)]
+            self._write_state(entry_dir, spreadsheet_id, tab_name, headers, len(values), values[-1], parts)
+            self._remove_unreferenced(entry_dir, parts)
+
+    def append(self, spreadsheet_id: str, tab_name: str, state: dict, rows: List[List]) -> bool:
+        """
+        Acrescenta as linhas novas, posteriores à marca d'água `state`, e avança a marca.
+        Se a marca tiver mudado desde a leitura de `state` (outra sincronização
+        concorrente já gravou essas linhas), nada é gravado e é retornado False.
+        """
+        if not rows:
+            return True
+
+        entry_dir = self._entry_dir(spreadsheet_id, tab_name)
+        with self._locked(entry_dir):
+            current = self._read_state(entry_dir)
+            watermark = ("headers", "last_row", "last_row_values")
+            if current is None or any(current[key] != state[key] for key in watermark):
+                logger.info(f"Aba '{tab_name}' sincronizada por outra execução; linhas novas descartadas.")
+                return False
+
+            headers = current["headers"]
+            parts = current["parts"] + [self._write_part(entry_dir, headers, rows)]
+            if len(parts) > MAX_PARTS_BEFORE_COMPACTION:
+                compacted = pd.concat([pd.read_parquet(os.path.join(entry_dir, part)) for part in parts], ignore_index=True)
+                parts = [self._write_frame(entry_dir, compacted)]
+            self._write_state(entry_dir, spreadsheet_id, tab_name, headers, current["last_row"] + len(rows), rows[-1], parts)
+            self._remove_unreferenced(entry_dir, parts)
+            return True
+
+    def read(self, spreadsheet_id: str, tab_name: str) -> pd.DataFrame:
+        """Lê todas as linhas armazenadas da aba."""
+        entry_dir = self._entry_dir(spreadsheet_id, tab_name)
+        if not os.path.exists(os.path.join(entry_dir, "state.json")):
+            return pd.DataFrame()
+        with self._locked(entry_dir):
+            state = self._read_state(entry_dir)
+            if not state or not state["parts"]:
+                return pd.DataFrame()
+            return pd.concat([pd.read_parquet(os.path.join(entry_dir, part)) for part in state["parts"]], ignore_index=True)
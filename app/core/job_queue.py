@@ -0,0 +1,316 @@
+import os
+import json
+import uuid
+import socket
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from app.config.settings import settings
+from app.db.database import (
+    SessionLocal, ClientDB, JobDB, claim_job, create_job, get_client, get_job, get_jobs_by_status, touch_jobs, update_job
+)
+from app.utils.timing import start_collection, summarize_timings
+
+logger = logging.getLogger(__name__)
+
+# Status possíveis de um job de análise
+JOB_PENDENTE = 'pendente'
+JOB_EXECUTANDO = 'executando'
+JOB_CONCLUIDO = 'concluido'
+JOB_ERRO = 'erro'
+
+def _etapas_iniciais() -> dict:
+    """Progresso inicial de um job: todas as etapas do fluxo de análise pendentes."""
+    # Importado sob demanda: o módulo do Orchestrator carrega pandas e os SDKs
+    from app.agents.orchestrator import ETAPAS_ANALISE
+    return {etapa: JOB_PENDENTE for etapa in ETAPAS_ANALISE}
+
+class AnalysisJobQueue:
+    """
+    Fila de jobs de análise executados em segundo plano.
+
+    Os jobs rodam em um pool de threads com concorrência limitada e seu estado
+    (status, progresso por etapa, resultado) é persistido na tabela `jobs`,
+    de modo que continua consultável após uma reinicialização.
+
+    Com vários workers (processos) sobre o mesmo banco, cada job pertence a um
+    worker (`owner`), que confirma periodicamente que segue ativo (`heartbeat_at`).
+    Os jobs só são executados após serem assumidos com um UPDATE condicional, e
+    `resume_pending` reenfileira apenas jobs sem responsável ativo (worker
+    encerrado ou interrompido), nunca os que outro worker está executando.
+
+    O Orchestrator é obtido de `orchestrator_provider` apenas quando um job é
+    executado, para que a aplicação suba sem carregar os SDKs nem autenticar.
+    """
+    def __init__(self, orchestrator_provider, max_workers: int = 2, heartbeat_seconds: float = settings.JOB_HEARTBEAT_SECONDS,
+                 stale_seconds: float = settings.JOB_STALE_SECONDS):
+        self.orchestrator_provider = orchestrator_provider
+        # Identificação deste worker como responsável pelos jobs
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis_job")
+        # Progresso em memória dos jobs em execução; as plataformas rodam em threads
+        # diferentes e atualizam o mesmo job, então as escritas de cada job são
+        # serializadas por uma trava própria (a do job), fora da trava da fila.
+        self._etapas = {}
+        self._etapa_locks = {}
+        # Jobs em streaming em execução neste worker: eventos já emitidos e
+        # ouvintes inscritos (job_id -> {"eventos": [...], "ouvintes": [...]}), ver `subscribe`
+        self._streams = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name="analysis_job_heartbeat", daemon=True)
+        self._heartbeat_thread.start()
+
+    def submit(self, client_id: str, mes_analise: str, metricas_selecionadas: list, usar_cache: bool = True, chamada_unica: bool = None,
+               streaming: bool = False) -> JobDB:
+        """
+        Registra um novo job de análise e o coloca na fila. Retorna o job criado.
+
+        Com `streaming`, as respostas do LLM são geradas em streaming e os eventos do
+        job podem ser acompanhados com `subscribe`.
+        """
+        parametros = {"metricas_selecionadas": metricas_selecionadas, "usar_cache": usar_cache, "chamada_unica": chamada_unica,
+                      "streaming": streaming}
+        db = SessionLocal()
+        try:
+            job = create_job(db, JobDB(
+                id=uuid.uuid4().hex,
+                client_id=client_id,
+                mes_analise=mes_analise,
+                parametros=json.dumps(parametros, ensure_ascii=False),
+                status=JOB_PENDENTE,
+                etapas=json.dumps(_etapas_iniciais()),
+                owner=self.owner,
+                heartbeat_at=datetime.now()
+            ))
+        finally:
+            db.close()
+
+        if streaming:
+            # Registrado já no envio, para que nenhum evento se perca antes da inscrição
+            with self._lock:
+                self._streams[job.id] = {"eventos": [], "ouvintes": []}
+        self.executor.submit(self._run_job, job.id)
+        logger.info(f"Job de análise {job.id} enfileirado para o cliente {client_id} ({mes_analise}).")
+        return job
+
+    def subscribe(self, job_id: str, listener) -> bool:
+        """
+        Inscreve `listener(evento, dados)` nos eventos de um job em streaming deste
+        worker: 'etapa' (progresso), 'trecho' (texto de uma seção à medida que chega)
+        e 'fim' (resultado final). Os eventos já emitidos são repassados antes dos novos.
+
+        O listener é chamado sob a trava da fila e não deve bloquear. Retorna False se
+        o job não estiver em streaming neste worker (ex: já finalizado); nesse caso o
+        andamento deve ser consultado no banco.
+        """
+        with self._lock:
+            stream = self._streams.get(job_id)
+            if stream is None:
+                return False
+            for evento, dados in stream["eventos"]:
+                self._notify(listener, evento, dados)
+            stream["ouvintes"].append(listener)
+        return True
+
+    def unsubscribe(self, job_id: str, listener):
+        """Cancela a inscrição feita com `subscribe`, se ainda existir."""
+        with self._lock:
+            stream = self._streams.get(job_id)
+            if stream is not None and listener in stream["ouvintes"]:
+                stream["ouvintes"].remove(listener)
+
+    def _emit(self, job_id: str, evento: str, dados: dict):
+        """Registra um evento do job em streaming e o repassa aos ouvintes inscritos."""
+        with self._lock:
+            stream = self._streams.get(job_id)
+            if stream is None:
+                return
+            stream["eventos"].append((evento, dados))
+            for listener in stream["ouvintes"]:
+                self._notify(listener, evento, dados)
+
+    def resume_pending(self) -> int:
+        """
+        Assume e reenfileira os jobs pendentes ou em execução cujo responsável está
+        inativo (sem confirmação há mais de `stale_seconds`). Chamado na inicialização
+        e periodicamente pela thread de heartbeat. Retorna o número de jobs retomados.
+        """
+        stale_before = datetime.now() - timedelta(seconds=self.stale_seconds)
+        resumed = 0
+        db = SessionLocal()
+        try:
+            for job in get_jobs_by_status(db, [JOB_PENDENTE, JOB_EXECUTANDO]):
+                if job.owner == self.owner:
+                    continue
+                if claim_job(db, job.id, self.owner, JOB_PENDENTE, expected_status=job.status, stale_before=stale_before):
+                    self.executor.submit(self._run_job, job.id)
+                    resumed += 1
+        finally:
+            db.close()
+        if resumed:
+            logger.info(f"{resumed} job(s) de análise sem worker ativo reenfileirado(s).")
+        return resumed
+
+    def _heartbeat_loop(self):
+        """Confirma periodicamente a atividade dos jobs deste worker e retoma os de workers inativos."""
+        while not self._stop.wait(self.heartbeat_seconds):
+            try:
+                db = SessionLocal()
+                try:
+                    touch_jobs(db, self.owner, [JOB_PENDENTE, JOB_EXECUTANDO])
+                finally:
+                    db.close()
+                self.resume_pending()
+            except Exception as e:
+                logger.warning(f"Falha no heartbeat da fila de jobs: {e}")
+
+    def shutdown(self, wait: bool = False):
+        """
+        Encerra o pool de workers. Jobs não iniciados permanecem pendentes no banco
+        e, sem heartbeat, são retomados por outro worker (ou na próxima inicialização)
+        após `stale_seconds`.
+        """
+        self._stop.set()
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _update(self, job_id: str, job_data: dict):
+        db = SessionLocal()
+        try:
+            update_job(db, job_id, job_data)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _notify(listener, evento: str, dados: dict):
+        """Repassa um evento ao listener do job, sem deixar que uma falha nele interrompa a análise."""
+        if listener is None:
+            return
+        try:
+            listener(evento, dados)
+        except Exception as e:
+            logger.warning(f"Falha ao notificar o evento '{evento}' do job: {e}")
+
+    def _persist_etapas(self, job_id: str):
+        """
+        Grava no banco o progresso em memória do job. A escrita é feita fora da
+        trava da fila, sob a trava do job, e grava o estado mais recente (nunca um
+        anterior ao de outra escrita concorrente).
+        """
+        with self._lock:
+            job_lock = self._etapa_locks.setdefault(job_id, threading.Lock())
+        with job_lock:
+            with self._lock:
+                etapas = json.dumps(self._etapas.get(job_id, {}))
+            self._update(job_id, {"etapas": etapas})
+
+    def _update_etapa(self, job_id: str, etapa: str, status: str, listener=None):
+        """Callback de progresso do Orchestrator: atualiza o status da etapa e o persiste."""
+        with self._lock:
+            self._etapas.setdefault(job_id, {})[etapa] = status
+        self._persist_etapas(job_id)
+        self._notify(listener, "etapa", {"etapa": etapa, "status": status})
+
+    def _finish(self, job_id: str, job_data: dict, listener=None):
+        """Persiste o resultado final do job e o repassa ao listener."""
+        self._update(job_id, job_data)
+        resultado = {key: job_data.get(key) for key in ("status", "report_path")}
+        for key in ("warnings", "erro"):
+            resultado[key] = json.loads(job_data[key]) if job_data.get(key) else None
+        self._notify(listener, "fim", resultado)
+
+    def _run_job(self, job_id: str):
+        """Executa o job e, ao final, descarta seus eventos de streaming."""
+        try:
+            self._execute_job(job_id)
+        finally:
+            with self._lock:
+                self._streams.pop(job_id, None)
+
+    def _execute_job(self, job_id: str):
+        """Executa o fluxo de análise do job e registra o resultado."""
+        listener = lambda evento, dados: self._emit(job_id, evento, dados)
+        db = SessionLocal()
+        try:
+            # Só executa o job se ainda for deste worker e não tiver sido iniciado
+            claimed = claim_job(db, job_id, self.owner, JOB_EXECUTANDO, expected_status=JOB_PENDENTE, expected_owner=self.owner)
+            job = get_job(db, job_id)
+            if job and not claimed:
+                logger.info(f"Job de análise {job_id} já assumido por outro worker ({job.owner}); ignorando.")
+                return
+            if not job:
+                logger.warning(f"Job de análise {job_id} não encontrado; ignorando.")
+                self._notify(listener, "fim", {"status": JOB_ERRO, "report_path": None, "warnings": None,
+                                               "erro": {"message": f"Job '{job_id}' não encontrado.", "details": []}})
+                return
+            client_db = get_client(db, job.client_id)
+            client_config = None
+            if client_db:
+                client_config = {column.name: getattr(client_db, column.name) for column in ClientDB.__table__.columns}
+            client_id = job.client_id
+            mes_analise = job.mes_analise
+            parametros = json.loads(job.parametros or "{}")
+        finally:
+            db.close()
+
+        streaming = bool(parametros.get("streaming"))
+        if streaming:
+            # Jobs em streaming retomados de outro worker voltam a aceitar inscrições
+            with self._lock:
+                self._streams.setdefault(job_id, {"eventos": [], "ouvintes": []})
+
+        if client_config is None:
+            self._finish(job_id, {
+                "status": JOB_ERRO,
+                "erro": json.dumps({"message": f"Cliente com ID '{client_id}' não encontrado.", "details": []}, ensure_ascii=False)
+            }, listener)
+            return
+
+        with self._lock:
+            self._etapas[job_id] = _etapas_iniciais()
+        self._persist_etapas(job_id)
+
+        # Tempos das etapas do fluxo, gravados no job e expostos em `Server-Timing`
+        timings = start_collection()
+        try:
+            orchestrator = self.orchestrator_provider()
+            result = orchestrator.executar_fluxo_analise_cliente(
+                cliente_config=client_config,
+                mes_analise_atual_str=mes_analise,
+                metricas_selecionadas=parametros.get("metricas_selecionadas", []),
+                usar_cache=parametros.get("usar_cache", True),
+                chamada_unica=parametros.get("chamada_unica"),
+                progress_callback=lambda etapa, status: self._update_etapa(job_id, etapa, status, listener),
+                stream_callback=(lambda secao, trecho: self._emit(job_id, "trecho", {"secao": secao, "texto": trecho})) if streaming else None
+            )
+        except Exception as e:
+            logger.error(f"Erro inesperado no job de análise {job_id}: {e}", exc_info=True)
+            result = {"error": "Erro inesperado durante a análise.", "details": [str(e)]}
+
+        with self._lock:
+            self._etapas.pop(job_id, None)
+            self._etapa_locks.pop(job_id, None)
+
+        if "error" in result:
+            job_data = {
+                "status": JOB_ERRO,
+                "erro": json.dumps({"message": result["error"], "details": result.get("details", [])}, ensure_ascii=False)
+            }
+        elif "file_path" not in result:
+            job_data = {
+                "status": JOB_ERRO,
+                "erro": json.dumps({"message": "Análise concluída, mas o caminho do relatório final não foi retornado.", "details": []}, ensure_ascii=False)
+            }
+        else:
+            job_data = {
+                "status": JOB_CONCLUIDO,
+                "report_path": str(result["file_path"]),
+                "warnings": json.dumps(result.get("errors"), ensure_ascii=False) if result.get("errors") else None
+            }
+        job_data["tempos"] = json.dumps(summarize_timings(timings))
+        self._finish(job_id, job_data, listener)
+        logger.info(f"Job de análise {job_id} finalizado.")
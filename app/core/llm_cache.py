@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class LLMResponseCache:
+    """
+    Cache persistente em disco das respostas do LLM.
+
+    Cada entrada é um arquivo JSON identificado pelo hash do modelo, do prompt
+    e dos parâmetros de geração. O horário de modificação do arquivo marca o
+    último acesso, e as entradas menos usadas recentemente são removidas quando
+    o cache ultrapassa `max_entries`. Se `ttl_seconds` for informado, entradas
+    mais antigas que o TTL são descartadas na leitura.
+    """
+    def __init__(self, cache_dir: str, max_entries: int = 500, ttl_seconds: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, params: Optional[dict] = None) -> str:
+        """Gera a chave da entrada a partir do modelo, do prompt e dos parâmetros de geração."""
+        payload = json.dumps(
+            {"model": model_name, "prompt": prompt, "params": params or {}},
+            ensure_ascii=False, sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Retorna a resposta em cache para a chave, ou None em caso de ausência,
+        expiração ou falha de leitura. Um acerto renova a posição da entrada no LRU.
+        """
+        entry_path = self._entry_path(key)
+        if not os.path.exists(entry_path):
+            return None
+
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if self.ttl_seconds is not None and time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+                os.remove(entry_path)
+                return None
+            os.utime(entry_path)
+            return entry["response"]
+        except Exception as e:
+            logger.warning(f"Falha ao ler o cache de respostas do LLM: {e}")
+            return None
+
+    def put(self, key: str, model_name: str, response: str):
+        """
+        Armazena a resposta e aplica o limite de tamanho.
+        Falhas de escrita são apenas registradas, pois o cache é opcional.
+        """
+        entry_path = self._entry_path(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entry = {
+                "model": model_name,
+                "response": response,
+                "created_at": time.time(),
+                "cached_at": datetime.now().isoformat(),
+            }
+            tmp_path = f"{entry_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, entry_path)
+            self._evict()
+        except Exception as e:
+            logger.warning(f"Falha ao gravar o cache de respostas do LLM: {e}")
+
+    def _evict(self):
+        """Remove as entradas menos usadas recentemente além de `max_entries`."""
+        with self._lock:
+            entries = [
+                entry for entry in os.scandir(self.cache_dir)
+                if entry.is_file() and entry.name.endswith(".json")
+            ]
+            excess = len(entries) - self.max_entries
+            if excess <= 0:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:excess]:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def clear(self):
+        """Remove todas as entradas do cache."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".json"):
+                os.remove(entry.path)
@@ -0,0 +1,188 @@
+import re
+import time
+import asyncio
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Tuple, Type
+
+@dataclass
+class LLMResponse:
+    """Resposta de um provedor de LLM: o texto gerado e o uso de tokens (quando informado)."""
+    text: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    total_tokens: Optional[int] = None
+
+class LLMProvider(ABC):
+    """
+    Classe base abstrata (interface) para provedores de LLM.
+    Define o contrato que todos os provedores registrados em `LLM_PROVIDERS` devem seguir.
+    """
+    def __init__(self, model_name: str, generation_config: dict = None):
+        self.model_name = model_name
+        self.generation_config = generation_config or {}
+
+    @abstractmethod
+    def generate(self, prompt: str) -> LLMResponse:
+        """
+        Gera o texto para o prompt. Erros do provedor são propagados ao chamador.
+
+        Args:
+            prompt (str): O prompt para enviar ao modelo.
+
+        Returns:
+            LLMResponse: O texto gerado e o uso de tokens.
+        """
+        pass
+
+    def generate_stream(self, prompt: str) -> Iterator[LLMResponse]:
+        """
+        Gera o texto em partes, à medida que o modelo as produz. Cada item traz um
+        trecho do texto; o uso de tokens, se informado, vem no último item.
+        A implementação padrão devolve a resposta completa em um único item.
+        """
+        yield self.generate(prompt)
+
+    async def agenerate(self, prompt: str) -> LLMResponse:
+        """
+        Versão assíncrona de `generate`. A implementação padrão executa `generate`
+        em uma thread, sem bloquear o event loop.
+        """
+        return await asyncio.to_thread(self.generate, prompt)
+
+    @property
+    def transient_errors(self) -> Tuple[Type[Exception], ...]:
+        """
+        Erros transitórios (rede, limite de taxa, indisponibilidade do serviço), para
+        os quais a chamada é repetida. Os demais (ex: autenticação, permissão ou
+        prompt bloqueado) são propagados sem novas tentativas.
+        """
+        return (ConnectionError, TimeoutError)
+
+    def warm_up(self):
+        """Antecipa inicializações feitas no primeiro uso (por padrão, nenhuma)."""
+        pass
+
+class GoogleProvider(LLMProvider):
+    """Provedor do Google Generative AI (Gemini)."""
+    def __init__(self, model_name: str, generation_config: dict = None, api_key: str = None):
+        super().__init__(model_name, generation_config)
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY não definida para o provedor LLM 'google'.")
+        self.api_key = api_key
+        # O SDK é importado e o modelo criado no primeiro uso (ou em `warm_up`)
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """Modelo do SDK, criado no primeiro uso."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name, generation_config=self.generation_config or None)
+        return self._model
+
+    def warm_up(self):
+        """Importa o SDK e cria o modelo antecipadamente, evitando o custo na primeira chamada."""
+        return self.model
+
+    @staticmethod
+    def _usage(response) -> dict:
+        usage = getattr(response, "usage_metadata", None)
+        return {
+            "prompt_tokens": getattr(usage, "prompt_token_count", None),
+            "completion_tokens": getattr(usage, "candidates_token_count", None),
+            "total_tokens": getattr(usage, "total_token_count", None)
+        }
+
+    def generate(self, prompt: str) -> LLMResponse:
+        response = self.model.generate_content(prompt)
+        return LLMResponse(text=response.text, **self._usage(response))
+
+    async def agenerate(self, prompt: str) -> LLMResponse:
+        response = await self.model.generate_content_async(prompt)
+        return LLMResponse(text=response.text, **self._usage(response))
+
+    @property
+    def transient_errors(self) -> Tuple[Type[Exception], ...]:
+        from google.api_core import exceptions
+        # TooManyRequests inclui ResourceExhausted (cota) e GatewayTimeout inclui DeadlineExceeded
+        return super().transient_errors + (
+            exceptions.TooManyRequests, exceptions.InternalServerError, exceptions.ServiceUnavailable, exceptions.GatewayTimeout
+        )
+
+    def generate_stream(self, prompt: str) -> Iterator[LLMResponse]:
+        response = self.model.generate_content(prompt, stream=True)
+        for chunk in response:
+            if chunk.text:
+                yield LLMResponse(text=chunk.text)
+        # O uso de tokens só fica disponível após a leitura de todas as partes
+        yield LLMResponse(text="", **self._usage(response))
+
+class StubProvider(LLMProvider):
+    """
+    Provedor offline e determinístico, para testes, profiling e benchmarks sem rede.
+    A resposta depende apenas do modelo e do prompt, e é devolvida após `latency_seconds`.
+    Se o prompt pedir seções (marcadores de `app.utils.report_sections`), a resposta
+    traz uma seção para cada marcador.
+    """
+    _SECTION_MARKER_RE = re.compile(r"<!--\s*secao:\s*\w+\s*-->")
+
+    def __init__(self, model_name: str = "stub", generation_config: dict = None, latency_seconds: float = 0.0):
+        super().__init__(model_name, generation_config)
+        self.latency_seconds = latency_seconds
+
+    def _respond(self, prompt: str) -> LLMResponse:
+        """Monta a resposta determinística para o prompt."""
+        digest = hashlib.sha256(f"{self.model_name}\n{prompt}".encode('utf-8')).hexdigest()[:16]
+        first_line = next((line.strip() for line in prompt.splitlines() if line.strip()), "")
+        body = f"Resposta determinística `{digest}` para o prompt iniciado por: {first_line[:120]}\n"
+        markers = dict.fromkeys(self._SECTION_MARKER_RE.findall(prompt))
+        if markers:
+            body = "".join(f"{marker}\n{body}\n" for marker in markers)
+        text = f"## Relatório gerado pelo provedor stub\n\n{body}"
+        # Estimativa simples de tokens (~4 caracteres por token)
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(text) // 4
+        return LLMResponse(text, prompt_tokens, completion_tokens, prompt_tokens + completion_tokens)
+
+    def generate(self, prompt: str) -> LLMResponse:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return self._respond(prompt)
+
+    async def agenerate(self, prompt: str) -> LLMResponse:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return self._respond(prompt)
+
+    def generate_stream(self, prompt: str) -> Iterator[LLMResponse]:
+        """Devolve a mesma resposta de `generate`, palavra a palavra, distribuindo a latência entre as partes."""
+        response = self._respond(prompt)
+        words = response.text.split(" ")
+        for i, word in enumerate(words):
+            if self.latency_seconds:
+                time.sleep(self.latency_seconds / len(words))
+            yield LLMResponse(text=word if i == len(words) - 1 else f"{word} ")
+        yield LLMResponse("", response.prompt_tokens, response.completion_tokens, response.total_tokens)
+
+# Provedores disponíveis, selecionados por `Settings.LLM_PROVIDER`
+LLM_PROVIDERS: Dict[str, Type[LLMProvider]] = {
+    'google': GoogleProvider,
+    'stub': StubProvider,
+}
+
+def register_provider(name: str, provider_class: Type[LLMProvider]):
+    """Registra (ou substitui) um provedor de LLM sob o nome informado."""
+    LLM_PROVIDERS[name] = provider_class
+
+def create_provider(name: str, **options) -> LLMProvider:
+    """Cria o provedor registrado sob `name`, repassando as opções ao construtor."""
+    provider_class = LLM_PROVIDERS.get(name)
+    if provider_class is None:
+        raise ValueError(f"Provedor LLM '{name}' não suportado. Disponíveis: {', '.join(sorted(LLM_PROVIDERS))}.")
+    return provider_class(**options)
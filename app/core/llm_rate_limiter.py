@@ -0,0 +1,117 @@
+import time
+import asyncio
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Optional
+
+# Intervalo entre as tentativas de obter uma vaga de concorrência no modo assíncrono
+ASYNC_SLOT_POLL_SECONDS = 0.05
+
+class TokenBucket:
+    """
+    Balde de fichas (token bucket) seguro para uso entre threads.
+
+    Cada reserva retira fichas do balde, que é reabastecido continuamente até
+    `capacity`. O saldo pode ficar negativo: quem reserva recebe o tempo de espera
+    até que as suas fichas estejam disponíveis, o que mantém a ordem de chegada.
+    """
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._level = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Reserva `amount` fichas e retorna quantos segundos esperar antes de usá-las."""
+        with self._lock:
+            self._refill()
+            self._level -= amount
+            return max(0.0, -self._level / self.refill_per_second)
+
+    def adjust(self, amount: float):
+        """Corrige uma reserva anterior: `amount` positivo retira fichas, negativo as devolve."""
+        with self._lock:
+            self._refill()
+            self._level = min(self.capacity, self._level - amount)
+
+class LLMRateLimiter:
+    """
+    Limita as chamadas a um provedor de LLM em requisições por minuto (RPM),
+    tokens por minuto (TPM) e chamadas simultâneas. Um limite None (ou 0) é ignorado.
+
+    As vagas são obtidas com `slot` (threads) ou `aslot` (asyncio); os dois modos
+    compartilham os mesmos baldes e o mesmo limite de concorrência.
+    """
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_concurrency: Optional[int] = None):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60) if tokens_per_minute else None
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        """Reserva uma requisição e os tokens estimados; retorna a espera necessária (em segundos)."""
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+        return wait
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Ajusta o balde de tokens com o uso real informado pelo provedor."""
+        if self.tokens and actual_tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    @contextmanager
+    def slot(self, estimated_tokens: int = 0):
+        """Aguarda os limites de taxa e uma vaga de concorrência, mantida durante o bloco."""
+        wait = self._reserve(estimated_tokens)
+        if wait:
+            time.sleep(wait)
+        if self._slots:
+            self._slots.acquire()
+        try:
+            yield
+        finally:
+            if self._slots:
+                self._slots.release()
+
+    @asynccontextmanager
+    async def aslot(self, estimated_tokens: int = 0):
+        """Versão assíncrona de `slot`: espera sem bloquear o event loop."""
+        wait = self._reserve(estimated_tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        if self._slots:
+            # O semáforo é compartilhado com as threads; a espera é feita por tentativas
+            # para não bloquear o event loop e não vazar a vaga em caso de cancelamento
+            while not self._slots.acquire(blocking=False):
+                await asyncio.sleep(ASYNC_SLOT_POLL_SECONDS)
+        try:
+            yield
+        finally:
+            if self._slots:
+                self._slots.release()
+
+# Limitadores do processo, compartilhados por todas as instâncias do LLMService de um provedor
+_rate_limiters: Dict[str, LLMRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(name: str, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                     max_concurrency: Optional[int] = None) -> LLMRateLimiter:
+    """
+    Retorna o limitador do processo registrado sob `name` (normalmente o nome do
+    provedor), criando-o na primeira chamada com os limites informados.
+    """
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(name)
+        if limiter is None:
+            limiter = LLMRateLimiter(requests_per_minute, tokens_per_minute, max_concurrency)
+            _rate_limiters[name] = limiter
+        return limiter
@@ -1,48 +1,251 @@
-import google.generativeai as genai
+import os
+import time
 import logging
+from typing import Iterator, Optional
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, retry_if_exception_type, stop_after_attempt, wait_exponential, wait_random
 from app.config.settings import settings
+from app.config.config_loader import load_global_config
+from app.core.llm_cache import LLMResponseCache
+from app.core.llm_providers import LLMProvider, LLMResponse, create_provider
+from app.core.llm_rate_limiter import LLMRateLimiter, get_rate_limiter
+from app.utils.custom_exceptions import LLMConnectionError
+from app.utils.timing import stats, timed, record_cache_access
 
 logger = logging.getLogger(__name__)
 
+# Valores padrão de `retry_config` (global_config.json)
+DEFAULT_RETRY_CONFIG = {"attempts": 3, "wait_multiplier": 1, "wait_min_seconds": 2, "wait_max_seconds": 10}
+
 class LLMService:
     """
     Serviço para interagir com o modelo de linguagem (LLM).
-    Atualmente, suporta o Google Generative AI (Gemini).
+    As chamadas são delegadas a um provedor de `app.core.llm_providers`
+    (Google Gemini ou o stub offline), com cache opcional de respostas.
+
+    Cada chamada ao provedor passa pelo limitador de taxa e concorrência
+    (`app.core.llm_rate_limiter`) e, em caso de erro transitório do provedor
+    (`LLMProvider.transient_errors`), é repetida com espera exponencial com
+    jitter conforme `retry_config`. Esgotadas as tentativas, ou em um erro não
+    transitório, é lançado `LLMConnectionError`.
     """
-    def __init__(self, provider: str, api_key: str):
+    def __init__(self, provider: LLMProvider, cache: LLMResponseCache = None, rate_limiter: LLMRateLimiter = None,
+                 retry_config: dict = None):
         self.provider = provider
-        self.api_key = api_key
-        if self.provider == 'google':
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-1.5-flash-latest')
-        else:
-            raise ValueError(f"Provedor LLM '{self.provider}' não suportado.")
+        self.cache = cache
+        # Sem limitador, as chamadas não são limitadas
+        self.rate_limiter = rate_limiter or LLMRateLimiter()
+        self.retry_config = {**DEFAULT_RETRY_CONFIG, **(retry_config or {})}
+
+    @property
+    def model_name(self) -> str:
+        return self.provider.model_name
+
+    @property
+    def generation_config(self) -> dict:
+        return self.provider.generation_config
+
+    def warm_up(self):
+        """Antecipa as inicializações do provedor (ex: SDK), evitando o custo na primeira chamada."""
+        return self.provider.warm_up()
+
+    @staticmethod
+    def _record_token_usage(response: LLMResponse):
+        """Soma às estatísticas os tokens informados pelo provedor na resposta (se houver)."""
+        for token_type, count in (("prompt", response.prompt_tokens), ("completion", response.completion_tokens), ("total", response.total_tokens)):
+            if count:
+                stats.increment("app_llm_tokens_total", count, type=token_type)
+
+    def _cache_key(self, prompt: str) -> str:
+        return LLMResponseCache.make_key(self.model_name, prompt, self.generation_config)
+
+    def _get_cached(self, prompt: str, use_cache: bool) -> Optional[str]:
+        """Retorna a resposta em cache para o prompt, ou None se não houver (ou se o cache for ignorado)."""
+        if not (self.cache and use_cache):
+            return None
+        cached_response = self.cache.get(self._cache_key(prompt))
+        record_cache_access("llm", cached_response is not None)
+        if cached_response is not None:
+            logger.info("Resposta do LLM obtida do cache.")
+        return cached_response
+
+    def _store(self, prompt: str, text: str):
+        """Grava a resposta no cache. A resposta nova substitui a entrada anterior mesmo quando o cache foi ignorado."""
+        if self.cache:
+            self.cache.put(self._cache_key(prompt), self.model_name, text)
+
+    def _estimate_tokens(self, prompt: str) -> int:
+        """Estimativa dos tokens da chamada (~4 caracteres por token, mais o limite de saída, se configurado)."""
+        return len(prompt) // 4 + int(self.generation_config.get("max_output_tokens") or 0)
 
-    def generate_text(self, prompt: str, max_retries=3):
+    @staticmethod
+    def _log_retry(retry_state):
+        stats.increment("app_llm_retries_total")
+        logger.warning(
+            f"Falha na chamada ao LLM (tentativa {retry_state.attempt_number}): {retry_state.outcome.exception()}. "
+            f"Nova tentativa em {retry_state.next_action.sleep:.1f}s."
+        )
+
+    def _retry_options(self, max_retries: Optional[int] = None) -> dict:
+        """
+        Parâmetros do tenacity: apenas erros transitórios do provedor são repetidos,
+        com espera exponencial (limitada por `wait_min_seconds` e `wait_max_seconds`) mais jitter.
+        """
+        config = self.retry_config
+        return {
+            "retry": retry_if_exception_type(self.provider.transient_errors),
+            "stop": stop_after_attempt(config["attempts"] if max_retries is None else max_retries),
+            "wait": wait_exponential(multiplier=config["wait_multiplier"], min=config["wait_min_seconds"], max=config["wait_max_seconds"])
+                    + wait_random(0, config["wait_multiplier"]),
+            "before_sleep": self._log_retry,
+            "reraise": True
+        }
+
+    def _finish(self, prompt: str, estimated_tokens: int, response: LLMResponse) -> str:
+        """Registra o uso da resposta do provedor (estatísticas, limitador e cache) e retorna o texto."""
+        stats.increment("app_llm_requests_total", result="ok")
+        self._record_token_usage(response)
+        self.rate_limiter.record_usage(estimated_tokens, response.total_tokens)
+        self._store(prompt, response.text)
+        return response.text
+
+    def _failure(self, e: Exception) -> LLMConnectionError:
+        stats.increment("app_llm_requests_total", result="erro")
+        logger.error(f"Erro ao gerar texto com o LLM após as tentativas: {e}")
+        return LLMConnectionError(f"Erro ao gerar texto com o LLM: {e}")
+
+    def generate_text(self, prompt: str, max_retries: Optional[int] = None, use_cache: bool = True) -> str:
         """
         Gera texto usando o LLM a partir de um prompt.
 
         Args:
             prompt (str): O prompt para enviar ao modelo.
-            max_retries (int): Número máximo de tentativas em caso de falha.
+            max_retries (int): Número máximo de tentativas em caso de falha; None usa `retry_config`.
+            use_cache (bool): Se False, ignora o cache de respostas e sempre consulta o modelo.
 
         Returns:
             str: O texto gerado pelo modelo.
+
+        Raises:
+            LLMConnectionError: Se todas as tentativas falharem.
+        """
+        cached_response = self._get_cached(prompt, use_cache)
+        if cached_response is not None:
+            return cached_response
+
+        estimated_tokens = self._estimate_tokens(prompt)
+        try:
+            with timed("llm_generate"):
+                for attempt in Retrying(**self._retry_options(max_retries)):
+                    with attempt:
+                        with self.rate_limiter.slot(estimated_tokens):
+                            response = self.provider.generate(prompt)
+        except Exception as e:
+            raise self._failure(e) from e
+        return self._finish(prompt, estimated_tokens, response)
+
+    async def agenerate_text(self, prompt: str, max_retries: Optional[int] = None, use_cache: bool = True) -> str:
+        """
+        Versão assíncrona de `generate_text`, para uso em um event loop. Compartilha
+        com as chamadas síncronas o cache, os limites de taxa e concorrência e a
+        política de novas tentativas.
+
+        Raises:
+            LLMConnectionError: Se todas as tentativas falharem.
         """
+        cached_response = self._get_cached(prompt, use_cache)
+        if cached_response is not None:
+            return cached_response
+
+        estimated_tokens = self._estimate_tokens(prompt)
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            with timed("llm_generate"):
+                async for attempt in AsyncRetrying(**self._retry_options(max_retries)):
+                    with attempt:
+                        async with self.rate_limiter.aslot(estimated_tokens):
+                            response = await self.provider.agenerate(prompt)
         except Exception as e:
-            logger.error(f"Erro ao gerar texto com o LLM: {e}")
-            # Implementar lógica de retentativa se necessário
-            return "Ocorreu um erro ao gerar a resposta."
+            raise self._failure(e) from e
+        return self._finish(prompt, estimated_tokens, response)
+
+    def generate_text_stream(self, prompt: str, use_cache: bool = True) -> Iterator[str]:
+        """
+        Gera texto usando o LLM, devolvendo os trechos à medida que o modelo os produz.
+        Uma resposta em cache é devolvida em um único trecho. A resposta completa é
+        gravada no cache ao final.
+
+        Falhas antes do primeiro trecho são repetidas como em `generate_text`; depois
+        dele, repetir duplicaria o texto já entregue.
+
+        Raises:
+            LLMConnectionError: Se a geração falhar (inclusive no meio da resposta).
+        """
+        cached_response = self._get_cached(prompt, use_cache)
+        if cached_response is not None:
+            yield cached_response
+            return
+
+        estimated_tokens = self._estimate_tokens(prompt)
+        parts = []
+        usage = LLMResponse(text="")
+        retry_options = self._retry_options()
+        retry_options["retry"] &= retry_if_exception(lambda e: not parts)
+        try:
+            with timed("llm_generate"):
+                start = time.perf_counter()
+                for attempt in Retrying(**retry_options):
+                    with attempt:
+                        with self.rate_limiter.slot(estimated_tokens):
+                            for response in self.provider.generate_stream(prompt):
+                                if response.text:
+                                    if not parts:
+                                        stats.observe("llm_first_chunk", time.perf_counter() - start)
+                                    parts.append(response.text)
+                                    yield response.text
+                                if response.total_tokens is not None:
+                                    usage = response
+        except Exception as e:
+            raise self._failure(e) from e
+        self._finish(prompt, estimated_tokens, LLMResponse("".join(parts), usage.prompt_tokens, usage.completion_tokens, usage.total_tokens))
+
+    def stream_text(self, prompt: str, on_chunk, use_cache: bool = True) -> str:
+        """Gera o texto em streaming, repassando cada trecho a `on_chunk(trecho)`, e retorna o texto completo."""
+        parts = []
+        for chunk in self.generate_text_stream(prompt, use_cache=use_cache):
+            parts.append(chunk)
+            on_chunk(chunk)
+        return "".join(parts)
 
 def get_llm_service():
     """
     Função factory para criar uma instância do LLMService
     lendo a configuração das configurações centralizadas.
+
+    O provedor é escolhido por `settings.LLM_PROVIDER`; o modelo e os parâmetros de
+    geração vêm de `llm_providers` no `global_config.json` (o modelo pode ser
+    sobrescrito por `settings.LLM_MODEL_NAME`). Os limites de taxa e concorrência vêm
+    de `rate_limit` no bloco do provedor, e as retentativas de `retry_config`.
     """
-    provider = settings.LLM_PROVIDER
-    api_key = settings.GOOGLE_API_KEY
-        
-    return LLMService(provider=provider, api_key=api_key)
+    provider_name = settings.LLM_PROVIDER
+    global_config = load_global_config()
+    options = dict(global_config.get("llm_providers", {}).get(provider_name, {}))
+    rate_limit = options.pop("rate_limit", None) or {}
+    if settings.LLM_MODEL_NAME:
+        options["model_name"] = settings.LLM_MODEL_NAME
+    if provider_name == 'google':
+        options["api_key"] = settings.GOOGLE_API_KEY
+    elif provider_name == 'stub' and settings.LLM_STUB_LATENCY_SECONDS is not None:
+        options["latency_seconds"] = settings.LLM_STUB_LATENCY_SECONDS
+    provider = create_provider(provider_name, **options)
+
+    cache = None
+    if settings.LLM_CACHE_ENABLED:
+        cache = LLMResponseCache(
+            cache_dir=os.path.join(settings.APP_DATA_DIR, "llm_cache"),
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS
+        )
+
+    # O limitador é único por provedor no processo, mesmo com várias instâncias do serviço
+    rate_limiter = get_rate_limiter(provider_name, **rate_limit)
+
+    return LLMService(provider=provider, cache=cache, rate_limiter=rate_limiter, retry_config=global_config.get("retry_config"))
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine, Column, String, Text
+from datetime import datetime
+from sqlalchemy import create_engine, event, Column, String, Text, DateTime, Integer, Boolean, Index, inspect, text, or_
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config.settings import settings # Importar settings
@@ -6,11 +7,43 @@ from app.config.settings import settings # Importar settings
 # Define o caminho para o banco de dados a partir das configurações centralizadas
 DATABASE_URL = settings.DATABASE_URL
 
+def create_db_engine(database_url: str, tuned: bool = settings.SQLITE_TUNED):
+    """
+    Cria o motor do banco de dados.
+
+    Com `tuned=True` (modo de produção), o SQLite usa WAL, que permite leituras
+    concorrentes com uma escrita em andamento, além dos pragmas e do tamanho de
+    pool definidos nas configurações. Com `tuned=False`, usa os padrões do SQLite.
+    """
+    is_sqlite = database_url.startswith("sqlite")
+    engine_kwargs = {}
+    if is_sqlite:
+        engine_kwargs["connect_args"] = {"check_same_thread": False} # Necessário apenas para SQLite
+    if tuned and ":memory:" not in database_url:
+        engine_kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_pre_ping=not is_sqlite
+        )
+
+    db_engine = create_engine(database_url, **engine_kwargs)
+
+    if is_sqlite and tuned:
+        @event.listens_for(db_engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+            cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+            cursor.close()
+
+    return db_engine
+
 # Cria o motor do banco de dados
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False} # Necessário apenas para SQLite
-)
+engine = create_db_engine(DATABASE_URL)
 
 # Cria uma classe base para os modelos declarativos
 Base = declarative_base()
@@ -23,8 +56,12 @@ class ClientDB(Base):
     nome_exibicao = Column(String, index=True) # Nome para exibição
     contexto_cliente_prompt = Column(Text) # Contexto detalhado para o LLM
     planilha_id_ou_nome = Column(String) # ID ou nome da planilha Google Sheets
+    planilha_key = Column(String, nullable=True) # Chave (ID) resolvida a partir do nome da planilha
     google_sheet_tab_name = Column(String, nullable=True) # Nome da aba Google Ads (opcional)
     meta_sheet_tab_name = Column(String, nullable=True) # Nome da aba Meta Ads (opcional)
+    google_ads_file_path = Column(String, nullable=True) # Arquivo de dados Google Ads (opcional, substitui a planilha)
+    meta_ads_file_path = Column(String, nullable=True) # Arquivo de dados Meta Ads (opcional, substitui a planilha)
+    chamada_unica_llm = Column(Boolean, nullable=True) # Gera as análises e o consolidado em uma única chamada ao LLM
 
 class PromptDB(Base):
     __tablename__ = "prompts"
@@ -34,8 +71,58 @@ class PromptDB(Base):
     conteudo = Column(Text) # Conteúdo do prompt
     descricao = Column(String, nullable=True) # Descrição do prompt (opcional)
 
+class JobDB(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True, index=True) # ID único do job
+    client_id = Column(String, index=True) # Cliente analisado
+    mes_analise = Column(String) # Mês de análise (YYYY-MM-DD)
+    parametros = Column(Text) # Parâmetros da análise (JSON), usados para reenfileirar o job
+    status = Column(String, index=True) # pendente, executando, concluido ou erro
+    etapas = Column(Text, nullable=True) # Progresso por etapa (JSON: etapa -> status)
+    report_path = Column(String, nullable=True) # Caminho do relatório final
+    warnings = Column(Text, nullable=True) # Avisos não fatais (JSON)
+    erro = Column(Text, nullable=True) # Detalhes do erro (JSON), se o job falhou
+    tempos = Column(Text, nullable=True) # Duração de cada etapa (JSON: etapa -> dur_ms, count)
+    owner = Column(String, nullable=True, index=True) # Worker (processo) responsável pelo job
+    heartbeat_at = Column(DateTime, nullable=True) # Última confirmação de atividade do worker responsável
+    created_at = Column(DateTime, default=datetime.now) # Data de criação
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now) # Última atualização
+
+class ReportDB(Base):
+    __tablename__ = "reports"
+
+    id = Column(Integer, primary_key=True, autoincrement=True) # ID sequencial (cursor da paginação)
+    client_id = Column(String, index=True) # Cliente do relatório
+    client_name = Column(String) # Nome de exibição do cliente no momento da geração
+    mes_analise = Column(String, index=True) # Mês de análise (YYYY-MM-DD)
+    file_name = Column(String, index=True) # Nome do arquivo do relatório
+    file_path = Column(String, unique=True) # Caminho relativo à pasta de relatórios
+    size_bytes = Column(Integer) # Tamanho do arquivo
+    created_at = Column(DateTime, default=datetime.now) # Data de geração
+
+    __table_args__ = (Index("ix_reports_client_mes", "client_id", "mes_analise"),)
+
+def _add_missing_columns():
+    """
+    Adiciona às tabelas já existentes as colunas novas dos modelos.
+    O `create_all` só cria tabelas inexistentes, então colunas adicionadas
+    depois (sempre anuláveis) precisam ser criadas manualmente.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                column_type = column.type.compile(dialect=engine.dialect)
+                with engine.begin() as connection:
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
 # Cria as tabelas no banco de dados (se não existirem)
 Base.metadata.create_all(bind=engine)
+_add_missing_columns()
 
 # Cria uma sessão de banco de dados
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -54,8 +141,19 @@ def get_db():
 def get_client(db: sessionmaker, client_id: str):
     return db.query(ClientDB).filter(ClientDB.id == client_id).first()
 
-def get_clients(db: sessionmaker):
-    return db.query(ClientDB).all()
+def get_clients(db: sessionmaker, columns: list = None, limit: int = None, cursor: str = None):
+    """
+    Lista os clientes ordenados por `id`. `columns` restringe as colunas
+    consultadas (retornando linhas em vez de objetos ClientDB) e `cursor`
+    é o `id` do último cliente da página anterior (paginação por keyset).
+    """
+    query = db.query(*[getattr(ClientDB, column) for column in columns]) if columns else db.query(ClientDB)
+    if cursor is not None:
+        query = query.filter(ClientDB.id > cursor)
+    query = query.order_by(ClientDB.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
 
 def create_client(db: sessionmaker, client: ClientDB):
     db.add(client)
@@ -72,9 +170,116 @@ def update_client(db: sessionmaker, client_id: str, client_data: dict):
         db.refresh(db_client)
     return db_client
 
+def update_client_spreadsheet_key(db: sessionmaker, client_id: str, planilha_key: str):
+    """Armazena (ou limpa, com None) a chave resolvida da planilha do cliente."""
+    db_client = get_client(db, client_id)
+    if db_client:
+        db_client.planilha_key = planilha_key
+        db.commit()
+    return db_client
+
 def delete_client(db: sessionmaker, client_id: str):
     db_client = get_client(db, client_id)
     if db_client:
         db.delete(db_client)
         db.commit()
     return db_client
+
+def create_job(db: sessionmaker, job: JobDB):
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def get_job(db: sessionmaker, job_id: str):
+    return db.query(JobDB).filter(JobDB.id == job_id).first()
+
+def get_jobs_by_status(db: sessionmaker, statuses: list):
+    return db.query(JobDB).filter(JobDB.status.in_(statuses)).order_by(JobDB.created_at).all()
+
+def update_job(db: sessionmaker, job_id: str, job_data: dict):
+    db_job = get_job(db, job_id)
+    if db_job:
+        for key, value in job_data.items():
+            setattr(db_job, key, value)
+        db.commit()
+        db.refresh(db_job)
+    return db_job
+
+def claim_job(db: sessionmaker, job_id: str, owner: str, status: str, expected_status: str, expected_owner: str = None,
+              stale_before: datetime = None) -> bool:
+    """
+    Assume o job de forma atômica (um único UPDATE condicional): passa a ser de
+    `owner`, com `status`, apenas se ainda estiver em `expected_status` e, se
+    informados, pertencer a `expected_owner` ou ter o responsável inativo (sem
+    confirmação desde `stale_before`). Retorna True se o job foi assumido.
+    """
+    conditions = [JobDB.id == job_id, JobDB.status == expected_status]
+    if expected_owner is not None:
+        conditions.append(JobDB.owner == expected_owner)
+    if stale_before is not None:
+        conditions.append(or_(JobDB.owner.is_(None), JobDB.heartbeat_at.is_(None), JobDB.heartbeat_at < stale_before))
+    updated = db.query(JobDB).filter(*conditions).update(
+        {"owner": owner, "status": status, "heartbeat_at": datetime.now()}, synchronize_session=False
+    )
+    db.commit()
+    return updated == 1
+
+def touch_jobs(db: sessionmaker, owner: str, statuses: list) -> int:
+    """Renova a confirmação de atividade dos jobs de `owner` nos status informados."""
+    updated = db.query(JobDB).filter(JobDB.owner == owner, JobDB.status.in_(statuses)).update(
+        {"heartbeat_at": datetime.now()}, synchronize_session=False
+    )
+    db.commit()
+    return updated
+
+def get_prompts(db: sessionmaker, columns: list = None, limit: int = None, cursor: str = None):
+    """
+    Lista os prompts ordenados por `nome` (único). `columns` restringe as colunas
+    consultadas e `cursor` é o `nome` do último prompt da página anterior.
+    """
+    query = db.query(*[getattr(PromptDB, column) for column in columns]) if columns else db.query(PromptDB)
+    if cursor is not None:
+        query = query.filter(PromptDB.nome > cursor)
+    query = query.order_by(PromptDB.nome)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def upsert_report(db: sessionmaker, report: ReportDB):
+    """
+    Registra um relatório no catálogo. Um relatório regerado no mesmo caminho
+    substitui o registro anterior e passa a ser o mais recente.
+    """
+    db.query(ReportDB).filter(ReportDB.file_path == report.file_path).delete()
+    db.add(report)
+    db.commit()
+    db.refresh(report)
+    return report
+
+def get_reports(db: sessionmaker, client_id: str = None, mes_inicio: str = None, mes_fim: str = None,
+                limit: int = None, cursor: int = None):
+    """
+    Lista os relatórios do mais recente para o mais antigo, com filtros opcionais
+    por cliente e intervalo de meses. A paginação é por keyset: `cursor` é o
+    `id` do último relatório da página anterior.
+    """
+    query = db.query(ReportDB)
+    if client_id:
+        query = query.filter(ReportDB.client_id == client_id)
+    if mes_inicio:
+        query = query.filter(ReportDB.mes_analise >= mes_inicio)
+    if mes_fim:
+        query = query.filter(ReportDB.mes_analise <= mes_fim)
+    if cursor is not None:
+        query = query.filter(ReportDB.id < cursor)
+    query = query.order_by(ReportDB.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def get_report_by_file_name(db: sessionmaker, file_name: str):
+    return db.query(ReportDB).filter(ReportDB.file_name == file_name).order_by(ReportDB.id.desc()).first()
+
+def count_reports(db: sessionmaker):
+    return db.query(ReportDB).count()
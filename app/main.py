@@ -1,21 +1,26 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, field_validator
 from typing import List, Optional, Dict
-from datetime import date
+from datetime import date, datetime
 from sqlalchemy.orm import Session
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import os
 import re # Importar re para validação
+import json
+import asyncio
+import threading
 from app.config.settings import settings # Importar settings
-from app.utils.file_utils import get_report_path # Importar get_report_path
-from app.agents.orchestrator import Orchestrator, get_orchestrator
-from app.db.database import get_db, engine, Base, ClientDB, PromptDB
+from app.utils.file_utils import get_report_path, REPORTS_BASE_DIR # Importar get_report_path
+from app.utils.report_catalog import backfill_reports
+from app.utils.prompt_loader import prompt_cache
+from app.db.database import get_db, SessionLocal, ClientDB, PromptDB, get_job, get_reports, get_report_by_file_name, get_clients as db_get_clients, get_prompts as db_get_prompts
+from app.core.job_queue import AnalysisJobQueue, JOB_CONCLUIDO, JOB_ERRO
+from app.utils.timing import stats, timed, start_collection, summarize_timings, format_server_timing
 from app.middleware import add_exception_handlers
 
-# Cria as tabelas no banco de dados (se não existirem)
-Base.metadata.create_all(bind=engine)
-
 app = FastAPI(title="Marketing AI System API", version="1.1.0")
 
 # Adiciona os manipuladores de exceção customizados
@@ -33,6 +38,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"], # Cursor da paginação por keyset e tempos das etapas
 )
 
 # --- Modelos Pydantic (DTOs) ---
@@ -42,6 +48,9 @@ class ClientBase(BaseModel):
     planilha_id_ou_nome: str
     google_sheet_tab_name: Optional[str] = None
     meta_sheet_tab_name: Optional[str] = None
+    google_ads_file_path: Optional[str] = None
+    meta_ads_file_path: Optional[str] = None
+    chamada_unica_llm: Optional[bool] = None # Gera as análises e o consolidado em uma única chamada ao LLM
 
 class ClientCreate(ClientBase):
     id: str
@@ -60,6 +69,7 @@ class ClientUpdate(ClientBase):
 
 class ClientInDB(ClientBase):
     id: str
+    planilha_key: Optional[str] = None
     class Config:
         from_attributes = True
 
@@ -67,6 +77,22 @@ class AnalysisRequest(BaseModel):
     client_id: str
     mes_analise: date
     metricas_selecionadas: List[str] = []
+    usar_cache: bool = True # False força novas respostas do LLM, ignorando o cache
+    chamada_unica: Optional[bool] = None # Uma única chamada ao LLM em vez de três; None usa a configuração do cliente
+    streaming: bool = False # Gera as respostas em streaming, acompanhadas em GET /analyze/{job_id}/stream
+
+class JobStatus(BaseModel):
+    id: str
+    client_id: str
+    mes_analise: str
+    status: str
+    etapas: Dict[str, str] = {}
+    report_path: Optional[str] = None
+    warnings: Optional[List[str]] = None
+    erro: Optional[Dict] = None
+    tempos: Optional[Dict[str, Dict[str, float]]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
 # --- New Pydantic Models for Reports ---
 class ReportSummary(BaseModel):
@@ -75,6 +101,8 @@ class ReportSummary(BaseModel):
     mes_analise: str
     file_name: str
     file_path: str
+    size_bytes: Optional[int] = None
+    created_at: Optional[datetime] = None
 
 class ReportContent(BaseModel):
     report_content: str
@@ -92,37 +120,106 @@ class PromptInDB(PromptBase):
     class Config:
         from_attributes = True
 
+def parse_fields(fields: Optional[str], model: type, required: List[str]) -> Optional[List[str]]:
+    """
+    Converte o parâmetro `fields` (nomes separados por vírgula) na lista de colunas
+    a consultar, sempre incluindo as colunas obrigatórias. Retorna None sem projeção.
+    """
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    invalid = [field for field in requested if field not in model.model_fields]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos inválidos: {', '.join(invalid)}. Campos disponíveis: {', '.join(model.model_fields)}."
+        )
+    return required + [field for field in requested if field not in required]
+
+def next_cursor_headers(items: list, limit: Optional[int], cursor_field: str) -> Dict[str, str]:
+    """Retorna o cabeçalho com o cursor da próxima página quando a página veio cheia."""
+    if limit is not None and len(items) == limit:
+        return {"X-Next-Cursor": str(getattr(items[-1], cursor_field))}
+    return {}
+
+def get_app_orchestrator():
+    """Retorna o Orchestrator da aplicação, criando-o no primeiro uso."""
+    # Importado sob demanda: o módulo carrega pandas, os SDKs do Google e os conectores
+    from app.agents.orchestrator import get_shared_orchestrator
+    return get_shared_orchestrator()
+
 # --- Endpoints da API ---
+# Endpoints que acessam o banco ou arquivos são síncronos (`def`): o FastAPI os executa
+# no threadpool, sem bloquear o event loop. Apenas endpoints sem I/O usam `async def`.
 
 @app.on_event("startup")
 async def startup_event():
     """
-    Carrega o Orchestrator na inicialização para reutilização.
+    Carrega o cache de prompts e inicia a fila de jobs de análise, retomando os
+    jobs interrompidos. O Orchestrator (SDKs, pandas e autenticação no Google) é
+    criado no primeiro uso; com `WARMUP_ON_STARTUP` ele é preparado em segundo plano.
     """
-    app.state.orchestrator = get_orchestrator()
+    prompt_cache.load_all()
+    # Migração única: indexa no catálogo os relatórios gerados antes da tabela `reports`.
+    # Roda antes de retomar os jobs: ela só é feita com o catálogo vazio, e um job
+    # retomado que registrasse um relatório antes impediria a indexação dos existentes.
+    backfill_reports()
+    app.state.job_queue = AnalysisJobQueue(get_app_orchestrator, max_workers=settings.ANALYSIS_MAX_WORKERS)
+    app.state.job_queue.resume_pending()
+    if settings.WARMUP_ON_STARTUP:
+        threading.Thread(target=lambda: get_app_orchestrator().warm_up(), name="warm_up", daemon=True).start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.job_queue.shutdown()
 
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the Marketing AI System v1! Visit /docs for API documentation."}
 
-from app.agents.media_agent import MediaAgent # Importar MediaAgent
-
 @app.get("/metrics")
-async def get_available_metrics():
-    orchestrator: Orchestrator = app.state.orchestrator
-    # Acessa as métricas disponíveis diretamente do MediaAgent
-    available_metrics = list(orchestrator.media_agent.METRICAS_DISPONIVEIS.keys())
+def get_available_metrics():
+    # Importado sob demanda para não carregar pandas na inicialização
+    from app.agents.media_agent import MediaAgent
+    # Acessa as métricas disponíveis diretamente do MediaAgent (sem conectores, não exige credenciais)
+    available_metrics = list(MediaAgent(llm_service=None, data_connector=None).METRICAS_DISPONIVEIS.keys())
     # Adiciona métricas base que podem não estar no METRICAS_DISPONIVEIS mas são usadas
     available_metrics.extend(["Spend", "Revenue", "Sessions", "Conversions", "Clicks", "Impressions"])
     return sorted(list(set(available_metrics))) # Retorna uma lista única e ordenada
 
+@app.get("/internal/stats", include_in_schema=False)
+def get_internal_stats():
+    """
+    Estatísticas internas do processo em formato texto do Prometheus: percentis
+    da duração de cada etapa, taxas de acerto dos caches e tokens do LLM.
+    """
+    return Response(content=stats.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/clients", response_model=Dict[str, ClientInDB])
-async def get_clients(db: Session = Depends(get_db)):
-    clients_db = db.query(ClientDB).all()
+def get_clients(
+    response: Response,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Retorna os clientes indexados por ID, ordenados por ID.
+    `fields` (ex: `fields=nome_exibicao`) consulta apenas as colunas pedidas (o `id`
+    é sempre incluído). Com `limit`, a resposta é paginada: o cursor da próxima
+    página é retornado no cabeçalho `X-Next-Cursor` e deve ser enviado em `cursor`.
+    """
+    columns = parse_fields(fields, ClientInDB, required=["id"])
+    clients_db = db_get_clients(db, columns=columns, limit=limit, cursor=cursor)
+    headers = next_cursor_headers(clients_db, limit, "id")
+    if columns:
+        # Projeção: retorna as colunas consultadas sem montar o modelo completo
+        return JSONResponse(content={row.id: row._asdict() for row in clients_db}, headers=headers)
+    response.headers.update(headers)
     return {client.id: ClientInDB.from_orm(client) for client in clients_db}
 
 @app.post("/clients", response_model=ClientInDB)
-async def create_client(client: ClientCreate, db: Session = Depends(get_db)):
+def create_client(client: ClientCreate, db: Session = Depends(get_db)):
     db_client = db.query(ClientDB).filter(ClientDB.id == client.id).first()
     if db_client:
         raise HTTPException(status_code=400, detail=f"Cliente com ID '{client.id}' já existe.")
@@ -133,18 +230,22 @@ async def create_client(client: ClientCreate, db: Session = Depends(get_db)):
     return db_client
 
 @app.put("/clients/{client_id}", response_model=ClientInDB)
-async def update_client(client_id: str, client_data: ClientUpdate, db: Session = Depends(get_db)):
+def update_client(client_id: str, client_data: ClientUpdate, db: Session = Depends(get_db)):
     db_client = db.query(ClientDB).filter(ClientDB.id == client_id).first()
     if not db_client:
         raise HTTPException(status_code=404, detail=f"Cliente com ID '{client_id}' não encontrado.")
-    for key, value in client_data.dict(exclude_unset=True).items():
+    update_data = client_data.dict(exclude_unset=True)
+    if update_data.get('planilha_id_ou_nome') not in (None, db_client.planilha_id_ou_nome):
+        # A planilha mudou: a chave resolvida anteriormente não vale mais
+        db_client.planilha_key = None
+    for key, value in update_data.items():
         setattr(db_client, key, value)
     db.commit()
     db.refresh(db_client)
     return db_client
 
 @app.delete("/clients/{client_id}")
-async def delete_client(client_id: str, db: Session = Depends(get_db)):
+def delete_client(client_id: str, db: Session = Depends(get_db)):
     db_client = db.query(ClientDB).filter(ClientDB.id == client_id).first()
     if not db_client:
         raise HTTPException(status_code=404, detail=f"Cliente com ID '{client_id}' não encontrado.")
@@ -153,7 +254,7 @@ async def delete_client(client_id: str, db: Session = Depends(get_db)):
     return {"message": f"Cliente '{client_id}' removido com sucesso.", "client_id": client_id}
 
 @app.post("/prompts", response_model=PromptInDB)
-async def create_prompt(prompt: PromptCreate, db: Session = Depends(get_db)):
+def create_prompt(prompt: PromptCreate, db: Session = Depends(get_db)):
     db_prompt = db.query(PromptDB).filter(PromptDB.nome == prompt.nome).first()
     if db_prompt:
         raise HTTPException(status_code=400, detail=f"Prompt com nome '{prompt.nome}' já existe.")
@@ -161,22 +262,40 @@ async def create_prompt(prompt: PromptCreate, db: Session = Depends(get_db)):
     db.add(db_prompt)
     db.commit()
     db.refresh(db_prompt)
+    prompt_cache.put(db_prompt.nome, db_prompt.conteudo)
     return db_prompt
 
 @app.get("/prompts", response_model=List[PromptInDB])
-async def get_all_prompts(db: Session = Depends(get_db)):
-    prompts = db.query(PromptDB).all()
+def get_all_prompts(
+    response: Response,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Retorna os prompts ordenados por nome.
+    `fields` (ex: `fields=descricao`) consulta apenas as colunas pedidas (`id` e `nome`
+    são sempre incluídos). Com `limit`, a resposta é paginada: o cursor da próxima
+    página é retornado no cabeçalho `X-Next-Cursor` e deve ser enviado em `cursor`.
+    """
+    columns = parse_fields(fields, PromptInDB, required=["id", "nome"])
+    prompts = db_get_prompts(db, columns=columns, limit=limit, cursor=cursor)
+    headers = next_cursor_headers(prompts, limit, "nome")
+    if columns:
+        return JSONResponse(content=[row._asdict() for row in prompts], headers=headers)
+    response.headers.update(headers)
     return prompts
 
 @app.get("/prompts/{prompt_name}", response_model=PromptInDB)
-async def get_prompt_by_name(prompt_name: str, db: Session = Depends(get_db)):
+def get_prompt_by_name(prompt_name: str, db: Session = Depends(get_db)):
     db_prompt = db.query(PromptDB).filter(PromptDB.nome == prompt_name).first()
     if not db_prompt:
         raise HTTPException(status_code=404, detail=f"Prompt com nome '{prompt_name}' não encontrado.")
     return db_prompt
 
 @app.put("/prompts/{prompt_name}", response_model=PromptInDB)
-async def update_prompt(prompt_name: str, prompt_data: PromptCreate, db: Session = Depends(get_db)):
+def update_prompt(prompt_name: str, prompt_data: PromptCreate, db: Session = Depends(get_db)):
     db_prompt = db.query(PromptDB).filter(PromptDB.nome == prompt_name).first()
     if not db_prompt:
         raise HTTPException(status_code=404, detail=f"Prompt com nome '{prompt_name}' não encontrado.")
@@ -184,120 +303,214 @@ async def update_prompt(prompt_name: str, prompt_data: PromptCreate, db: Session
         setattr(db_prompt, key, value)
     db.commit()
     db.refresh(db_prompt)
+    if db_prompt.nome != prompt_name:
+        prompt_cache.remove(prompt_name)
+    prompt_cache.put(db_prompt.nome, db_prompt.conteudo)
     return db_prompt
 
 @app.delete("/prompts/{prompt_name}")
-async def delete_prompt(prompt_name: str, db: Session = Depends(get_db)):
+def delete_prompt(prompt_name: str, db: Session = Depends(get_db)):
     db_prompt = db.query(PromptDB).filter(PromptDB.nome == prompt_name).first()
     if not db_prompt:
         raise HTTPException(status_code=404, detail=f"Prompt com nome '{prompt_name}' não encontrado.")
     db.delete(db_prompt)
     db.commit()
+    prompt_cache.remove(prompt_name)
     return {"message": f"Prompt '{prompt_name}' removido com sucesso."}
 
-@app.post("/analyze")
-async def run_analysis(request: AnalysisRequest, db: Session = Depends(get_db)):
-    orchestrator: Orchestrator = app.state.orchestrator
-    client_config_db = db.query(ClientDB).filter(ClientDB.id == request.client_id).first()
+@app.post("/analyze", status_code=202)
+def run_analysis(request: AnalysisRequest, response: Response, db: Session = Depends(get_db)):
+    """
+    Enfileira a análise e retorna imediatamente o ID do job.
+    O andamento e o resultado são consultados em `GET /jobs/{job_id}`, que
+    também expõe a duração de cada etapa da análise no `Server-Timing`.
+    Com `streaming`, o texto gerado pelo LLM é transmitido em
+    `GET /analyze/{job_id}/stream`.
+    """
+    timings = start_collection()
+    job_queue: AnalysisJobQueue = app.state.job_queue
+    with timed("client_lookup"):
+        client_config_db = db.query(ClientDB).filter(ClientDB.id == request.client_id).first()
     if not client_config_db:
         raise HTTPException(status_code=404, detail=f"Cliente com ID '{request.client_id}' não encontrado.")
 
-    client_config_dict = ClientInDB.from_orm(client_config_db).dict()
-    mes_analise_str = request.mes_analise.strftime("%Y-%m-%d")
-
-    # A execução do fluxo agora retorna um dicionário
-    result = orchestrator.executar_fluxo_analise_cliente(
-        cliente_config=client_config_dict,
-        mes_analise_atual_str=mes_analise_str,
-        metricas_selecionadas=request.metricas_selecionadas
-    )
-
-    # Verifica se houve erro na execução
-    if "error" in result:
-        raise HTTPException(
-            status_code=500,
-            detail={"message": result["error"], "details": result.get("details", [])}
+    with timed("job_enqueue"):
+        job = job_queue.submit(
+            client_id=request.client_id,
+            mes_analise=request.mes_analise.strftime("%Y-%m-%d"),
+            metricas_selecionadas=request.metricas_selecionadas,
+            usar_cache=request.usar_cache,
+            chamada_unica=request.chamada_unica,
+            streaming=request.streaming
         )
 
-    # Se não houver a chave 'file_path', algo inesperado ocorreu
-    if "file_path" not in result:
-        raise HTTPException(
-            status_code=500,
-            detail="Análise concluída, mas o caminho do relatório final não foi retornado."
-        )
-
-    # Retorna sucesso com o caminho do arquivo e possíveis erros não fatais
-    return {
-        "message": "Análise concluída com sucesso!",
-        "report_path": str(result["file_path"]),
-        "warnings": result.get("errors")
+    response.headers["Server-Timing"] = format_server_timing(summarize_timings(timings))
+    resposta = {
+        "message": "Análise enfileirada com sucesso!",
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}"
     }
+    if request.streaming:
+        resposta["stream_url"] = f"/analyze/{job.id}/stream"
+    return resposta
 
-@app.get("/reports/list", response_model=List[ReportSummary])
-async def list_reports(db: Session = Depends(get_db)):
-    reports_list = []
-    clients_db = db.query(ClientDB).all()
-    
-    for client_db_entry in clients_db:
-        client_name = client_db_entry.nome_exibicao
-        safe_client_name = "".join(c if c.isalnum() else "_" for c in client_name)
-        client_id = client_db_entry.id
+# Intervalo dos comentários de keep-alive do SSE (mantém a conexão aberta em proxies)
+SSE_KEEPALIVE_SECONDS = 15
 
-        # Listar diretórios de meses para este cliente
-        reports_base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reports')
-        client_reports_root = os.path.join(reports_base_dir, safe_client_name)
+def sse_event(evento: str, dados: dict) -> str:
+    """Formata um evento do protocolo Server-Sent Events."""
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False, default=str)}\n\n"
 
-        if not os.path.exists(client_reports_root):
-            continue
+def _load_job_result(job_id: str) -> Optional[dict]:
+    """Lê do banco o status do job no formato do evento 'fim' (None se o job não existir)."""
+    db = SessionLocal()
+    try:
+        db_job = get_job(db, job_id)
+        if db_job is None:
+            return None
+        return {
+            "status": db_job.status,
+            "report_path": db_job.report_path,
+            "warnings": json.loads(db_job.warnings) if db_job.warnings else None,
+            "erro": json.loads(db_job.erro) if db_job.erro else None,
+        }
+    finally:
+        db.close()
+
+@app.get("/analyze/{job_id}/stream")
+async def stream_analysis(job_id: str):
+    """
+    Transmite o andamento de um job de análise via Server-Sent Events (GET, para uso
+    com `EventSource`); o job é criado antes, em `POST /analyze` com `streaming`.
 
-        for month_dir_name in os.listdir(client_reports_root):
-            month_dir_path = os.path.join(client_reports_root, month_dir_name)
-            if os.path.isdir(month_dir_path):
-                mes_analise_formatted = month_dir_name.replace("_", "-") # Converte para YYYY-MM-DD
+    Eventos: 'job' (ID do job), 'etapa' (progresso), 'trecho' (texto de cada seção
+    à medida que o LLM o gera: 'google_ads', 'meta_ads' ou 'consolidacao') e 'fim'
+    (status final e caminho do relatório). A análise continua e o relatório é salvo
+    mesmo que o cliente se desconecte.
 
-                # Usar get_report_path para obter o caminho absoluto do relatório consolidado
-                # e então extrair o caminho relativo para o frontend
+    O gerador é assíncrono: a conexão aguarda os eventos no event loop, sem ocupar
+    uma thread do pool do servidor enquanto a análise roda.
+    """
+    job_queue: AnalysisJobQueue = app.state.job_queue
+    loop = asyncio.get_running_loop()
+    eventos: asyncio.Queue = asyncio.Queue()
+    # Chamado pela thread do job: apenas agenda a entrega no event loop
+    listener = lambda evento, dados: loop.call_soon_threadsafe(eventos.put_nowait, (evento, dados))
+
+    # A inscrição vem antes da leitura do banco, para que um job que termine entre
+    # as duas seja visto como finalizado no banco em vez de perder o evento 'fim'
+    inscrito = job_queue.subscribe(job_id, listener)
+    resultado = await run_in_threadpool(_load_job_result, job_id)
+    if resultado is None:
+        job_queue.unsubscribe(job_id, listener)
+        raise HTTPException(status_code=404, detail=f"Job com ID '{job_id}' não encontrado.")
+
+    async def event_stream():
+        try:
+            yield sse_event("job", {"job_id": job_id, "status_url": f"/jobs/{job_id}"})
+            if not inscrito and resultado["status"] in (JOB_CONCLUIDO, JOB_ERRO):
+                yield sse_event("fim", resultado)
+                return
+            while True:
                 try:
-                    absolute_report_path = get_report_path(client_name, mes_analise_formatted, file_type="consolidated")
-                    # Extrair o nome do arquivo do caminho absoluto
-                    file_name = os.path.basename(absolute_report_path)
-                    # Construir o caminho relativo esperado pelo frontend
-                    relative_file_path = os.path.join(safe_client_name, month_dir_name, file_name)
-
-                    if os.path.exists(absolute_report_path):
-                        reports_list.append(ReportSummary(
-                            client_id=client_id,
-                            client_name=client_name,
-                            mes_analise=mes_analise_formatted,
-                            file_name=file_name,
-                            file_path=relative_file_path
-                        ))
-                except ValueError:
-                    # Ignorar tipos de arquivo desconhecidos ou erros de caminho
+                    evento, dados = await asyncio.wait_for(eventos.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Sem eventos: confirma no banco que o job não terminou sem notificar
+                    # (ex: desligamento, ou job sem streaming neste worker)
+                    atual = await run_in_threadpool(_load_job_result, job_id)
+                    if atual is None or atual["status"] in (JOB_CONCLUIDO, JOB_ERRO):
+                        yield sse_event("fim", atual or {"status": JOB_ERRO, "report_path": None, "warnings": None, "erro": None})
+                        return
+                    yield ": keep-alive\n\n"
                     continue
-    return reports_list
+                yield sse_event(evento, dados)
+                if evento == "fim":
+                    return
+        finally:
+            job_queue.unsubscribe(job_id, listener)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job_status(job_id: str, response: Response, db: Session = Depends(get_db)):
+    db_job = get_job(db, job_id)
+    if not db_job:
+        raise HTTPException(status_code=404, detail=f"Job com ID '{job_id}' não encontrado.")
+    tempos = json.loads(db_job.tempos) if db_job.tempos else None
+    if tempos:
+        response.headers["Server-Timing"] = format_server_timing(tempos)
+    return JobStatus(
+        id=db_job.id,
+        client_id=db_job.client_id,
+        mes_analise=db_job.mes_analise,
+        status=db_job.status,
+        etapas=json.loads(db_job.etapas) if db_job.etapas else {},
+        report_path=db_job.report_path,
+        warnings=json.loads(db_job.warnings) if db_job.warnings else None,
+        erro=json.loads(db_job.erro) if db_job.erro else None,
+        tempos=tempos,
+        created_at=db_job.created_at,
+        updated_at=db_job.updated_at
+    )
+
+@app.get("/reports/list", response_model=List[ReportSummary])
+def list_reports(
+    response: Response,
+    client_id: Optional[str] = None,
+    mes_inicio: Optional[date] = None,
+    mes_fim: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Lista os relatórios do catálogo, do mais recente para o mais antigo.
+    Com `limit`, a resposta é paginada: o cursor da próxima página é retornado
+    no cabeçalho `X-Next-Cursor` e deve ser enviado em `cursor`.
+    """
+    reports = get_reports(
+        db,
+        client_id=client_id,
+        mes_inicio=mes_inicio.strftime("%Y-%m-%d") if mes_inicio else None,
+        mes_fim=mes_fim.strftime("%Y-%m-%d") if mes_fim else None,
+        limit=limit,
+        cursor=cursor
+    )
+    response.headers.update(next_cursor_headers(reports, limit, "id"))
+
+    return [
+        ReportSummary(
+            client_id=report.client_id,
+            client_name=report.client_name,
+            mes_analise=report.mes_analise,
+            file_name=report.file_name,
+            file_path=report.file_path,
+            size_bytes=report.size_bytes,
+            created_at=report.created_at
+        )
+        for report in reports
+    ]
 
 @app.get("/reports/view/{file_name}", response_model=ReportContent)
-async def get_report_content_by_filename(file_name: str):
-    reports_base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reports')
-    
-    # O file_name pode conter o caminho relativo, então precisamos encontrá-lo
-    # Esta é uma busca simples, pode ser otimizada se necessário
-    for root, dirs, files in os.walk(reports_base_dir):
-        if file_name in files:
-            report_file_path = os.path.join(root, file_name)
-            try:
-                with open(report_file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                return ReportContent(report_content=content)
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Erro ao ler o relatório: {e}")
-    
-    raise HTTPException(status_code=404, detail="Relatório não encontrado.")
+def get_report_content_by_filename(file_name: str, db: Session = Depends(get_db)):
+    report = get_report_by_file_name(db, file_name)
+    if not report:
+        raise HTTPException(status_code=404, detail="Relatório não encontrado.")
+
+    report_file_path = os.path.join(REPORTS_BASE_DIR, report.file_path)
+    if not os.path.exists(report_file_path):
+        raise HTTPException(status_code=404, detail="Relatório não encontrado.")
+    try:
+        with open(report_file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        return ReportContent(report_content=content)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao ler o relatório: {e}")
 
 
 @app.get("/reports/{client_id}/{mes_analise}", response_model=ReportContent)
-async def get_report_content(client_id: str, mes_analise: str, db: Session = Depends(get_db)):
+def get_report_content(client_id: str, mes_analise: str, db: Session = Depends(get_db)):
     client_db_entry = db.query(ClientDB).filter(ClientDB.id == client_id).first()
     if not client_db_entry:
         raise HTTPException(status_code=404, detail=f"Cliente com ID '{client_id}' não encontrado.")
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import re
 
@@ -34,6 +35,72 @@ def limpar_numero(valor):
     except ValueError:
         return None
 
+def _float_ou_none(valor: str):
+    """Converte um texto já limpo para float, como em `limpar_numero`."""
+    try:
+        return float(valor)
+    except ValueError:
+        return None
+
+def limpar_numeros(serie: pd.Series) -> pd.Series:
+    """
+    Versão vetorizada de `limpar_numero` para uma coluna inteira.
+
+    A detecção do formato (BR/US) e a limpeza são feitas com operações de texto
+    do pandas sobre a coluna toda, em vez de uma chamada Python com regex por
+    célula. Retorna exatamente os mesmos valores que `limpar_numero` aplicado
+    célula a célula, com NaN no lugar de None.
+    """
+    resultado = pd.Series(np.nan, index=serie.index, dtype='float64')
+    validos = serie.notna()
+    if not validos.any():
+        return resultado
+
+    texto = serie[validos].astype(str).str.strip()
+    padrao = r'[^\d.,]+'
+    if isinstance(texto.dtype, pd.StringDtype) and texto.dtype.storage == 'pyarrow':
+        # No motor de regex do Arrow (RE2) \d casa apenas dígitos ASCII; \p{Nd} equivale ao \d do Python
+        padrao = r'[^\p{Nd}.,]+'
+    texto = texto.str.replace(padrao, '', regex=True)
+
+    # Formato Brasileiro: a última ocorrência é vírgula, ou seja, há vírgula sem ponto depois dela
+    # (inclui o caso de apenas vírgula presente). Nos demais casos (formato Americano,
+    # apenas ponto ou nenhum separador) basta remover as vírgulas de milhar.
+    formato_br = texto.str.contains(r',[^.]*$', regex=True)
+
+    def converter_br(t: pd.Series) -> pd.Series:
+        # Remove pontos de milhar, troca vírgula por ponto decimal
+        return t.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+
+    def converter_us(t: pd.Series) -> pd.Series:
+        # Remove vírgulas de milhar
+        return t.str.replace(',', '', regex=False)
+
+    # O formato é detectado uma vez por coluna; só colunas mistas tratam célula a célula
+    if formato_br.all():
+        texto = converter_br(texto)
+    elif not formato_br.any():
+        texto = converter_us(texto)
+    else:
+        texto = converter_br(texto).where(formato_br, converter_us(texto))
+
+    # Textos no formato de número decimal simples são convertidos de uma vez;
+    # os demais (ex: '1.2.3', dígitos não ASCII) seguem a conversão do Python
+    decimal_simples = texto.str.fullmatch(r'\d+\.?\d*|\.\d+')
+    numeros = texto.where(decimal_simples).astype('float64')
+    pendentes = ~decimal_simples & texto.ne('')
+    if pendentes.any():
+        numeros[pendentes] = texto[pendentes].map(_float_ou_none).astype('float64')
+
+    # np.round pode divergir do round() do Python perto de x.xx5; esses casos usam round()
+    arredondados = numeros.round(2)
+    ambiguos = ((numeros * 100) % 1 - 0.5).abs() < 1e-6
+    if ambiguos.any():
+        arredondados[ambiguos] = numeros[ambiguos].map(lambda x: round(x, 2))
+
+    resultado[validos] = arredondados
+    return resultado
+
 def limpar_porcentagem(valor):
     """
     Converte porcentagem para float, tratando diferentes formatos e símbolos.
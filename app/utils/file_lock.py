@@ -0,0 +1,41 @@
+import os
+import time
+from contextlib import contextmanager
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _lock(f):
+        # LK_LOCK desiste após ~10 s de espera; tenta novamente até obter a trava
+        while True:
+            try:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                time.sleep(0.1)
+
+    def _unlock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Trava exclusiva sobre o arquivo `path` (criado se necessário), válida entre
+    processos e entre threads do mesmo processo, mantida durante o bloco.
+    """
+    with open(path, 'a+b') as f:
+        _lock(f)
+        try:
+            yield
+        finally:
+            _unlock(f)
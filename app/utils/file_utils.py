@@ -4,6 +4,13 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Pasta raiz dos relatórios gerados (app/reports)
+REPORTS_BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'reports'))
+
+def get_safe_name(name: str) -> str:
+    """Substitui caracteres não alfanuméricos por '_' para uso em nomes de pastas e arquivos."""
+    return "".join(c if c.isalnum() else "_" for c in name)
+
 def save_to_file(filepath, content):
     """
     Salva o conteúdo em um arquivo de texto.
@@ -31,8 +38,8 @@ def create_directory_if_not_exists(path: str):
     """
     Cria um diretório se ele não existir.
     """
-    if not os.path.exists(path):
-        os.makedirs(path)
+    # exist_ok evita a falha quando outra thread cria o mesmo diretório ao mesmo tempo
+    os.makedirs(path, exist_ok=True)
 
 def get_report_path(client_name: str, mes_analise: str, file_type: str = "consolidated") -> str:
     """
@@ -46,11 +53,10 @@ def get_report_path(client_name: str, mes_analise: str, file_type: str = "consol
     Returns:
         str: O caminho absoluto para o arquivo de relatório.
     """
-    safe_client_name = "".join(c if c.isalnum() else "_" for c in client_name)
+    safe_client_name = get_safe_name(client_name)
     safe_mes_analise = mes_analise.replace("-", "_")
     
-    reports_base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'reports')
-    client_report_dir = os.path.join(reports_base_dir, safe_client_name, safe_mes_analise)
+    client_report_dir = os.path.join(REPORTS_BASE_DIR, safe_client_name, safe_mes_analise)
     
     create_directory_if_not_exists(client_report_dir)
 
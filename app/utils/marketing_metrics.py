@@ -1,20 +1,52 @@
+import numpy as np
 import pandas as pd
 
+def _safe_divide(numerator: pd.Series, denominator: pd.Series) -> pd.Series:
+    """
+    Divide duas colunas elemento a elemento.
+    Onde o denominador é zero o resultado é 0, como nas versões escalares.
+    """
+    num = numerator.to_numpy(dtype='float64')
+    den = denominator.to_numpy(dtype='float64')
+    result = np.zeros(len(num), dtype='float64')
+    np.divide(num, den, out=result, where=den != 0)
+    return pd.Series(result, index=numerator.index)
+
+# --- Versões vetorizadas (colunas inteiras) ---
+
 def calculate_ctr(clicks: pd.Series, impressions: pd.Series) -> pd.Series:
     """Calcula o Click-Through Rate (CTR)."""
-    return (clicks / impressions) * 100
+    return _safe_divide(clicks, impressions) * 100
 
 def calculate_cpc(cost: pd.Series, clicks: pd.Series) -> pd.Series:
     """Calcula o Cost Per Click (CPC)."""
-    return cost / clicks
+    return _safe_divide(cost, clicks)
 
 def calculate_cpm(cost: pd.Series, impressions: pd.Series) -> pd.Series:
     """Calcula o Cost Per Mille (CPM)."""
-    return (cost / impressions) * 1000
+    return _safe_divide(cost, impressions) * 1000
 
 def calculate_roas(revenue: pd.Series, cost: pd.Series) -> pd.Series:
     """Calcula o Return On Ad Spend (ROAS)."""
-    return revenue / cost
+    return _safe_divide(revenue, cost)
+
+def calculate_roi(revenue: pd.Series, spend: pd.Series) -> pd.Series:
+    """Calcula o Retorno sobre Investimento (ROI) como um múltiplo."""
+    return _safe_divide(revenue, spend)
+
+def calculate_cps(spend: pd.Series, sessions: pd.Series) -> pd.Series:
+    """Calcula o Custo por Sessão (CPS)."""
+    return _safe_divide(spend, sessions)
+
+def calculate_tkm(revenue: pd.Series, conversions: pd.Series) -> pd.Series:
+    """Calcula o Ticket Médio (TKM)."""
+    return _safe_divide(revenue, conversions)
+
+def calculate_conversion_rate(conversions: pd.Series, sessions: pd.Series) -> pd.Series:
+    """Calcula a Taxa de Conversão."""
+    return _safe_divide(conversions, sessions) * 100
+
+# --- Versões escalares (totais de um período) ---
 
 def roi(revenue, spend):
     """Calcula o Retorno sobre Investimento (ROI) como um múltiplo.
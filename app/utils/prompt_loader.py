@@ -1,10 +1,126 @@
 import os
+import logging
+import threading
+from app.config.settings import settings
 from app.utils.custom_exceptions import PromptTemplateError
 from app.db.database import SessionLocal, PromptDB
 
+logger = logging.getLogger(__name__)
+
+class PromptCache:
+    """
+    Cache em memória (por processo) dos templates de prompt.
+
+    Todos os prompts são carregados de uma vez e as leituras seguintes não
+    acessam o banco. As escritas feitas pela API atualizam o cache do próprio
+    processo (write-through) e incrementam um contador de versão gravado em
+    arquivo; os demais workers detectam a mudança com um `os.stat` por leitura
+    e recarregam os prompts.
+
+    Nomes não encontrados (ex: prompts opcionais não cadastrados) são lembrados
+    até a próxima mudança de versão, para que cada leitura de um prompt ausente
+    não recarregue os prompts do banco.
+    """
+    def __init__(self, version_path: str):
+        self.version_path = version_path
+        self.version = 0
+        self._prompts = None
+        self._missing = set()
+        self._version_stamp = None
+        self._lock = threading.Lock()
+
+    def _stat_version_file(self):
+        """Retorna a identificação da última escrita do arquivo de versão (ou None se não existir)."""
+        try:
+            stat = os.stat(self.version_path)
+            return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except FileNotFoundError:
+            return None
+
+    def _read_version(self) -> int:
+        try:
+            with open(self.version_path, 'r', encoding='utf-8') as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def load_all(self) -> dict:
+        """Carrega (ou recarrega) todos os prompts do banco de dados e os retorna."""
+        with self._lock:
+            version_stamp = self._stat_version_file()
+            db = SessionLocal()
+            try:
+                prompts = {prompt.nome: prompt.conteudo for prompt in db.query(PromptDB).all()}
+            except Exception as e:
+                raise PromptTemplateError(f"Erro ao carregar os prompts do banco de dados: {e}")
+            finally:
+                db.close()
+            self._prompts = prompts
+            self._missing = set()
+            self._version_stamp = version_stamp
+            self.version = self._read_version()
+        logger.info(f"{len(prompts)} prompt(s) carregado(s) no cache (versão {self.version}).")
+        return prompts
+
+    def get(self, prompt_name: str) -> str:
+        """Retorna o template do prompt, recarregando o cache se outro processo o alterou."""
+        prompts = self._prompts
+        if prompts is None or self._stat_version_file() != self._version_stamp:
+            prompts = self.load_all()
+        prompt = prompts.get(prompt_name)
+        if prompt is None and prompt_name not in self._missing:
+            # Prompts inseridos diretamente no banco não incrementam a versão: relê o
+            # banco uma vez e, se o prompt continuar ausente, lembra disso nesta versão
+            prompt = self.load_all().get(prompt_name)
+            if prompt is None:
+                with self._lock:
+                    self._missing.add(prompt_name)
+        if prompt is None:
+            raise PromptTemplateError(f"O template de prompt '{prompt_name}' não foi encontrado no banco de dados.")
+        return prompt
+
+    def put(self, prompt_name: str, conteudo: str):
+        """Atualiza um prompt no cache após uma escrita no banco e publica a nova versão."""
+        with self._lock:
+            if self._prompts is not None:
+                self._prompts[prompt_name] = conteudo
+            self._missing.discard(prompt_name)
+        self._bump_version()
+
+    def remove(self, prompt_name: str):
+        """Remove um prompt do cache após sua exclusão no banco e publica a nova versão."""
+        with self._lock:
+            if self._prompts is not None:
+                self._prompts.pop(prompt_name, None)
+        self._bump_version()
+
+    def _bump_version(self):
+        """Incrementa o contador de versão compartilhado entre os workers."""
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.version_path), exist_ok=True)
+                # Se outro processo publicou uma versão que ainda não foi lida, o cache
+                # local não a reflete e precisa ser recarregado na próxima leitura.
+                changed_elsewhere = self._stat_version_file() != self._version_stamp
+                self.version = self._read_version() + 1
+                tmp_path = f"{self.version_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(str(self.version))
+                os.replace(tmp_path, self.version_path)
+                self._version_stamp = self._stat_version_file()
+                if changed_elsewhere:
+                    self._prompts = None
+            except Exception as e:
+                # Sem o arquivo de versão os outros workers não percebem a mudança;
+                # invalida o cache local para que ao menos este processo releia o banco.
+                logger.warning(f"Falha ao publicar a versão do cache de prompts: {e}")
+                self._prompts = None
+
+prompt_cache = PromptCache(os.path.join(settings.APP_DATA_DIR, "prompts.version"))
+
 def load_prompt(prompt_name: str) -> str:
     """
-    Carrega um template de prompt do banco de dados.
+    Carrega um template de prompt do cache de prompts.
 
     Args:
         prompt_name (str): O nome do prompt a ser carregado.
@@ -12,15 +128,4 @@ def load_prompt(prompt_name: str) -> str:
     Returns:
         str: O conteúdo do template do prompt.
     """
-    db = SessionLocal()
-    try:
-        prompt_db = db.query(PromptDB).filter(PromptDB.nome == prompt_name).first()
-        if not prompt_db:
-            raise PromptTemplateError(f"O template de prompt '{prompt_name}' não foi encontrado no banco de dados.")
-        return prompt_db.conteudo
-    except PromptTemplateError:
-        raise # Re-raise a exceção customizada
-    except Exception as e:
-        raise PromptTemplateError(f"Erro ao carregar o prompt '{prompt_name}' do banco de dados: {e}")
-    finally:
-        db.close()
\ No newline at end of file
+    return prompt_cache.get(prompt_name)
@@ -0,0 +1,74 @@
+import os
+import logging
+from datetime import datetime
+
+from app.db.database import SessionLocal, ClientDB, ReportDB, upsert_report, count_reports
+from app.utils.file_utils import REPORTS_BASE_DIR, get_report_path, get_safe_name
+
+logger = logging.getLogger(__name__)
+
+def _build_report_entry(client_id: str, client_name: str, mes_analise: str, file_path: str) -> ReportDB:
+    """Monta o registro do catálogo a partir do arquivo de relatório já salvo."""
+    stat = os.stat(file_path)
+    return ReportDB(
+        client_id=client_id,
+        client_name=client_name,
+        mes_analise=mes_analise,
+        file_name=os.path.basename(file_path),
+        file_path=os.path.relpath(file_path, REPORTS_BASE_DIR),
+        size_bytes=stat.st_size,
+        created_at=datetime.fromtimestamp(stat.st_mtime)
+    )
+
+def register_report(client_id: str, client_name: str, mes_analise: str, file_path: str):
+    """
+    Registra no catálogo um relatório consolidado recém-salvo.
+    Falhas são apenas registradas: o arquivo já está salvo e pode ser
+    indexado depois por `backfill_reports`.
+    """
+    db = SessionLocal()
+    try:
+        upsert_report(db, _build_report_entry(client_id, client_name, mes_analise, file_path))
+    except Exception as e:
+        logger.warning(f"Falha ao registrar o relatório '{file_path}' no catálogo: {e}")
+    finally:
+        db.close()
+
+def backfill_reports(force: bool = False) -> int:
+    """
+    Indexa no catálogo os relatórios consolidados já existentes em disco.
+    Por padrão só roda com o catálogo vazio (migração única); `force=True`
+    reindexa tudo. Retorna a quantidade de relatórios indexados.
+    """
+    db = SessionLocal()
+    try:
+        if not force and count_reports(db) > 0:
+            return 0
+
+        entries = []
+        for client in db.query(ClientDB).all():
+            client_reports_root = os.path.join(REPORTS_BASE_DIR, get_safe_name(client.nome_exibicao))
+            if not os.path.isdir(client_reports_root):
+                continue
+
+            for month_dir_name in sorted(os.listdir(client_reports_root)):
+                if not os.path.isdir(os.path.join(client_reports_root, month_dir_name)):
+                    continue
+                mes_analise = month_dir_name.replace("_", "-")
+                file_path = get_report_path(client.nome_exibicao, mes_analise, file_type="consolidated")
+                if os.path.exists(file_path):
+                    entries.append(_build_report_entry(client.id, client.nome_exibicao, mes_analise, file_path))
+
+        # Indexa em ordem de geração, para que a ordem do catálogo reflita o histórico
+        for entry in sorted(entries, key=lambda entry: entry.created_at):
+            upsert_report(db, entry)
+
+        if entries:
+            logger.info(f"{len(entries)} relatório(s) existente(s) indexado(s) no catálogo.")
+        return len(entries)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"Relatórios indexados: {backfill_reports(force=True)}")
@@ -0,0 +1,66 @@
+import re
+from typing import Callable, Dict
+
+# Marcador que inicia cada seção de uma resposta com várias seções (um comentário
+# HTML, invisível se o texto for exibido como markdown sem ser dividido)
+SECTION_MARKER = "<!-- secao: {secao} -->"
+_SECTION_MARKER_RE = re.compile(r"^\s*<!--\s*secao:\s*(\w+)\s*-->\s*$", re.MULTILINE)
+
+def format_section_marker(secao: str) -> str:
+    return SECTION_MARKER.format(secao=secao)
+
+def split_sections(text: str) -> Dict[str, str]:
+    """
+    Divide o texto nas seções iniciadas pelos marcadores de `SECTION_MARKER`.
+    Um texto anterior ao primeiro marcador é ignorado se estiver em branco e,
+    caso contrário, retornado sob a chave ''.
+    """
+    parts = _SECTION_MARKER_RE.split(text)
+    sections = {}
+    if parts[0].strip():
+        sections[''] = parts[0].strip()
+    for secao, content in zip(parts[1::2], parts[2::2]):
+        sections[secao] = content.strip()
+    return sections
+
+class SectionStreamRouter:
+    """
+    Repassa os trechos de uma resposta em streaming a `on_chunk(secao, trecho)`,
+    identificando a seção pelos marcadores. O texto é repassado por linhas
+    completas, para que um marcador nunca seja dividido entre dois trechos.
+
+    O texto anterior ao primeiro marcador é descartado, como em `split_sections`;
+    se a resposta não trouxer nenhum marcador, ele é repassado em `flush` como
+    `default_section`.
+    """
+    def __init__(self, on_chunk: Callable[[str, str], None], default_section: str):
+        self.on_chunk = on_chunk
+        self.default_section = default_section
+        self.section = None
+        self._preamble = []
+        self._pending = ""
+
+    def feed(self, chunk: str):
+        self._pending += chunk
+        lines = self._pending.split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._route(line + "\n")
+
+    def flush(self):
+        if self._pending:
+            self._route(self._pending)
+            self._pending = ""
+        if self.section is None and self._preamble:
+            self.on_chunk(self.default_section, "".join(self._preamble))
+            self._preamble = []
+
+    def _route(self, line: str):
+        match = _SECTION_MARKER_RE.match(line.rstrip("\n"))
+        if match:
+            self.section = match.group(1)
+            self._preamble = []
+        elif self.section is None:
+            self._preamble.append(line)
+        else:
+            self.on_chunk(self.section, line)
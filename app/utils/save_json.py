@@ -21,15 +21,11 @@ def salvar_json_kpis(
     # Filtra o resumo do período atual
     kpis_atuais_filtrados = {k: round(v, 2) if isinstance(v, (int, float)) else v for k, v in resumo_periodos.get('atual', {}).items() if k in metricas_selecionadas}
 
-    # Filtra os comparativos (MoM e YoY)
-    comparativos_filtrados = {}
-    for metrica in metricas_selecionadas:
-        mom_key = f"{metrica}_MoM"
-        yoy_key = f"{metrica}_YoY"
-        if mom_key in comparativos:
-            comparativos_filtrados[mom_key] = round(comparativos[mom_key], 2) if isinstance(comparativos[mom_key], (int, float)) else comparativos[mom_key]
-        if yoy_key in comparativos:
-            comparativos_filtrados[yoy_key] = round(comparativos[yoy_key], 2) if isinstance(comparativos[yoy_key], (int, float)) else comparativos[yoy_key]
+    # Filtra os comparativos (`<métrica>_<sufixo>`, de todas as janelas calculadas)
+    comparativos_filtrados = {
+        k: round(v, 2) if isinstance(v, (int, float)) else v
+        for k, v in comparativos.items() if k.rsplit('_', 1)[0] in metricas_selecionadas
+    }
 
     data_to_save = {
         "plataforma": plataforma,
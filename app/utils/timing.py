@@ -0,0 +1,153 @@
+import time
+import threading
+import contextvars
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Amostras mantidas por etapa para o cálculo dos percentis (janela deslizante)
+MAX_SAMPLES_PER_STAGE = 1024
+QUANTILES = (0.5, 0.95, 0.99)
+
+class StatsRegistry:
+    """
+    Registro em memória (por processo) das estatísticas de execução: duração
+    das etapas, contadores (acertos de cache, chamadas ao LLM) e tokens do LLM.
+    Exportado em formato texto do Prometheus por `render_prometheus`.
+    """
+    def __init__(self, max_samples: int = MAX_SAMPLES_PER_STAGE):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._sums = defaultdict(float)
+        self._counts = defaultdict(int)
+        self._counters = defaultdict(float)
+
+    def observe(self, stage: str, seconds: float):
+        """Registra a duração de uma execução da etapa."""
+        with self._lock:
+            self._samples[stage].append(seconds)
+            self._sums[stage] += seconds
+            self._counts[stage] += 1
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """Incrementa um contador, identificado pelo nome e pelos rótulos."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def get_counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def quantiles(self, stage: str) -> Dict[float, float]:
+        """Retorna os percentis de `QUANTILES` das amostras recentes da etapa."""
+        with self._lock:
+            samples = sorted(self._samples.get(stage, ()))
+        if not samples:
+            return {}
+        return {q: samples[min(len(samples) - 1, int(q * len(samples)))] for q in QUANTILES}
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._sums.clear()
+            self._counts.clear()
+            self._counters.clear()
+
+    def render_prometheus(self) -> str:
+        """Exporta as estatísticas no formato texto do Prometheus (versão 0.0.4)."""
+        with self._lock:
+            stages = sorted(self._counts)
+            sums = dict(self._sums)
+            counts = dict(self._counts)
+            counters = dict(self._counters)
+
+        lines = [
+            "# HELP app_stage_duration_seconds Duração das etapas da análise (percentis das execuções recentes).",
+            "# TYPE app_stage_duration_seconds summary",
+        ]
+        for stage in stages:
+            for q, value in self.quantiles(stage).items():
+                lines.append(f'app_stage_duration_seconds{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'app_stage_duration_seconds_sum{{stage="{stage}"}} {sums[stage]:.6f}')
+            lines.append(f'app_stage_duration_seconds_count{{stage="{stage}"}} {counts[stage]}')
+
+        counter_names = sorted({name for name, _ in counters})
+        for name in counter_names:
+            lines.append(f"# TYPE {name} counter")
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+
+        # Taxa de acerto derivada dos contadores de cache
+        caches = sorted({dict(labels).get("cache") for name, labels in counters if name == "app_cache_requests_total"})
+        if caches:
+            lines.append("# HELP app_cache_hit_ratio Proporção de acertos de cada cache.")
+            lines.append("# TYPE app_cache_hit_ratio gauge")
+            for cache in caches:
+                hits = counters.get(("app_cache_requests_total", (("cache", cache), ("result", "hit"))), 0)
+                misses = counters.get(("app_cache_requests_total", (("cache", cache), ("result", "miss"))), 0)
+                ratio = hits / (hits + misses) if hits + misses else 0
+                lines.append(f'app_cache_hit_ratio{{cache="{cache}"}} {ratio:.4f}')
+
+        return "\n".join(lines) + "\n"
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+# Registro global do processo
+stats = StatsRegistry()
+
+# Tempos coletados no contexto atual (requisição ou job), usados no Server-Timing.
+# A lista é compartilhada com threads que recebem uma cópia do contexto.
+_collected_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar("collected_timings", default=None)
+
+def start_collection() -> List[Tuple[str, float]]:
+    """Inicia a coleta dos tempos das etapas executadas no contexto atual e retorna a lista de coleta."""
+    timings = []
+    _collected_timings.set(timings)
+    return timings
+
+@contextmanager
+def timed(stage: str):
+    """
+    Mede a duração do bloco, registrando-a nas estatísticas globais e na coleta
+    do contexto atual (se houver). Também pode ser usado como decorador.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stats.observe(stage, elapsed)
+        timings = _collected_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+def record_cache_access(cache: str, hit: bool):
+    """Conta um acesso a um cache, para o cálculo da taxa de acerto."""
+    stats.increment("app_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+def summarize_timings(timings: List[Tuple[str, float]]) -> Dict[str, Dict[str, float]]:
+    """Agrupa os tempos coletados por etapa: duração total (ms) e quantidade de execuções."""
+    summary = {}
+    for stage, seconds in timings:
+        entry = summary.setdefault(stage, {"dur_ms": 0.0, "count": 0})
+        entry["dur_ms"] += seconds * 1000
+        entry["count"] += 1
+    for entry in summary.values():
+        entry["dur_ms"] = round(entry["dur_ms"], 1)
+    return summary
+
+def format_server_timing(summary: Dict[str, Dict[str, float]]) -> str:
+    """Formata o resumo de `summarize_timings` como valor do cabeçalho `Server-Timing`."""
+    parts = []
+    for stage, entry in summary.items():
+        part = f"{stage};dur={entry['dur_ms']:.1f}"
+        if entry["count"] > 1:
+            part += f';desc="{entry["count"]}x"'
+        parts.append(part)
+    return ", ".join(parts)
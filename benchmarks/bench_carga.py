@@ -0,0 +1,313 @@
+"""
+Teste de carga ponta a ponta da API, sem acessar as APIs do Google.
+
+A aplicação é iniciada em um uvicorn local com um Orchestrator real cujas
+dependências externas são substituídas por dublês locais:
+  - um `BaseConnector` falso que serve abas sintéticas (ver
+    `benchmarks.dados_sinteticos`) com latência e taxa de erro configuráveis;
+  - o provedor de LLM `stub`, que devolve um texto determinístico após um atraso configurável.
+
+Vários clientes HTTP simultâneos executam uma carga mista: CRUD de clientes,
+listagem de prompts e relatórios, disparo de análises e consulta dos jobs.
+Ao final são exibidos, por endpoint, a latência p50/p95/p99 e as requisições
+por segundo, além da duração ponta a ponta das análises (criação até a
+conclusão do job).
+
+Uso (a partir da raiz do projeto, com o .env da aplicação configurado):
+    python -m benchmarks.bench_carga [--concorrencia 8] [--duracao 30] [--latencia-planilha 0.3]
+        [--erro-planilha 0.05] [--atraso-llm 1.0] [--linhas 5000] [--workers-analise 2] [--peso-analise 5]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import httpx
+import uvicorn
+
+# Banco e dados locais isolados para o teste, definidos antes de importar a aplicação
+_TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/bench_carga.db"
+os.environ["APP_DATA_DIR"] = os.path.join(_TMP_DIR, "data")
+
+import app.main as main_module
+from app.agents.media_agent import MediaAgent
+from app.agents.orchestrator import Orchestrator
+from app.core.connectors.base_connector import BaseConnector, filter_date_windows
+from app.core.llm_providers import StubProvider
+from app.core.llm_service import LLMService
+from app.db.database import SessionLocal, PromptDB
+from app.utils.custom_exceptions import ErroLeituraDadosError
+from app.utils.file_utils import REPORTS_BASE_DIR, get_safe_name
+from benchmarks.dados_sinteticos import gerar_planilha
+
+CLIENTES_ANALISE = 5
+MES_ANALISE = "2025-05-01"
+
+# Operações da carga mista e seus pesos
+OPERACOES = {
+    "GET /clients": 20,
+    "GET /clients?limit": 15,
+    "POST /clients": 5,
+    "PUT /clients/{id}": 5,
+    "DELETE /clients/{id}": 5,
+    "GET /prompts": 10,
+    "GET /reports/list": 20,
+    "POST /analyze": 5,
+    "GET /jobs/{id}": 15,
+}
+
+# Templates mínimos com os mesmos campos dos prompts reais
+PROMPTS = {
+    "media_analysis": "Analise {plataforma} ({dados_markdown_summary_month_name}).\n{cliente_contexto}\n{metrics_to_analyze_list_markdown}\n{dados_markdown}",
+    "consolidated_report": "Consolide {client_name} ({mes_analise}).\n{kpis_consolidated_markdown}\n{comparatives_consolidates_markdown}\n{all_platforms_reports}",
+}
+
+class ConectorFalso(BaseConnector):
+    """Conector que serve abas sintéticas após `latencia` segundos, falhando com probabilidade `taxa_erro`."""
+    def __init__(self, linhas: int, latencia: float, taxa_erro: float):
+        self.latencia = latencia
+        self.taxa_erro = taxa_erro
+        self.abas = {
+            'google_ads': gerar_planilha(linhas, seed=1),
+            'meta_ads': gerar_planilha(linhas, seed=2),
+        }
+
+    def get_data(self, data_source, client_config, mes_analise, date_windows=None):
+        time.sleep(self.latencia)
+        if random.random() < self.taxa_erro:
+            raise ErroLeituraDadosError(f"Falha simulada na leitura de '{data_source}'.")
+        return filter_date_windows(self.abas[data_source].copy(), date_windows)
+
+def criar_orchestrator(args) -> Orchestrator:
+    llm_service = LLMService(StubProvider(latency_seconds=args.atraso_llm))
+    orchestrator = Orchestrator(llm_service)
+    media_agent = MediaAgent(llm_service, data_connector=ConectorFalso(args.linhas, args.latencia_planilha, args.erro_planilha))
+    orchestrator.media_agent = media_agent
+    orchestrator.file_media_agent = media_agent
+    return orchestrator
+
+def preparar_banco():
+    """Insere os prompts usados pela análise (o cache de prompts os carrega na inicialização)."""
+    db = SessionLocal()
+    try:
+        for i, (nome, conteudo) in enumerate(PROMPTS.items()):
+            db.add(PromptDB(id=f"carga_{i}", nome=nome, conteudo=conteudo))
+        db.commit()
+    finally:
+        db.close()
+
+def porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def iniciar_servidor(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(main_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+def dados_cliente(client_id: str, nome: str) -> dict:
+    return {"id": client_id, "nome_exibicao": nome, "contexto_cliente_prompt": "Cliente de teste de carga.", "planilha_id_ou_nome": "carga"}
+
+class Carga:
+    """Estado compartilhado entre os clientes HTTP: latências, erros, jobs e clientes criados."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.erros = defaultdict(int)
+        self.jobs = []
+        self.contador = 0
+        self.decorrido = 0.0
+
+    def registrar(self, operacao: str, latencia_ms: float, ok: bool):
+        with self.lock:
+            self.latencias[operacao].append(latencia_ms)
+            if not ok:
+                self.erros[operacao] += 1
+
+    def proximo_id(self) -> int:
+        with self.lock:
+            self.contador += 1
+            return self.contador
+
+def executar_operacao(client: httpx.Client, operacao: str, carga: Carga, criados: list, rng: random.Random):
+    """Executa uma operação da carga; retorna a resposta ou None se não houver o que fazer."""
+    if operacao == "GET /clients":
+        return client.get("/clients")
+    if operacao == "GET /clients?limit":
+        return client.get("/clients", params={"limit": 20, "fields": "id,nome_exibicao"})
+    if operacao == "POST /clients":
+        client_id = f"carga_tmp_{carga.proximo_id()}"
+        response = client.post("/clients", json=dados_cliente(client_id, f"Carga temporario {client_id}"))
+        if response.status_code == 200:
+            criados.append(client_id)
+        return response
+    if operacao == "PUT /clients/{id}":
+        client_id = f"carga_{rng.randrange(CLIENTES_ANALISE)}"
+        return client.put(f"/clients/{client_id}", json={"contexto_cliente_prompt": f"Atualizado em {time.time()}"})
+    if operacao == "DELETE /clients/{id}":
+        if not criados:
+            return None
+        return client.delete(f"/clients/{criados.pop()}")
+    if operacao == "GET /prompts":
+        return client.get("/prompts")
+    if operacao == "GET /reports/list":
+        return client.get("/reports/list", params={"limit": 20})
+    if operacao == "POST /analyze":
+        response = client.post("/analyze", json={
+            "client_id": f"carga_{rng.randrange(CLIENTES_ANALISE)}",
+            "mes_analise": MES_ANALISE,
+            "metricas_selecionadas": ["Spend", "Revenue", "ROI", "CPC"]
+        })
+        if response.status_code == 202:
+            with carga.lock:
+                carga.jobs.append(response.json()["job_id"])
+        return response
+    if operacao == "GET /jobs/{id}":
+        with carga.lock:
+            job_id = rng.choice(carga.jobs) if carga.jobs else None
+        return client.get(f"/jobs/{job_id}") if job_id else None
+    raise ValueError(f"Operação desconhecida: {operacao}")
+
+def executar_carga(base_url: str, concorrencia: int, duracao: float) -> Carga:
+    """Roda `concorrencia` clientes HTTP por `duracao` segundos, escolhendo as operações pelos pesos."""
+    carga = Carga()
+    operacoes, pesos = list(OPERACOES), list(OPERACOES.values())
+    fim = time.perf_counter() + duracao
+
+    def cliente_http(seed: int):
+        rng = random.Random(seed)
+        criados = []
+        with httpx.Client(base_url=base_url, timeout=60) as client:
+            while time.perf_counter() < fim:
+                operacao = rng.choices(operacoes, pesos)[0]
+                inicio = time.perf_counter()
+                try:
+                    response = executar_operacao(client, operacao, carga, criados, rng)
+                except httpx.HTTPError:
+                    carga.registrar(operacao, (time.perf_counter() - inicio) * 1000, ok=False)
+                    continue
+                if response is not None:
+                    carga.registrar(operacao, (time.perf_counter() - inicio) * 1000, ok=response.status_code < 400)
+            for client_id in criados:
+                client.delete(f"/clients/{client_id}")
+
+    threads = [threading.Thread(target=cliente_http, args=(seed,)) for seed in range(concorrencia)]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    carga.decorrido = time.perf_counter() - inicio
+    return carga
+
+def aguardar_jobs(base_url: str, job_ids: list, timeout: float) -> list:
+    """Aguarda a conclusão dos jobs e retorna seus estados finais (jobs não concluídos ficam de fora)."""
+    finais = {}
+    limite = time.perf_counter() + timeout
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        while len(finais) < len(job_ids) and time.perf_counter() < limite:
+            for job_id in job_ids:
+                if job_id in finais:
+                    continue
+                job = client.get(f"/jobs/{job_id}").json()
+                if job["status"] in ("concluido", "erro"):
+                    finais[job_id] = job
+            time.sleep(0.2)
+    return list(finais.values())
+
+def quantis(valores: list) -> dict:
+    if len(valores) < 2:
+        valor = valores[0] if valores else 0.0
+        return {"p50": valor, "p95": valor, "p99": valor}
+    q = statistics.quantiles(valores, n=100, method='inclusive')
+    return {"p50": q[49], "p95": q[94], "p99": q[98]}
+
+def resumir(carga: Carga, jobs: list) -> dict:
+    resumo = {"duracao_s": round(carga.decorrido, 2), "endpoints": {}, "analises": {}}
+    print(f"\n{'endpoint':<24}{'reqs':>7}{'erros':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    total = 0
+    for operacao in OPERACOES:
+        latencias = carga.latencias.get(operacao, [])
+        if not latencias:
+            continue
+        total += len(latencias)
+        q = quantis(latencias)
+        rps = len(latencias) / carga.decorrido
+        resumo["endpoints"][operacao] = {"requisicoes": len(latencias), "erros": carga.erros[operacao], "rps": round(rps, 2),
+                                         **{k: round(v, 2) for k, v in q.items()}}
+        print(f"{operacao:<24}{len(latencias):>7}{carga.erros[operacao]:>7}{rps:>9.1f}{q['p50']:>10.1f}{q['p95']:>10.1f}{q['p99']:>10.1f}")
+    print(f"{'total':<24}{total:>7}{sum(carga.erros.values()):>7}{total / carga.decorrido:>9.1f}")
+
+    duracoes = [
+        (datetime.fromisoformat(job["updated_at"]) - datetime.fromisoformat(job["created_at"])).total_seconds() * 1000
+        for job in jobs
+    ]
+    concluidos = sum(1 for job in jobs if job["status"] == "concluido")
+    com_avisos = sum(1 for job in jobs if job.get("warnings"))
+    q = quantis(duracoes)
+    resumo["analises"] = {"disparadas": len(carga.jobs), "finalizadas": len(jobs), "concluidas": concluidos,
+                          "com_avisos": com_avisos, **{k: round(v, 2) for k, v in q.items()}}
+    print(f"\nAnálises: {len(carga.jobs)} disparadas, {len(jobs)} finalizadas ({concluidos} concluídas, "
+          f"{len(jobs) - concluidos} com erro, {com_avisos} com avisos)")
+    if duracoes:
+        print(f"Duração ponta a ponta (fila + execução): p50={q['p50']:.0f} ms  p95={q['p95']:.0f} ms  p99={q['p99']:.0f} ms")
+    return resumo
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concorrencia', type=int, default=8, help="Clientes HTTP simultâneos")
+    parser.add_argument('--duracao', type=float, default=30.0, help="Segundos de carga")
+    parser.add_argument('--latencia-planilha', type=float, default=0.3, help="Latência de cada leitura de aba (s)")
+    parser.add_argument('--erro-planilha', type=float, default=0.05, help="Probabilidade de falha de cada leitura de aba")
+    parser.add_argument('--atraso-llm', type=float, default=1.0, help="Atraso de cada chamada ao LLM (s)")
+    parser.add_argument('--linhas', type=int, default=5_000, help="Linhas de cada aba sintética")
+    parser.add_argument('--workers-analise', type=int, default=main_module.settings.ANALYSIS_MAX_WORKERS, help="Análises executadas em paralelo")
+    parser.add_argument('--peso-analise', type=int, default=OPERACOES["POST /analyze"], help="Peso de POST /analyze na carga mista")
+    parser.add_argument('--timeout-jobs', type=float, default=120.0, help="Espera máxima pelos jobs ao fim da carga (s)")
+    parser.add_argument('--json', help="Grava o resumo em um arquivo JSON")
+    args = parser.parse_args()
+
+    OPERACOES["POST /analyze"] = args.peso_analise
+    preparar_banco()
+    orchestrator = criar_orchestrator(args)
+    main_module.get_app_orchestrator = lambda: orchestrator
+    main_module.settings.ANALYSIS_MAX_WORKERS = args.workers_analise
+
+    port = porta_livre()
+    base_url = f"http://127.0.0.1:{port}"
+    server = iniciar_servidor(port)
+    nomes_clientes = [f"Carga {i}" for i in range(CLIENTES_ANALISE)]
+    try:
+        for i, nome in enumerate(nomes_clientes):
+            httpx.post(f"{base_url}/clients", json=dados_cliente(f"carga_{i}", nome)).raise_for_status()
+
+        print(f"Concorrência: {args.concorrencia} | Duração: {args.duracao:.0f}s | Análises em paralelo: {args.workers_analise}")
+        print(f"Planilha: {args.linhas:,} linhas, latência {args.latencia_planilha:.2f}s, erro {args.erro_planilha:.0%} | LLM: {args.atraso_llm:.2f}s")
+        carga = executar_carga(base_url, args.concorrencia, args.duracao)
+        jobs = aguardar_jobs(base_url, carga.jobs, args.timeout_jobs)
+        resumo = resumir(carga, jobs)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump({"parametros": vars(args), **resumo}, f, ensure_ascii=False, indent=2)
+    finally:
+        main_module.app.state.job_queue.shutdown(wait=True)
+        server.should_exit = True
+        # Remove os relatórios gerados pelos clientes do teste
+        for nome in nomes_clientes:
+            shutil.rmtree(os.path.join(REPORTS_BASE_DIR, get_safe_name(nome)), ignore_errors=True)
+        shutil.rmtree(_TMP_DIR, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
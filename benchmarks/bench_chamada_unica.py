@@ -0,0 +1,158 @@
+"""
+Compara o fluxo de análise com três chamadas ao LLM (uma análise por plataforma
+e o consolidado) com o modo de chamada única (`chamada_unica=True`), medindo por
+análise a duração ponta a ponta, o número de chamadas e os tokens de entrada e
+saída (contadores `app_llm_*` de `app.utils.timing`).
+
+O fluxo real do Orchestrator é executado sobre abas sintéticas (ver
+`benchmarks.dados_sinteticos`), sem cache de respostas. Por padrão o LLM é o
+provedor `stub`, com um atraso fixo por chamada e tokens estimados (~4 caracteres
+por token); com `--provedor-configurado`, usa o provedor das configurações da
+aplicação (ex: Gemini), para medir latência e tokens reais.
+
+Os prompts usados são templates mínimos com os mesmos campos dos reais; para medir
+com os prompts de produção, informe um JSON {nome: conteúdo} em `--prompts`.
+
+Uso (a partir da raiz do projeto, com o .env da aplicação configurado):
+    python -m benchmarks.bench_chamada_unica [--repeticoes 3] [--atraso-llm 2.0] [--linhas 5000]
+        [--prompts prompts.json] [--provedor-configurado] [--json resultado.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+# Banco e dados locais isolados, definidos antes de importar a aplicação
+_TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/bench_chamada_unica.db"
+os.environ["APP_DATA_DIR"] = os.path.join(_TMP_DIR, "data")
+
+from app.agents.media_agent import MediaAgent
+from app.agents.orchestrator import Orchestrator
+from app.core.connectors.base_connector import BaseConnector, filter_date_windows
+from app.core.llm_providers import StubProvider
+from app.core.llm_service import LLMService, get_llm_service
+from app.db.database import SessionLocal, PromptDB
+from app.utils.file_utils import REPORTS_BASE_DIR, get_safe_name
+from app.utils.timing import stats
+from benchmarks.dados_sinteticos import gerar_planilha
+
+MES_ANALISE = "2025-05-01"
+NOME_CLIENTE = "Bench Chamada Unica"
+METRICAS = ['Spend', 'Revenue', 'Sessions', 'Conversions', 'ROI', 'CPS', 'TKM', 'Conversion_Rate']
+
+# Templates mínimos com os mesmos campos dos prompts reais
+PROMPTS = {
+    "media_analysis": "Analise {plataforma} ({dados_markdown_summary_month_name}).\n{cliente_contexto}\n{metrics_to_analyze_list_markdown}\n{dados_markdown}",
+    "consolidated_report": "Consolide {client_name} ({mes_analise}).\n{kpis_consolidated_markdown}\n{comparatives_consolidates_markdown}\n{all_platforms_reports}",
+    "consolidated_single_call": (
+        "Analise cada plataforma e consolide {client_name} ({mes_analise}).\n{cliente_contexto}\n{metrics_to_analyze_list_markdown}\n"
+        "{platforms_data_markdown}\n{kpis_consolidated_markdown}\n{comparatives_consolidates_markdown}"
+    ),
+}
+
+TOKENS = ("prompt", "completion", "total")
+
+class ConectorSintetico(BaseConnector):
+    """Conector que serve abas sintéticas em memória."""
+    def __init__(self, linhas: int):
+        self.abas = {
+            'google_ads': gerar_planilha(linhas, seed=1),
+            'meta_ads': gerar_planilha(linhas, seed=2),
+        }
+
+    def get_data(self, data_source, client_config, mes_analise, date_windows=None):
+        return filter_date_windows(self.abas[data_source].copy(), date_windows)
+
+def preparar_banco(prompts: dict):
+    db = SessionLocal()
+    try:
+        for i, (nome, conteudo) in enumerate(prompts.items()):
+            db.add(PromptDB(id=f"bench_{i}", nome=nome, conteudo=conteudo))
+        db.commit()
+    finally:
+        db.close()
+
+def criar_orchestrator(args) -> Orchestrator:
+    if args.provedor_configurado:
+        llm_service = get_llm_service()
+    else:
+        llm_service = LLMService(StubProvider(latency_seconds=args.atraso_llm))
+    orchestrator = Orchestrator(llm_service)
+    media_agent = MediaAgent(llm_service, data_connector=ConectorSintetico(args.linhas))
+    orchestrator.media_agent = media_agent
+    orchestrator.file_media_agent = media_agent
+    return orchestrator
+
+def contadores_llm() -> dict:
+    contadores = {tipo: stats.get_counter("app_llm_tokens_total", type=tipo) for tipo in TOKENS}
+    contadores["chamadas"] = stats.get_counter("app_llm_requests_total", result="ok") + stats.get_counter("app_llm_requests_total", result="erro")
+    return contadores
+
+def medir_modo(orchestrator: Orchestrator, chamada_unica: bool, repeticoes: int) -> dict:
+    """Executa a análise `repeticoes` vezes no modo informado; retorna as médias por análise."""
+    cliente_config = {"id": "bench", "nome_exibicao": NOME_CLIENTE, "contexto_cliente_prompt": "Cliente de benchmark."}
+    duracoes = []
+    antes = contadores_llm()
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = orchestrator.executar_fluxo_analise_cliente(
+            cliente_config, MES_ANALISE, METRICAS, usar_cache=False, chamada_unica=chamada_unica
+        )
+        duracoes.append(time.perf_counter() - inicio)
+        if "error" in resultado:
+            raise RuntimeError(f"A análise falhou: {resultado}")
+    depois = contadores_llm()
+    medias = {chave: (depois[chave] - antes[chave]) / repeticoes for chave in antes}
+    return {
+        "duracao_mediana_s": round(statistics.median(duracoes), 3),
+        "duracao_min_s": round(min(duracoes), 3),
+        "chamadas_llm": medias["chamadas"],
+        **{f"tokens_{tipo}": round(medias[tipo], 1) for tipo in TOKENS},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=3, help="Análises executadas em cada modo")
+    parser.add_argument('--atraso-llm', type=float, default=2.0, help="Atraso de cada chamada ao provedor stub (s)")
+    parser.add_argument('--linhas', type=int, default=5_000, help="Linhas de cada aba sintética")
+    parser.add_argument('--prompts', help="JSON {nome: conteúdo} com os prompts a usar (padrão: templates mínimos)")
+    parser.add_argument('--provedor-configurado', action='store_true', help="Usa o provedor de LLM das configurações em vez do stub")
+    parser.add_argument('--json', help="Grava o resultado em um arquivo JSON")
+    args = parser.parse_args()
+
+    prompts = dict(PROMPTS)
+    if args.prompts:
+        with open(args.prompts, 'r', encoding='utf-8') as f:
+            prompts.update(json.load(f))
+
+    try:
+        preparar_banco(prompts)
+        orchestrator = criar_orchestrator(args)
+        resultado = {
+            "tres_chamadas": medir_modo(orchestrator, False, args.repeticoes),
+            "chamada_unica": medir_modo(orchestrator, True, args.repeticoes),
+        }
+    finally:
+        shutil.rmtree(os.path.join(REPORTS_BASE_DIR, get_safe_name(NOME_CLIENTE)), ignore_errors=True)
+        shutil.rmtree(_TMP_DIR, ignore_errors=True)
+
+    provedor = "configurado" if args.provedor_configurado else f"stub, atraso de {args.atraso_llm}s por chamada"
+    print(f"\nMédias por análise ({args.repeticoes} repetições, provedor {provedor}):")
+    print(f"{'':<16}{'duração (s)':>12}{'chamadas':>10}{'tokens entrada':>16}{'tokens saída':>14}{'tokens total':>14}")
+    for modo, medidas in resultado.items():
+        print(f"{modo:<16}{medidas['duracao_mediana_s']:>12.3f}{medidas['chamadas_llm']:>10g}{medidas['tokens_prompt']:>16g}"
+              f"{medidas['tokens_completion']:>14g}{medidas['tokens_total']:>14g}")
+    tres, unica = resultado["tres_chamadas"], resultado["chamada_unica"]
+    print(f"\nChamada única: duração {unica['duracao_mediana_s'] / tres['duracao_mediana_s']:.2f}x, "
+          f"tokens de entrada {unica['tokens_prompt'] / tres['tokens_prompt']:.2f}x em relação às três chamadas.")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
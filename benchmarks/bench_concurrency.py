@@ -0,0 +1,115 @@
+"""
+Teste de concorrência da API: mede a latência de `GET /clients` enquanto
+análises estão em execução, em um único worker do uvicorn.
+
+São comparados dois cenários, ambos com um Orchestrator falso cuja análise
+bloqueia por `--duracao` segundos (simulando leituras de planilha e chamadas ao LLM):
+  - bloqueante: um endpoint `async def` que executa a análise diretamente no
+    event loop, como o `/analyze` fazia antes;
+  - atual: o `POST /analyze` da aplicação (job em segundo plano) com os
+    endpoints síncronos servidos pelo threadpool.
+
+Uso (a partir da raiz do projeto, com o .env da aplicação configurado):
+    python -m benchmarks.bench_concurrency [--analises 4] [--duracao 2] [--requisicoes 50]
+"""
+import argparse
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+import httpx
+import uvicorn
+
+# Banco isolado para o teste, definido antes de importar a aplicação
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_concurrency.db"
+
+import app.main as main_module
+
+class OrchestratorFalso:
+    """Orchestrator que apenas bloqueia a thread pelo tempo de uma análise."""
+    def __init__(self, duracao: float):
+        self.duracao = duracao
+
+    def executar_fluxo_analise_cliente(self, cliente_config, mes_analise_atual_str, metricas_selecionadas, usar_cache=True, progress_callback=None,
+                                      **opcoes):
+        # `opcoes` recebe os demais parâmetros do fluxo real (ex: stream_callback, chamada_unica)
+        time.sleep(self.duracao)
+        return {"file_path": "relatorio_falso.md", "errors": None}
+
+def porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def iniciar_servidor(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(main_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+def medir_clients(base_url: str, requisicoes: int) -> list:
+    """Faz requisições sequenciais a `GET /clients` e retorna as latências em ms."""
+    latencias = []
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        for _ in range(requisicoes):
+            inicio = time.perf_counter()
+            client.get("/clients").raise_for_status()
+            latencias.append((time.perf_counter() - inicio) * 1000)
+    return latencias
+
+def executar_cenario(base_url: str, rota_analise: str, analises: int, requisicoes: int) -> list:
+    """Dispara as análises em paralelo e mede `GET /clients` enquanto elas rodam."""
+    payload = {"client_id": "bench", "mes_analise": "2025-05-01"}
+    threads = [
+        threading.Thread(target=lambda: httpx.post(f"{base_url}{rota_analise}", json=payload, timeout=600))
+        for _ in range(analises)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2) # Garante que as análises já começaram
+    latencias = medir_clients(base_url, requisicoes)
+    for thread in threads:
+        thread.join()
+    return latencias
+
+def resumir(nome: str, latencias: list):
+    quantis = statistics.quantiles(latencias, n=100)
+    print(f"{nome:<32} p50={quantis[49]:9.1f} ms  p95={quantis[94]:9.1f} ms  max={max(latencias):9.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--analises', type=int, default=4, help="Análises simultâneas")
+    parser.add_argument('--duracao', type=float, default=2.0, help="Duração de cada análise (s)")
+    parser.add_argument('--requisicoes', type=int, default=50, help="Requisições a GET /clients por cenário")
+    args = parser.parse_args()
+
+    orchestrator = OrchestratorFalso(args.duracao)
+    main_module.get_app_orchestrator = lambda: orchestrator
+
+    @main_module.app.post("/_bench/analyze_bloqueante")
+    async def analyze_bloqueante(request: main_module.AnalysisRequest):
+        # Reproduz o comportamento antigo: trabalho bloqueante dentro de `async def`
+        return orchestrator.executar_fluxo_analise_cliente({}, request.mes_analise.strftime("%Y-%m-%d"), request.metricas_selecionadas)
+
+    port = porta_livre()
+    base_url = f"http://127.0.0.1:{port}"
+    server = iniciar_servidor(port)
+    try:
+        httpx.post(f"{base_url}/clients", json={
+            "id": "bench", "nome_exibicao": "Bench", "contexto_cliente_prompt": "", "planilha_id_ou_nome": "bench"
+        }).raise_for_status()
+
+        print(f"Análises simultâneas: {args.analises} x {args.duracao:.1f}s | Requisições a GET /clients: {args.requisicoes}")
+        resumir("ocioso", medir_clients(base_url, args.requisicoes))
+        resumir("análises no event loop (antigo)", executar_cenario(base_url, "/_bench/analyze_bloqueante", args.analises, args.requisicoes))
+        resumir("análises em jobs (atual)", executar_cenario(base_url, "/analyze", args.analises, args.requisicoes))
+    finally:
+        main_module.app.state.job_queue.shutdown(wait=True)
+        server.should_exit = True
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark da limpeza numérica: `limpar_numero` célula a célula (caminho antigo
+do MediaAgent) contra a versão vetorizada `limpar_numeros`.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_data_cleaners [--rows 100000] [--repeat 3]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.utils.data_cleaners import limpar_numero, limpar_numeros
+
+def gerar_valores(rows: int, formato: str = 'br', seed: int = 42) -> pd.Series:
+    """
+    Gera valores no formato das planilhas, com vazios e textos inválidos.
+    `formato='br'` gera apenas moeda BR (caso comum); `formato='misto'` mistura
+    moeda BR, números US e números só com vírgula decimal na mesma coluna.
+    """
+    rng = random.Random(seed)
+    limite_br = 0.9 if formato == 'br' else 0.6
+    valores = []
+    for _ in range(rows):
+        sorteio = rng.random()
+        numero = rng.random() * rng.choice([1, 100, 10_000, 1_000_000])
+        if sorteio < limite_br:
+            texto = f"R$ {numero:,.2f}"
+            valores.append(texto.replace(',', 'X').replace('.', ',').replace('X', '.'))
+        elif sorteio < 0.8:
+            valores.append(f"{numero:,.2f}")
+        elif sorteio < 0.9:
+            valores.append(f"{numero:.2f}".replace('.', ','))
+        elif sorteio < 0.95:
+            valores.append('')
+        else:
+            valores.append(rng.choice(['-', 'n/a', None]))
+    return pd.Series(valores, dtype=object)
+
+def medir(func, repeat: int) -> float:
+    """Retorna o menor tempo (em segundos) entre as repetições."""
+    tempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Linhas: {args.rows:,}")
+    for formato in ('br', 'misto'):
+        serie = gerar_valores(args.rows, formato=formato)
+
+        esperado = serie.apply(limpar_numero).astype('float64')
+        obtido = limpar_numeros(serie)
+        iguais = (esperado == obtido) | (esperado.isna() & obtido.isna())
+        if not iguais.all():
+            raise SystemExit(f"Resultados divergentes em {int((~iguais).sum())} célula(s) (formato {formato}).")
+
+        tempo_por_celula = medir(lambda: serie.apply(limpar_numero), args.repeat)
+        tempo_vetorizado = medir(lambda: limpar_numeros(serie), args.repeat)
+
+        print(f"\nColuna {formato}:")
+        print(f"  limpar_numero (apply por célula): {tempo_por_celula * 1000:10.1f} ms")
+        print(f"  limpar_numeros (vetorizado):      {tempo_vetorizado * 1000:10.1f} ms")
+        print(f"  Ganho: {tempo_por_celula / tempo_vetorizado:.1f}x")
+
+if __name__ == "__main__":
+    main()
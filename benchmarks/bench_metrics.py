@@ -0,0 +1,73 @@
+"""
+Benchmark do cálculo de métricas por linha: o caminho antigo (`df.apply` linha a
+linha com as funções escalares) contra o `MediaAgent._calculate_metrics` vetorizado.
+
+Uso (a partir da raiz do projeto, com o .env da aplicação configurado):
+    python -m benchmarks.bench_metrics [--rows 50000] [--repeat 3]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.agents.media_agent import MediaAgent
+
+def gerar_dataframe(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Gera um DataFrame já limpo, com zeros nos denominadores em parte das linhas."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Date': pd.date_range('2020-01-01', periods=rows, freq='h'),
+        'Spend': rng.uniform(0, 5_000, rows).round(2),
+        'Revenue': rng.uniform(0, 20_000, rows).round(2),
+        'Sessions': rng.integers(0, 3_000, rows),
+        'Conversions': rng.integers(0, 50, rows),
+        'Clicks': rng.integers(0, 2_000, rows),
+        'Impressions': rng.integers(0, 100_000, rows),
+    })
+    for col in ['Spend', 'Sessions', 'Conversions', 'Clicks', 'Impressions']:
+        df.loc[rng.random(rows) < 0.05, col] = 0
+    return df
+
+def calcular_por_linha(agent: MediaAgent, df: pd.DataFrame, metricas: list) -> pd.DataFrame:
+    """Caminho antigo: uma chamada da função escalar por linha."""
+    for metrica_nome in metricas:
+        config = agent.METRICAS_DISPONIVEIS[metrica_nome]
+        df[metrica_nome] = df.apply(lambda row: config['func'](*(row[dep] for dep in config['deps'])), axis=1)
+    return df
+
+def medir(func, repeat: int) -> float:
+    """Retorna o menor tempo (em segundos) entre as repetições."""
+    tempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    agent = MediaAgent(llm_service=None, data_connector=None)
+    metricas = list(agent.METRICAS_DISPONIVEIS.keys())
+    df = gerar_dataframe(args.rows)
+
+    esperado = calcular_por_linha(agent, df.copy(), metricas)
+    obtido = agent._calculate_metrics(df.copy(), metricas)
+    for metrica in metricas:
+        if not np.array_equal(esperado[metrica].to_numpy(dtype='float64'), obtido[metrica].to_numpy(dtype='float64')):
+            raise SystemExit(f"Resultados divergentes na métrica '{metrica}'.")
+
+    tempo_por_linha = medir(lambda: calcular_por_linha(agent, df.copy(), metricas), args.repeat)
+    tempo_vetorizado = medir(lambda: agent._calculate_metrics(df.copy(), metricas), args.repeat)
+
+    print(f"Linhas: {args.rows:,} | Métricas: {', '.join(metricas)}")
+    print(f"df.apply por linha: {tempo_por_linha * 1000:10.1f} ms")
+    print(f"vetorizado:         {tempo_vetorizado * 1000:10.1f} ms")
+    print(f"Ganho: {tempo_por_linha / tempo_vetorizado:.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Microbenchmarks das etapas do pipeline de dados do MediaAgent sobre planilhas
+sintéticas (ver `benchmarks.dados_sinteticos`):
+
+  - `_fetch_and_clean_data` (limpeza dos dados brutos, sem acesso à planilha)
+  - `_calculate_metrics`
+  - `_summarize_and_compare`
+  - `formatar_markdown_consolidado` (tabelas de KPIs e comparativos do prompt)
+  - `salvar_json_kpis`
+
+As duas últimas recebem o resumo do período, cujo tamanho não depende do número
+de linhas; são medidas em cada tamanho apenas para acompanhar regressões.
+
+Os resultados são gravados em JSON (por padrão em `benchmarks/resultados/`,
+com o commit atual no nome) e podem ser comparados com uma execução anterior:
+
+    python -m benchmarks.bench_pipeline [--tamanhos 1000,100000,1000000] [--repeat 3]
+    python -m benchmarks.bench_pipeline --comparar benchmarks/resultados/pipeline_<commit>.json [--tolerancia 0.1]
+
+Com `--comparar`, o script termina com código 1 se alguma etapa ficar mais lenta
+que a referência além da tolerância.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.agents.media_agent import MediaAgent
+from app.utils.data_formatters import formatar_markdown_consolidado
+from app.utils.save_json import salvar_json_kpis
+from benchmarks.dados_sinteticos import gerar_planilha
+
+MES_ANALISE = '2025-05-01'
+RESULTADOS_DIR = os.path.join(os.path.dirname(__file__), 'resultados')
+
+def commit_atual() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return 'desconhecido'
+
+def medir(func, repeat: int, preparar=None, iteracoes: int = 1) -> dict:
+    """
+    Executa `func` `repeat` vezes e retorna o menor tempo e a mediana (em ms por chamada).
+    `preparar`, se informado, gera o argumento de cada execução fora da medição.
+    Operações muito rápidas são repetidas `iteracoes` vezes dentro de cada medição.
+    """
+    tempos = []
+    for _ in range(repeat):
+        argumento = preparar() if preparar else None
+        inicio = time.perf_counter()
+        for _ in range(iteracoes):
+            func(argumento) if preparar else func()
+        tempos.append((time.perf_counter() - inicio) / iteracoes * 1000)
+    return {"min_ms": round(min(tempos), 4), "mediana_ms": round(statistics.median(tempos), 4)}
+
+def medir_tamanho(agent: MediaAgent, rows: int, repeat: int, pasta_saida: str) -> dict:
+    """Mede todas as etapas para uma planilha sintética de `rows` linhas."""
+    metricas = agent.normalize_metrics(list(agent.METRICAS_DISPONIVEIS) + ['Spend', 'Revenue', 'Clicks'])
+    bruto = gerar_planilha(rows)
+
+    resultados = {}
+    resultados['_fetch_and_clean_data'] = medir(
+        lambda df: agent._fetch_and_clean_data('google_ads', {}, MES_ANALISE, data=df),
+        repeat, preparar=bruto.copy
+    )
+    limpo = agent._fetch_and_clean_data('google_ads', {}, MES_ANALISE, data=bruto.copy())
+    del bruto
+
+    # Todas as métricas são calculadas (sem `colunas_utilizadas`), para medir o cálculo vetorizado
+    resultados['_calculate_metrics'] = medir(
+        lambda df: agent._calculate_metrics(df, metricas), repeat, preparar=limpo.copy
+    )
+    com_metricas = agent._calculate_metrics(limpo, metricas)
+
+    resultados['_summarize_and_compare'] = medir(
+        lambda: agent._summarize_and_compare(com_metricas, MES_ANALISE, metricas), repeat
+    )
+    analise = agent._summarize_and_compare(com_metricas, MES_ANALISE, metricas)
+
+    resultados['formatar_markdown_consolidado'] = medir(
+        lambda: (
+            formatar_markdown_consolidado(pd.DataFrame([analise['kpis']]), "KPIs do Período Atual"),
+            formatar_markdown_consolidado(pd.DataFrame([analise['comparatives']]), agent._comparatives_heading())
+        ),
+        repeat, iteracoes=50
+    )
+    resultados['salvar_json_kpis'] = medir(
+        lambda: salvar_json_kpis(
+            plataforma='Google Ads', mes_analise=MES_ANALISE, resumo_periodos=analise['resumo_periodos'],
+            comparativos=analise['comparatives'], pasta_saida=pasta_saida, sufixo_nome='Google Ads',
+            metricas_selecionadas=metricas
+        ),
+        repeat, iteracoes=50
+    )
+    return resultados
+
+def comparar(atual: dict, referencia: dict, tolerancia: float) -> bool:
+    """Imprime a variação de cada etapa em relação à referência; retorna True se houve regressão."""
+    regressao = False
+    print(f"\nComparação com {referencia.get('commit')} ({referencia.get('data')}), tolerância {tolerancia:.0%}:")
+    for tamanho, etapas in atual['resultados'].items():
+        for etapa, tempos in etapas.items():
+            base = referencia.get('resultados', {}).get(tamanho, {}).get(etapa)
+            if not base:
+                continue
+            razao = tempos['min_ms'] / base['min_ms'] if base['min_ms'] else float('inf')
+            marca = ''
+            if razao > 1 + tolerancia:
+                marca = '  <-- REGRESSÃO'
+                regressao = True
+            print(f"{int(tamanho):>10,} {etapa:<32} {base['min_ms']:12.3f} -> {tempos['min_ms']:12.3f} ms  ({razao:5.2f}x){marca}")
+    return regressao
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanhos', default='1000,100000,1000000', help="Números de linhas, separados por vírgula")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--saida', help="Arquivo JSON de resultados (padrão: benchmarks/resultados/pipeline_<commit>.json)")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para comparação")
+    parser.add_argument('--tolerancia', type=float, default=0.10, help="Piora máxima aceita na comparação (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    tamanhos = [int(t) for t in args.tamanhos.split(',')]
+    commit = commit_atual()
+    agent = MediaAgent(llm_service=None, data_connector=None)
+
+    resultado = {
+        "commit": commit,
+        "data": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "maquina": platform.platform(),
+        "repeat": args.repeat,
+        "resultados": {}
+    }
+    with tempfile.TemporaryDirectory() as pasta_saida:
+        for rows in tamanhos:
+            print(f"\nLinhas: {rows:,}")
+            etapas = medir_tamanho(agent, rows, args.repeat, pasta_saida)
+            resultado["resultados"][str(rows)] = etapas
+            for etapa, tempos in etapas.items():
+                print(f"  {etapa:<32} min={tempos['min_ms']:12.3f} ms  mediana={tempos['mediana_ms']:12.3f} ms")
+
+    saida = args.saida or os.path.join(RESULTADOS_DIR, f"pipeline_{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            referencia = json.load(f)
+        if comparar(resultado, referencia, args.tolerancia):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark de throughput do SQLite sob concorrência, com carga mista de leituras
+e escritas (listagem de clientes, consulta de jobs, atualização de clientes e
+criação de jobs), comparando o modo padrão com o modo ajustado (WAL, pragmas e
+pool configurados em `Settings`).
+
+Cada modo usa um banco novo em um diretório temporário.
+
+Uso (a partir da raiz do projeto, com o .env da aplicação configurado):
+    python -m benchmarks.bench_sqlite [--threads 8] [--duracao 5] [--escritas 0.2]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import (
+    Base, ClientDB, JobDB, create_db_engine, create_job, get_client, get_clients, get_job, update_client
+)
+
+CLIENTES = 200
+
+def preparar_banco(engine):
+    """Cria as tabelas e insere os clientes usados na carga."""
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    try:
+        for i in range(CLIENTES):
+            db.add(ClientDB(
+                id=f"cliente_{i:04d}",
+                nome_exibicao=f"Cliente {i}",
+                contexto_cliente_prompt="Contexto do cliente. " * 50,
+                planilha_id_ou_nome=f"Planilha {i}"
+            ))
+        db.commit()
+    finally:
+        db.close()
+    return Session
+
+def executar_operacao(Session, rng: random.Random, proporcao_escritas: float, job_ids: list):
+    """Executa uma operação da carga mista em uma sessão própria, como uma requisição."""
+    db = Session()
+    try:
+        client_id = f"cliente_{rng.randrange(CLIENTES):04d}"
+        if rng.random() < proporcao_escritas:
+            if rng.random() < 0.5:
+                update_client(db, client_id, {"contexto_cliente_prompt": f"Contexto atualizado {rng.random()}"})
+            else:
+                job = create_job(db, JobDB(id=uuid.uuid4().hex, client_id=client_id, mes_analise="2025-05-01", parametros="{}", status="pendente"))
+                job_ids.append(job.id)
+        else:
+            operacao = rng.random()
+            if operacao < 0.4:
+                get_clients(db, limit=50)
+            elif operacao < 0.8 or not job_ids:
+                get_client(db, client_id)
+            else:
+                get_job(db, rng.choice(job_ids))
+    finally:
+        db.close()
+
+def medir_modo(tuned: bool, threads: int, duracao: float, proporcao_escritas: float) -> dict:
+    """Roda a carga em `threads` threads por `duracao` segundos e retorna os totais."""
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_db_engine(f"sqlite:///{db_path}", tuned=tuned)
+    Session = preparar_banco(engine)
+
+    totais = {"ops": 0, "erros": 0}
+    lock = threading.Lock()
+    job_ids = []
+    fim = time.perf_counter() + duracao
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        ops = erros = 0
+        while time.perf_counter() < fim:
+            try:
+                executar_operacao(Session, rng, proporcao_escritas, job_ids)
+                ops += 1
+            except OperationalError:
+                # "database is locked": a escrita não conseguiu o lock a tempo
+                erros += 1
+        with lock:
+            totais["ops"] += ops
+            totais["erros"] += erros
+
+    inicio = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    decorrido = time.perf_counter() - inicio
+    engine.dispose()
+
+    return {"ops_s": totais["ops"] / decorrido, "erros": totais["erros"]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duracao', type=float, default=5.0, help="Segundos de carga por modo")
+    parser.add_argument('--escritas', type=float, default=0.2, help="Proporção de operações de escrita")
+    args = parser.parse_args()
+
+    print(f"Threads: {args.threads} | Duração: {args.duracao:.0f}s por modo | Escritas: {args.escritas:.0%}")
+    resultados = {}
+    for nome, tuned in (("padrão", False), ("ajustado (WAL)", True)):
+        resultados[nome] = medir_modo(tuned, args.threads, args.duracao, args.escritas)
+        print(f"{nome:<16} {resultados[nome]['ops_s']:10.0f} ops/s  erros de lock: {resultados[nome]['erros']}")
+    print(f"Ganho: {resultados['ajustado (WAL)']['ops_s'] / resultados['padrão']['ops_s']:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Gerador de planilhas sintéticas no layout real das abas de mídia (cabeçalhos em
+português de `MediaAgent.COLUMN_MAPPING`), como retornadas por
+`worksheet.get_all_records()`: datas dd/mm/aaaa, moeda BR em texto
+("R$ 1.234,56"), números já convertidos pelo gspread e células vazias.
+
+Uso como script (grava um CSV para inspeção):
+    python -m benchmarks.dados_sinteticos [--rows 1000] [--saida planilha.csv]
+"""
+import argparse
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Mesmos cabeçalhos de `MediaAgent.COLUMN_MAPPING` (na ordem da planilha)
+CABECALHOS = [
+    'Data', 'Investimento', 'Receita', 'Sessões', 'Conversões', 'Cliques', 'Impressões',
+    'ROI (Return Over Investiment)', 'CPS (Custo por Sessão)', 'TKM (Ticket Médio)', 'Taxa de Conversão',
+]
+
+def formatar_moeda_br(valores: np.ndarray) -> list:
+    """Formata valores como moeda BR: R$ 1.234,56."""
+    return [f"R$ {v:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.') for v in valores]
+
+def _misturar(numeros: np.ndarray, textos: list, rng: np.random.Generator, proporcao_texto: float, proporcao_vazios: float) -> np.ndarray:
+    """
+    Monta uma coluna de tipo misto: parte das células como número (como o gspread
+    converte), parte como texto formatado e parte vazia ('').
+    """
+    coluna = numeros.astype(object)
+    sorteio = rng.random(len(numeros))
+    usar_texto = sorteio < proporcao_texto
+    coluna[usar_texto] = np.asarray(textos, dtype=object)[usar_texto]
+    coluna[sorteio > 1 - proporcao_vazios] = ''
+    return coluna
+
+def gerar_planilha(rows: int, fim: date = date(2025, 5, 31), linhas_por_dia: int = None, proporcao_vazios: float = 0.02,
+                   seed: int = 42) -> pd.DataFrame:
+    """
+    Gera uma aba sintética com `rows` linhas, ordenada por data e terminando em `fim`.
+
+    Cada dia tem `linhas_por_dia` linhas (ex: uma por campanha); por padrão o valor
+    é escolhido para cobrir cerca de 3 anos, o que garante dados para as janelas
+    de comparação (MoM, YoY etc.) em qualquer tamanho.
+    """
+    rng = np.random.default_rng(seed)
+    if linhas_por_dia is None:
+        linhas_por_dia = max(1, rows // (3 * 365))
+
+    dias = pd.date_range(end=pd.Timestamp(fim), periods=-(-rows // linhas_por_dia), freq='D')
+    datas = np.repeat(dias.strftime('%d/%m/%Y').to_numpy(dtype=object), linhas_por_dia)[-rows:]
+
+    investimento = rng.gamma(2.0, 400.0, rows).round(2)
+    receita = (investimento * rng.uniform(0.5, 8.0, rows)).round(2)
+    impressoes = rng.integers(1_000, 200_000, rows)
+    cliques = (impressoes * rng.uniform(0.005, 0.05, rows)).astype(np.int64)
+    sessoes = (cliques * rng.uniform(0.6, 1.0, rows)).astype(np.int64)
+    conversoes = (sessoes * rng.uniform(0.0, 0.05, rows)).astype(np.int64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.where(investimento > 0, (receita - investimento) / investimento, 0).round(4)
+        cps = np.where(sessoes > 0, investimento / sessoes, 0).round(2)
+        tkm = np.where(conversoes > 0, receita / conversoes, 0).round(2)
+        taxa = np.where(sessoes > 0, conversoes / sessoes, 0).round(4)
+
+    def percentual(valores):
+        return [f"{v * 100:.2f}%".replace('.', ',') for v in valores]
+
+    def inteiro_texto(valores):
+        return [str(v) for v in valores]
+
+    # Moeda e percentuais costumam vir como texto; inteiros às vezes vêm como texto
+    # (colunas formatadas como texto simples na planilha)
+    df = pd.DataFrame({
+        'Data': datas,
+        'Investimento': _misturar(investimento, formatar_moeda_br(investimento), rng, 0.9, proporcao_vazios),
+        'Receita': _misturar(receita, formatar_moeda_br(receita), rng, 0.9, proporcao_vazios),
+        'Sessões': _misturar(sessoes, inteiro_texto(sessoes), rng, 0.1, proporcao_vazios),
+        'Conversões': _misturar(conversoes, inteiro_texto(conversoes), rng, 0.0, proporcao_vazios),
+        'Cliques': _misturar(cliques, inteiro_texto(cliques), rng, 0.1, proporcao_vazios),
+        'Impressões': _misturar(impressoes, inteiro_texto(impressoes), rng, 0.3, proporcao_vazios),
+        'ROI (Return Over Investiment)': _misturar(roi, percentual(roi), rng, 0.5, proporcao_vazios),
+        'CPS (Custo por Sessão)': _misturar(cps, formatar_moeda_br(cps), rng, 0.9, proporcao_vazios),
+        'TKM (Ticket Médio)': _misturar(tkm, formatar_moeda_br(tkm), rng, 0.9, proporcao_vazios),
+        'Taxa de Conversão': _misturar(taxa, percentual(taxa), rng, 0.5, proporcao_vazios),
+    }, columns=CABECALHOS)
+
+    # Algumas linhas com a data em branco (linhas de total ou incompletas)
+    df.loc[rng.random(rows) < proporcao_vazios / 4, 'Data'] = ''
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--saida', default='planilha_sintetica.csv')
+    args = parser.parse_args()
+
+    gerar_planilha(args.rows, seed=args.seed).to_csv(args.saida, index=False)
+    print(f"{args.rows:,} linhas gravadas em {args.saida}")
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,13 @@ import * as Types from '../types';
 import api from '../services/api';
 import { toast } from 'react-toastify';
 
+// Títulos das seções transmitidas pelo endpoint de streaming
+const STREAM_SECTION_TITLES: Record<string, string> = {
+  google_ads: 'Google Ads',
+  meta_ads: 'Meta Ads',
+  consolidacao: 'Relatório Consolidado',
+};
+
 interface AnalysisModalProps {
   show: boolean;
   handleClose: () => void;
@@ -25,6 +32,7 @@ const AnalysisModal: React.FC<AnalysisModalProps> = ({ show, handleClose, client
   ]);
   const [loading, setLoading] = useState<boolean>(false);
   const [availableMetrics, setAvailableMetrics] = useState<Types.SelectOption[]>([]);
+  const [streamedText, setStreamedText] = useState<Record<string, string>>({});
 
   useEffect(() => {
     const fetchMetrics = async () => {
@@ -46,6 +54,29 @@ const AnalysisModal: React.FC<AnalysisModalProps> = ({ show, handleClose, client
     }
   }, [show]);
 
+  // A análise roda em segundo plano: o job é criado com `POST /analyze` e o backend
+  // transmite o texto de cada seção via Server-Sent Events à medida que o LLM o gera,
+  // até o evento 'fim'.
+  const streamAnalysis = async (requestData: Types.AnalysisRequest): Promise<Types.AnalysisStreamResult> => {
+    const { data: job } = await api.post<Types.AnalysisEnqueued>('/analyze', { ...requestData, streaming: true });
+
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(`${api.defaults.baseURL}${job.stream_url}`);
+      source.addEventListener('trecho', (event) => {
+        const { secao, texto } = JSON.parse((event as MessageEvent).data);
+        setStreamedText(prev => ({ ...prev, [secao]: (prev[secao] || '') + texto }));
+      });
+      source.addEventListener('fim', (event) => {
+        source.close();
+        resolve(JSON.parse((event as MessageEvent).data));
+      });
+      source.onerror = () => {
+        source.close();
+        reject(new Error('Conexão com o servidor interrompida durante a análise.'));
+      };
+    });
+  };
+
   const handleSubmit = async () => {
     if (!client || !mesAnalise) {
       toast.error('Por favor, selecione o mês de análise.');
@@ -53,6 +84,7 @@ const AnalysisModal: React.FC<AnalysisModalProps> = ({ show, handleClose, client
     }
 
     setLoading(true);
+    setStreamedText({});
     onAnalysisStart(); // Notifica o início da análise
     toast.info('Análise em andamento...', { toastId: 'analysis-progress', autoClose: false, closeButton: false });
 
@@ -63,7 +95,13 @@ const AnalysisModal: React.FC<AnalysisModalProps> = ({ show, handleClose, client
     };
 
     try {
-      await api.post('/analyze', requestData);
+      const job = await streamAnalysis(requestData);
+      if (job.status === 'erro') {
+        const details = job.erro?.details?.length ? `: ${job.erro.details.join('; ')}` : '';
+        toast.update('analysis-progress', { render: `Erro na análise: ${job.erro?.message}${details}`, type: 'error', autoClose: 8000 });
+        onAnalysisError();
+        return;
+      }
       console.log('Análise concluída no backend, chamando onAnalysisComplete.');
       onAnalysisComplete(client.id, mesAnalise); // Chama o callback de sucesso
     } catch (error: any) {
@@ -140,6 +178,19 @@ const AnalysisModal: React.FC<AnalysisModalProps> = ({ show, handleClose, client
             />
           </Form.Group>
         </Form>
+
+        {Object.keys(streamedText).length > 0 && (
+          <div className="mt-3">
+            {Object.entries(streamedText).map(([secao, texto]) => (
+              <div key={secao} className="mb-3">
+                <h6 className="text-white">{STREAM_SECTION_TITLES[secao] || secao}</h6>
+                <div className="bg-dark text-white p-2 rounded" style={{ whiteSpace: 'pre-wrap', maxHeight: '200px', overflowY: 'auto' }}>
+                  {texto}
+                </div>
+              </div>
+            ))}
+          </div>
+        )}
       </Modal.Body>
       <Modal.Footer className="bg-dark">
         <Button variant="secondary" onClick={handleClose} disabled={loading}>
@@ -5,14 +5,47 @@ export interface Client {
   planilha_id_ou_nome: string;
   google_sheet_tab_name?: string;
   meta_sheet_tab_name?: string;
+  google_ads_file_path?: string;
+  meta_ads_file_path?: string;
+  chamada_unica_llm?: boolean; // Análises e consolidado em uma única chamada ao LLM
 }
 
 export interface AnalysisRequest {
   client_id: string;
   mes_analise: string; // Formato YYYY-MM-DD
   metricas_selecionadas: string[];
+  usar_cache?: boolean; // false ignora o cache de respostas do LLM
+  chamada_unica?: boolean; // Uma única chamada ao LLM; omitido usa a configuração do cliente
+  streaming?: boolean; // Transmite o texto gerado em GET /analyze/{job_id}/stream
 }
 
+// Resposta de POST /analyze
+export interface AnalysisEnqueued {
+  message: string;
+  job_id: string;
+  status: JobStatusValue;
+  status_url: string;
+  stream_url?: string;
+}
+
+export type JobStatusValue = 'pendente' | 'executando' | 'concluido' | 'erro';
+
+export interface AnalysisJob {
+  id: string;
+  client_id: string;
+  mes_analise: string;
+  status: JobStatusValue;
+  etapas: Record<string, JobStatusValue>;
+  report_path?: string;
+  warnings?: string[];
+  erro?: { message: string; details: string[] };
+  created_at?: string;
+  updated_at?: string;
+}
+
+// Evento 'fim' do streaming da análise (GET /analyze/{job_id}/stream)
+export type AnalysisStreamResult = Pick<AnalysisJob, 'status' | 'report_path' | 'warnings' | 'erro'>;
+
 export interface Report {
   client_name: string;
   report_date: string;
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Banco, dados e credenciais isolados, definidos antes de importar a aplicação
+_TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/tests.db"
+os.environ["APP_DATA_DIR"] = os.path.join(_TMP_DIR, "data")
+os.environ.setdefault("GOOGLE_CREDS_PATH", os.path.join(_TMP_DIR, "credenciais.json"))
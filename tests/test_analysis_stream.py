@@ -0,0 +1,151 @@
+"""
+Streaming da análise via Server-Sent Events: o job é criado em `POST /analyze` e
+acompanhado em `GET /analyze/{job_id}/stream`, que apenas se inscreve nos eventos.
+"""
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+import uvicorn
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.core.job_queue import JOB_CONCLUIDO
+from app.db.database import SessionLocal, JobDB
+
+# Mais conexões simultâneas que as threads do pool do servidor (40 por padrão)
+CONEXOES_SIMULTANEAS = 50
+LATENCIA_MAXIMA_CLIENTS = 0.5
+
+class OrchestratorStreaming:
+    """Orchestrator que transmite um trecho por seção após a liberação do teste."""
+    def __init__(self):
+        self.liberar = threading.Event()
+        self.liberar.set()
+
+    def executar_fluxo_analise_cliente(self, cliente_config, mes_analise_atual_str, metricas_selecionadas, usar_cache=True,
+                                       progress_callback=None, stream_callback=None, chamada_unica=None):
+        self.liberar.wait(30)
+        for secao in ("google_ads", "meta_ads", "consolidacao"):
+            if stream_callback:
+                stream_callback(secao, f"texto de {secao}")
+        return {"file_path": "relatorio_falso.md", "errors": None}
+
+@pytest.fixture
+def orchestrator():
+    return OrchestratorStreaming()
+
+@pytest.fixture
+def client(monkeypatch, orchestrator):
+    monkeypatch.setattr(main_module, "get_app_orchestrator", lambda: orchestrator)
+    with TestClient(main_module.app) as test_client:
+        test_client.post("/clients", json={
+            "id": "streaming", "nome_exibicao": "Streaming", "contexto_cliente_prompt": "", "planilha_id_ou_nome": "teste"
+        })
+        yield test_client
+
+@pytest.fixture
+def base_url(monkeypatch, orchestrator):
+    """Servidor uvicorn real: o TestClient só entrega a resposta após o fim do streaming."""
+    monkeypatch.setattr(main_module, "get_app_orchestrator", lambda: orchestrator)
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(main_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    url = f"http://127.0.0.1:{port}"
+    httpx.post(f"{url}/clients", json={
+        "id": "streaming", "nome_exibicao": "Streaming", "contexto_cliente_prompt": "", "planilha_id_ou_nome": "teste"
+    })
+    yield url
+    server.should_exit = True
+    thread.join(10)
+
+def _enfileirar(client) -> dict:
+    response = client.post("/analyze", json={"client_id": "streaming", "mes_analise": "2025-05-01", "streaming": True})
+    assert response.status_code == 202
+    return response.json()
+
+def _ler_eventos(client, stream_url: str, ao_conectar=None) -> list:
+    eventos = []
+    with client.stream("GET", stream_url) as response:
+        assert response.status_code == 200
+        evento = None
+        for linha in response.iter_lines():
+            if linha.startswith("event: "):
+                evento = linha[len("event: "):]
+            elif linha.startswith("data: "):
+                eventos.append((evento, json.loads(linha[len("data: "):])))
+                if evento == "job" and ao_conectar:
+                    ao_conectar()
+    return eventos
+
+def test_stream_transmite_trechos_e_fim(client):
+    job = _enfileirar(client)
+    assert job["stream_url"] == f"/analyze/{job['job_id']}/stream"
+
+    eventos = _ler_eventos(client, job["stream_url"])
+
+    assert eventos[0] == ("job", {"job_id": job["job_id"], "status_url": f"/jobs/{job['job_id']}"})
+    trechos = {dados["secao"]: dados["texto"] for evento, dados in eventos if evento == "trecho"}
+    assert trechos == {secao: f"texto de {secao}" for secao in ("google_ads", "meta_ads", "consolidacao")}
+    assert eventos[-1][0] == "fim"
+    assert eventos[-1][1]["status"] == JOB_CONCLUIDO
+
+def test_stream_de_job_finalizado_retorna_fim_do_banco(client):
+    job = _enfileirar(client)
+    fila = main_module.app.state.job_queue
+    prazo = time.perf_counter() + 10
+    # Finalizado no banco e já sem os eventos em memória (o streaming foi descartado)
+    while (client.get(job["status_url"]).json()["status"] != JOB_CONCLUIDO or job["job_id"] in fila._streams) \
+            and time.perf_counter() < prazo:
+        time.sleep(0.05)
+
+    eventos = _ler_eventos(client, job["stream_url"])
+
+    assert [evento for evento, _ in eventos] == ["job", "fim"]
+    assert eventos[-1][1]["report_path"] == "relatorio_falso.md"
+
+def test_stream_nao_cria_jobs(client):
+    db = SessionLocal()
+    try:
+        antes = db.query(JobDB).count()
+    finally:
+        db.close()
+
+    assert client.get("/analyze/inexistente/stream").status_code == 404
+
+    db = SessionLocal()
+    try:
+        assert db.query(JobDB).count() == antes
+    finally:
+        db.close()
+
+def test_conexoes_de_streaming_nao_ocupam_o_pool_de_threads(base_url, orchestrator):
+    orchestrator.liberar.clear()
+    with httpx.Client(base_url=base_url, timeout=30, limits=httpx.Limits(max_connections=None)) as client:
+        job = _enfileirar(client)
+        conectadas = threading.Semaphore(0)
+
+        with ThreadPoolExecutor(max_workers=CONEXOES_SIMULTANEAS) as executor:
+            futuros = [executor.submit(_ler_eventos, client, job["stream_url"], conectadas.release) for _ in range(CONEXOES_SIMULTANEAS)]
+            try:
+                for _ in range(CONEXOES_SIMULTANEAS):
+                    assert conectadas.acquire(timeout=10)
+
+                # Com todas as conexões abertas e aguardando, os demais endpoints seguem respondendo
+                inicio = time.perf_counter()
+                client.get("/clients").raise_for_status()
+                assert time.perf_counter() - inicio < LATENCIA_MAXIMA_CLIENTS
+            finally:
+                orchestrator.liberar.set()
+
+            for futuro in futuros:
+                assert futuro.result(timeout=10)[-1][0] == "fim"
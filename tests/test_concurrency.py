@@ -0,0 +1,67 @@
+"""
+Concorrência da API: análises em execução não podem bloquear os demais endpoints.
+
+As análises usam um Orchestrator falso que bloqueia a thread (simulando leituras
+de planilha e chamadas ao LLM); enquanto elas rodam, `GET /clients` deve
+continuar respondendo rapidamente.
+"""
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.config.settings import settings
+from app.core.job_queue import JOB_CONCLUIDO, JOB_EXECUTANDO
+
+DURACAO_ANALISE = 1.5
+LATENCIA_MAXIMA_CLIENTS = 0.5
+
+class OrchestratorLento:
+    """Orchestrator que apenas bloqueia a thread pelo tempo de uma análise."""
+    def executar_fluxo_analise_cliente(self, cliente_config, mes_analise_atual_str, metricas_selecionadas, usar_cache=True,
+                                       progress_callback=None, stream_callback=None, chamada_unica=None):
+        time.sleep(DURACAO_ANALISE)
+        return {"file_path": "relatorio_falso.md", "errors": None}
+
+@pytest.fixture
+def client(monkeypatch):
+    orchestrator = OrchestratorLento()
+    # A fila de jobs é criada na inicialização com o provedor de Orchestrator do módulo
+    monkeypatch.setattr(main_module, "get_app_orchestrator", lambda: orchestrator)
+    with TestClient(main_module.app) as test_client:
+        yield test_client
+
+def test_get_clients_nao_bloqueia_durante_analises(client):
+    client.post("/clients", json={
+        "id": "concorrencia", "nome_exibicao": "Concorrência", "contexto_cliente_prompt": "", "planilha_id_ou_nome": "teste"
+    }).raise_for_status()
+
+    job_ids = []
+    for _ in range(settings.ANALYSIS_MAX_WORKERS):
+        inicio = time.perf_counter()
+        response = client.post("/analyze", json={"client_id": "concorrencia", "mes_analise": "2025-05-01"})
+        # O enfileiramento não espera pela análise
+        assert response.status_code == 202
+        assert time.perf_counter() - inicio < DURACAO_ANALISE
+        job_ids.append(response.json()["job_id"])
+
+    # Mede enquanto a última análise enfileirada certamente ainda está em execução
+    latencias = []
+    while time.perf_counter() - inicio < DURACAO_ANALISE / 2:
+        t0 = time.perf_counter()
+        client.get("/clients").raise_for_status()
+        latencias.append(time.perf_counter() - t0)
+
+    # As medições ocorreram com as análises ainda em execução
+    assert all(client.get(f"/jobs/{job_id}").json()["status"] == JOB_EXECUTANDO for job_id in job_ids)
+    assert latencias and max(latencias) < LATENCIA_MAXIMA_CLIENTS
+
+    prazo = time.perf_counter() + 10 * DURACAO_ANALISE
+    status = {}
+    while time.perf_counter() < prazo:
+        status = {job_id: client.get(f"/jobs/{job_id}").json()["status"] for job_id in job_ids}
+        if all(s == JOB_CONCLUIDO for s in status.values()):
+            break
+        time.sleep(0.1)
+    assert all(s == JOB_CONCLUIDO for s in status.values()), status
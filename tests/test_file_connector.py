@@ -0,0 +1,38 @@
+"""Leitura de arquivos de dados pelo conector do Orchestrator."""
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from app.agents.orchestrator import Orchestrator
+from app.core.llm_providers import StubProvider
+from app.core.llm_service import LLMService
+
+JANELAS = [(datetime(2025, 5, 1), datetime(2025, 5, 31))]
+
+@pytest.fixture
+def file_media_agent():
+    return Orchestrator(LLMService(StubProvider())).file_media_agent
+
+@pytest.mark.parametrize("extensao", [".csv", ".parquet"])
+@pytest.mark.parametrize("cabecalhos", [
+    ['Date', 'Spend', 'Revenue', 'Sessions'],
+    ['Data', 'Investimento', 'Receita', 'Sessões'],
+])
+def test_arquivo_com_cabecalhos_canonicos_ou_da_planilha(tmp_path, file_media_agent, extensao, cabecalhos):
+    df = pd.DataFrame(
+        [['30/04/2025', 10, 20, 3], ['01/05/2025', 11, 22, 4], ['31/05/2025', 12, 24, 5]],
+        columns=cabecalhos
+    ).assign(Observacao='ignorada')
+    caminho = tmp_path / f"google_ads{extensao}"
+    if extensao == ".csv":
+        df.to_csv(caminho, index=False)
+    else:
+        df.to_parquet(caminho, index=False)
+
+    lido = file_media_agent.data_connector.get_data(
+        'google_ads', {'google_ads_file_path': str(caminho)}, '2025-05-01', JANELAS
+    )
+
+    assert list(lido.columns) == cabecalhos
+    assert lido[cabecalhos[1]].tolist() == [11, 12]
@@ -0,0 +1,129 @@
+"""Chamadas remotas do GoogleSheetsConnector, com um cliente gspread simulado."""
+from collections import Counter
+from datetime import datetime
+
+import pytest
+from gspread.utils import a1_range_to_grid_range
+
+from app.core.connectors.google_sheets_connector import GoogleSheetsConnector
+from app.core.connectors.sheet_cache import SheetCache
+
+CHAVE = "chave-planilha"
+JANELAS = [(datetime(2025, 5, 1), datetime(2025, 5, 31))]
+
+def _aba(linhas: int):
+    valores = [['Data', 'Campanha', 'Spend']]
+    for i in range(linhas):
+        valores.append([f"{(i % 28) + 1:02d}/{(i // 28) % 12 + 1:02d}/2025", f"c{i % 3}", str(i)])
+    return valores
+
+class PlanilhaSimulada:
+    def __init__(self, chamadas: Counter, abas: dict):
+        self.id = CHAVE
+        self.title = "Planilha"
+        self.chamadas = chamadas
+        self.abas = abas
+
+    def values_batch_get(self, ranges):
+        self.chamadas['values_batch_get'] += 1
+        resposta = []
+        for intervalo in ranges:
+            aba, _, a1 = intervalo.partition('!')
+            valores = self.abas[aba.strip("'")]
+            grade = a1_range_to_grid_range(a1) if a1 else {}
+            linhas = valores[grade.get('startRowIndex', 0):grade.get('endRowIndex', len(valores))]
+            colunas = slice(grade.get('startColumnIndex', 0), grade.get('endColumnIndex'))
+            resposta.append({'range': intervalo, 'values': [linha[colunas] for linha in linhas]})
+        return {'valueRanges': resposta}
+
+class ClienteSimulado:
+    def __init__(self, abas: dict):
+        self.chamadas = Counter()
+        self.versao = "2025-06-01T00:00:00.000Z"
+        self.planilha = PlanilhaSimulada(self.chamadas, abas)
+        self.http_client = self
+
+    def values_batch_get(self, chave, ranges, params=None):
+        return self.planilha.values_batch_get(ranges)
+
+    def get_file_drive_metadata(self, chave):
+        self.chamadas['drive_metadata'] += 1
+        return {'id': chave, 'modifiedTime': self.versao}
+
+    def open_by_key(self, chave):
+        self.chamadas['open_by_key'] += 1
+        return self.planilha
+
+@pytest.fixture
+def conector(tmp_path):
+    conector = GoogleSheetsConnector()
+    conector._client = ClienteSimulado({'Google': _aba(400), 'Meta': _aba(300)})
+    conector.cache = SheetCache(str(tmp_path))
+    conector.sync_store = None
+    return conector
+
+def _config():
+    return {'planilha_id_ou_nome': 'Planilha', 'planilha_key': CHAVE, 'google_sheet_tab_name': 'Google', 'meta_sheet_tab_name': 'Meta'}
+
+def test_leitura_em_cache_consulta_apenas_a_versao(conector):
+    chamadas = conector.client.chamadas
+    primeira = conector.get_many(['google_ads', 'meta_ads'], _config(), '2025-05-01', JANELAS)
+    chamadas.clear()
+
+    segunda = conector.get_many(['google_ads', 'meta_ads'], _config(), '2025-05-01', JANELAS)
+
+    assert chamadas == Counter({'drive_metadata': 1})
+    assert len(segunda['google_ads']) == len(primeira['google_ads']) > 0
+
+def test_nova_versao_abre_a_planilha_novamente(conector):
+    chamadas = conector.client.chamadas
+    conector.get_data('google_ads', _config(), '2025-05-01', JANELAS)
+    conector.client.versao = "2025-06-02T00:00:00.000Z"
+    chamadas.clear()
+
+    df = conector.get_data('google_ads', _config(), '2025-05-01', JANELAS)
+
+    # Layout estendido (cabeçalho + datas novas) e dados, sem abrir a planilha
+    assert chamadas == Counter({'drive_metadata': 1, 'values_batch_get': 2})
+    assert (df['Data'].str.endswith('/05/2025')).all()
+
+def test_novas_janelas_na_mesma_versao_leem_apenas_os_dados(conector):
+    chamadas = conector.client.chamadas
+    conector.get_many(['google_ads', 'meta_ads'], _config(), '2025-05-01', JANELAS)
+    assert chamadas['values_batch_get'] == 3
+    chamadas.clear()
+
+    resultado = conector.get_many(['google_ads', 'meta_ads'], _config(), '2025-04-01', [(datetime(2025, 4, 1), datetime(2025, 4, 30))])
+
+    assert chamadas == Counter({'drive_metadata': 1, 'values_batch_get': 1})
+    assert (resultado['google_ads']['Data'].str.endswith('/04/2025')).all()
+    assert list(resultado['meta_ads'].columns) == ['Data', 'Campanha', 'Spend']
+
+def test_linhas_novas_estendem_o_layout(conector):
+    chamadas = conector.client.chamadas
+    abas = conector.client.planilha.abas
+    conector.get_data('google_ads', _config(), '2025-05-01', JANELAS)
+    abas['Google'].extend([['30/05/2025', 'nova', '9999'], ['31/05/2025', 'nova', '10000']])
+    conector.client.versao = "2025-06-02T00:00:00.000Z"
+    chamadas.clear()
+
+    df = conector.get_data('google_ads', _config(), '2025-05-01', JANELAS)
+
+    assert chamadas == Counter({'drive_metadata': 1, 'values_batch_get': 2})
+    assert df['Spend'].tolist()[-2:] == [9999, 10000]
+    layout = conector.cache.get_layout(CHAVE, 'Google')
+    assert len(layout['dates']) == len(abas['Google']) - 1
+
+def test_aba_reescrita_reconstroi_o_layout(conector):
+    chamadas = conector.client.chamadas
+    abas = conector.client.planilha.abas
+    conector.get_data('google_ads', _config(), '2025-05-01', JANELAS)
+    abas['Google'] = _aba(200)
+    conector.client.versao = "2025-06-02T00:00:00.000Z"
+    chamadas.clear()
+
+    df = conector.get_data('google_ads', _config(), '2025-05-01', JANELAS)
+
+    assert chamadas == Counter({'drive_metadata': 1, 'values_batch_get': 3})
+    assert len(conector.cache.get_layout(CHAVE, 'Google')['dates']) == 200
+    assert (df['Data'].str.endswith('/05/2025')).all()
@@ -0,0 +1,130 @@
+"""Fila de jobs com vários workers sobre o mesmo banco."""
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.job_queue import AnalysisJobQueue, JOB_CONCLUIDO, JOB_EXECUTANDO
+from app.db.database import SessionLocal, ClientDB, get_job, update_job
+
+CLIENT_ID = "teste_fila"
+
+class OrchestratorContador:
+    """Orchestrator falso que conta as execuções e bloqueia até ser liberado."""
+    def __init__(self):
+        self.execucoes = 0
+        self.liberar = threading.Event()
+        self._lock = threading.Lock()
+
+    def executar_fluxo_analise_cliente(self, cliente_config, mes_analise_atual_str, metricas_selecionadas, **opcoes):
+        with self._lock:
+            self.execucoes += 1
+        self.liberar.wait(10)
+        return {"file_path": "relatorio_falso.md", "errors": None}
+
+@pytest.fixture(autouse=True)
+def cliente():
+    db = SessionLocal()
+    try:
+        db.merge(ClientDB(id=CLIENT_ID, nome_exibicao="Fila", contexto_cliente_prompt="", planilha_id_ou_nome="teste"))
+        db.commit()
+    finally:
+        db.close()
+
+def _job(job_id: str):
+    db = SessionLocal()
+    try:
+        return get_job(db, job_id)
+    finally:
+        db.close()
+
+def _aguardar_status(job_id: str, status: str, timeout: float = 5.0):
+    prazo = time.monotonic() + timeout
+    while time.monotonic() < prazo:
+        if _job(job_id).status == status:
+            return
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} não chegou a '{status}' (atual: '{_job(job_id).status}').")
+
+def _fila(orchestrator):
+    # Heartbeat longo: os testes chamam `resume_pending` explicitamente
+    return AnalysisJobQueue(lambda: orchestrator, max_workers=2, heartbeat_seconds=3600, stale_seconds=60)
+
+def test_resume_nao_assume_job_de_worker_ativo():
+    orchestrator_a, orchestrator_b = OrchestratorContador(), OrchestratorContador()
+    fila_a, fila_b = _fila(orchestrator_a), _fila(orchestrator_b)
+    try:
+        job = fila_a.submit(CLIENT_ID, "2025-05-01", [])
+        _aguardar_status(job.id, JOB_EXECUTANDO)
+
+        assert fila_b.resume_pending() == 0
+        orchestrator_a.liberar.set()
+        _aguardar_status(job.id, JOB_CONCLUIDO)
+        assert (orchestrator_a.execucoes, orchestrator_b.execucoes) == (1, 0)
+    finally:
+        orchestrator_a.liberar.set()
+        fila_a.shutdown(wait=True)
+        fila_b.shutdown(wait=True)
+
+def test_job_de_worker_inativo_e_retomado_uma_unica_vez():
+    orchestrator_a = OrchestratorContador()
+    fila_a = _fila(orchestrator_a)
+    job = fila_a.submit(CLIENT_ID, "2025-05-01", [])
+    _aguardar_status(job.id, JOB_EXECUTANDO)
+    # O worker A "morre": para de confirmar atividade
+    fila_a.shutdown()
+    db = SessionLocal()
+    try:
+        update_job(db, job.id, {"heartbeat_at": datetime.now() - timedelta(minutes=5)})
+    finally:
+        db.close()
+
+    orquestradores = [OrchestratorContador() for _ in range(3)]
+    filas = [_fila(orchestrator) for orchestrator in orquestradores]
+    try:
+        retomados = [0] * len(filas)
+        threads = [threading.Thread(target=lambda i=i: retomados.__setitem__(i, filas[i].resume_pending())) for i in range(len(filas))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sum(retomados) == 1
+        for orchestrator in orquestradores:
+            orchestrator.liberar.set()
+        _aguardar_status(job.id, JOB_CONCLUIDO)
+        assert sum(orchestrator.execucoes for orchestrator in orquestradores) == 1
+    finally:
+        orchestrator_a.liberar.set()
+        for orchestrator in orquestradores:
+            orchestrator.liberar.set()
+        for fila in filas:
+            fila.shutdown(wait=True)
+
+def test_progresso_grava_no_banco_fora_da_trava_da_fila():
+    fila = _fila(OrchestratorContador())
+    escritas = []
+    atualizar = fila._update
+    def registrar(job_id, job_data):
+        escritas.append(fila._lock.locked())
+        atualizar(job_id, job_data)
+    fila._update = registrar
+    try:
+        job = fila.submit(CLIENT_ID, "2025-05-01", [])
+        _aguardar_status(job.id, JOB_EXECUTANDO)
+        while job.id not in fila._etapas:
+            time.sleep(0.01)
+        threads = [threading.Thread(target=fila._update_etapa, args=(job.id, etapa, JOB_CONCLUIDO)) for etapa in ('google_ads', 'meta_ads')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert escritas and not any(escritas)
+        etapas = json.loads(_job(job.id).etapas)
+        assert etapas['google_ads'] == etapas['meta_ads'] == JOB_CONCLUIDO
+    finally:
+        fila.orchestrator_provider().liberar.set()
+        fila.shutdown(wait=True)
@@ -0,0 +1,113 @@
+"""Política de novas tentativas e limites do LLMService (síncrono e assíncrono)."""
+import time
+import asyncio
+import threading
+
+import pytest
+
+from app.core.llm_providers import LLMProvider, LLMResponse
+from app.core.llm_rate_limiter import LLMRateLimiter
+from app.core.llm_service import LLMService
+from app.utils.custom_exceptions import LLMConnectionError
+
+SEM_ESPERA = {"attempts": 3, "wait_multiplier": 0, "wait_min_seconds": 0, "wait_max_seconds": 0}
+
+class ProvedorComFalhas(LLMProvider):
+    """Lança os erros informados, um por chamada, e depois responde normalmente."""
+    def __init__(self, erros):
+        super().__init__("falhas")
+        self.erros = list(erros)
+        self.chamadas = 0
+
+    def generate(self, prompt):
+        self.chamadas += 1
+        if self.erros:
+            raise self.erros.pop(0)
+        return LLMResponse(text="ok")
+
+def test_erro_transitorio_e_repetido():
+    provedor = ProvedorComFalhas([ConnectionError("rede"), TimeoutError("tempo")])
+    assert LLMService(provedor, retry_config=SEM_ESPERA).generate_text("prompt") == "ok"
+    assert provedor.chamadas == 3
+
+@pytest.mark.parametrize("erro", [ValueError("prompt bloqueado"), PermissionError("chave inválida")])
+def test_erro_nao_transitorio_nao_e_repetido(erro):
+    provedor = ProvedorComFalhas([erro])
+    with pytest.raises(LLMConnectionError):
+        LLMService(provedor, retry_config=SEM_ESPERA).generate_text("prompt")
+    assert provedor.chamadas == 1
+
+def test_max_retries_explicito_substitui_a_configuracao():
+    provedor = ProvedorComFalhas([ConnectionError("rede")] * 3)
+    with pytest.raises(LLMConnectionError):
+        LLMService(provedor, retry_config=SEM_ESPERA).generate_text("prompt", max_retries=1)
+    assert provedor.chamadas == 1
+
+def test_streaming_nao_repete_erro_nao_transitorio():
+    provedor = ProvedorComFalhas([ValueError("prompt bloqueado")])
+    with pytest.raises(LLMConnectionError):
+        list(LLMService(provedor, retry_config=SEM_ESPERA).generate_text_stream("prompt"))
+    assert provedor.chamadas == 1
+
+def test_agenerate_repete_erro_transitorio():
+    provedor = ProvedorComFalhas([ConnectionError("rede"), TimeoutError("tempo")])
+    assert asyncio.run(LLMService(provedor, retry_config=SEM_ESPERA).agenerate_text("prompt")) == "ok"
+    assert provedor.chamadas == 3
+
+def test_agenerate_nao_repete_erro_nao_transitorio():
+    provedor = ProvedorComFalhas([ValueError("prompt bloqueado")])
+    with pytest.raises(LLMConnectionError):
+        asyncio.run(LLMService(provedor, retry_config=SEM_ESPERA).agenerate_text("prompt"))
+    assert provedor.chamadas == 1
+
+class ProvedorAssincrono(LLMProvider):
+    """Registra o máximo de chamadas assíncronas simultâneas."""
+    def __init__(self):
+        super().__init__("assincrono")
+        self.em_andamento = 0
+        self.maximo = 0
+
+    def generate(self, prompt):
+        return LLMResponse(text="ok")
+
+    async def agenerate(self, prompt):
+        self.em_andamento += 1
+        self.maximo = max(self.maximo, self.em_andamento)
+        await asyncio.sleep(0.01)
+        self.em_andamento -= 1
+        return LLMResponse(text="ok")
+
+def test_agenerate_respeita_o_limite_de_concorrencia():
+    provedor = ProvedorAssincrono()
+    service = LLMService(provedor, rate_limiter=LLMRateLimiter(max_concurrency=2), retry_config=SEM_ESPERA)
+
+    async def disparar():
+        return await asyncio.gather(*(service.agenerate_text(f"prompt {i}") for i in range(10)))
+
+    assert asyncio.run(disparar()) == ["ok"] * 10
+    assert provedor.maximo == 2
+
+def test_aslot_compartilha_as_vagas_com_as_threads():
+    limitador = LLMRateLimiter(max_concurrency=1)
+    liberar = threading.Event()
+    ocupada = threading.Event()
+
+    def ocupar_vaga():
+        with limitador.slot():
+            ocupada.set()
+            liberar.wait(5)
+
+    thread = threading.Thread(target=ocupar_vaga)
+    thread.start()
+    ocupada.wait(5)
+
+    async def aguardar_vaga():
+        asyncio.get_running_loop().call_later(0.2, liberar.set)
+        inicio = time.perf_counter()
+        async with limitador.aslot():
+            return time.perf_counter() - inicio
+
+    # A vaga só é obtida depois que a thread a libera, e a espera não bloqueia o event loop
+    # (que precisa rodar para liberar a thread)
+    assert 0.2 <= asyncio.run(aguardar_vaga()) < 2
+    thread.join()
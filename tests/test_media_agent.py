@@ -0,0 +1,19 @@
+"""Comparativos do MediaAgent com janelas selecionadas."""
+from app.agents.media_agent import MediaAgent
+from benchmarks.dados_sinteticos import gerar_planilha
+
+MES_ANALISE = "2025-05-01"
+
+def test_comparativos_e_titulo_seguem_as_janelas_selecionadas(tmp_path):
+    agent = MediaAgent(llm_service=None, data_connector=None)
+    metricas = ['Spend', 'ROI']
+    df = agent._fetch_and_clean_data('google_ads', {}, MES_ANALISE, data=gerar_planilha(5_000, seed=3))
+    df = agent._calculate_metrics(df, metricas)
+
+    resultado = agent._summarize_and_compare(df, MES_ANALISE, metricas, ['mom', 'm3', 't3m'])
+    markdown = agent._prepare_data_markdown('google_ads', 'Cliente', MES_ANALISE, resultado['kpis'], resultado['comparatives'], ['mom', 'm3', 't3m'])
+
+    assert set(resultado['comparatives']) == {f"{m}_{s}" for m in metricas for s in ('MoM', 'M3', 'T3M')}
+    assert set(resultado['resumo_periodos']) == {'atual', 'mom', 'm3', 't3m'}
+    assert "Comparativos (MoM, M3 e T3M)" in markdown
+    assert agent._comparatives_heading() == "Comparativos (MoM e YoY)"
@@ -0,0 +1,113 @@
+"""Fluxo de análise do Orchestrator com dados sintéticos e o provedor de LLM stub."""
+import os
+import shutil
+
+import pytest
+
+from app.agents.media_agent import MediaAgent
+from app.agents.orchestrator import Orchestrator, SINGLE_CALL_PROMPT
+from app.core.connectors.base_connector import BaseConnector, filter_date_windows
+from app.core.llm_providers import StubProvider
+from app.core.llm_service import LLMService
+from app.db.database import SessionLocal, PromptDB
+from app.utils.file_utils import REPORTS_BASE_DIR, get_safe_name
+from app.utils.prompt_loader import prompt_cache
+from app.utils.timing import stats
+from benchmarks.dados_sinteticos import gerar_planilha
+
+MES_ANALISE = "2025-05-01"
+CLIENTE = {"id": "teste_orq", "nome_exibicao": "Teste Orquestrador", "contexto_cliente_prompt": "Cliente de teste."}
+METRICAS = ['Spend', 'Revenue', 'ROI', 'CPS']
+
+PROMPTS = {
+    "media_analysis": "Analise {plataforma} ({dados_markdown_summary_month_name}).\n{cliente_contexto}\n{metrics_to_analyze_list_markdown}\n{dados_markdown}",
+    "consolidated_report": "Consolide {client_name} ({mes_analise}).\n{kpis_consolidated_markdown}\n{comparatives_consolidates_markdown}\n{all_platforms_reports}",
+}
+SINGLE_CALL_TEMPLATE = (
+    "Analise e consolide {client_name} ({mes_analise}).\n{cliente_contexto}\n{metrics_to_analyze_list_markdown}\n"
+    "{platforms_data_markdown}\n{kpis_consolidated_markdown}\n{comparatives_consolidates_markdown}"
+)
+
+class ConectorSintetico(BaseConnector):
+    def __init__(self):
+        self.abas = {'google_ads': gerar_planilha(5_000, seed=1), 'meta_ads': gerar_planilha(5_000, seed=2)}
+        self.lidas = []
+
+    def get_data(self, data_source, client_config, mes_analise, date_windows=None):
+        self.lidas.append(data_source)
+        return filter_date_windows(self.abas[data_source].copy(), date_windows)
+
+def _salvar_prompt(nome: str, conteudo: str):
+    db = SessionLocal()
+    try:
+        db.merge(PromptDB(id=f"teste_{nome}", nome=nome, conteudo=conteudo))
+        db.commit()
+    finally:
+        db.close()
+    prompt_cache.put(nome, conteudo)
+
+def _remover_prompt(nome: str):
+    db = SessionLocal()
+    try:
+        db.query(PromptDB).filter(PromptDB.nome == nome).delete()
+        db.commit()
+    finally:
+        db.close()
+    prompt_cache.remove(nome)
+
+@pytest.fixture
+def orchestrator():
+    for nome, conteudo in PROMPTS.items():
+        _salvar_prompt(nome, conteudo)
+    llm_service = LLMService(StubProvider())
+    orchestrator = Orchestrator(llm_service)
+    media_agent = MediaAgent(llm_service, data_connector=ConectorSintetico())
+    orchestrator.media_agent = media_agent
+    orchestrator.file_media_agent = media_agent
+    yield orchestrator
+    _remover_prompt(SINGLE_CALL_PROMPT)
+    shutil.rmtree(os.path.join(REPORTS_BASE_DIR, get_safe_name(CLIENTE["nome_exibicao"])), ignore_errors=True)
+
+def _chamadas_llm() -> float:
+    return stats.get_counter("app_llm_requests_total", result="ok")
+
+def test_chamada_unica_divide_as_secoes(orchestrator):
+    _salvar_prompt(SINGLE_CALL_PROMPT, SINGLE_CALL_TEMPLATE)
+    trechos = {}
+    antes = _chamadas_llm()
+
+    resultado = orchestrator.executar_fluxo_analise_cliente(
+        {**CLIENTE, "chamada_unica_llm": True}, MES_ANALISE, METRICAS, usar_cache=False,
+        stream_callback=lambda secao, trecho: trechos.setdefault(secao, []).append(trecho)
+    )
+
+    assert _chamadas_llm() - antes == 1
+    assert resultado["errors"] is None
+    assert set(trechos) == {'google_ads', 'meta_ads', 'consolidacao'}
+    with open(resultado["file_path"], encoding="utf-8") as f:
+        relatorio = f.read()
+    assert "secao:" not in relatorio
+    assert relatorio.strip() == "".join(trechos['consolidacao']).strip()
+
+def test_chamada_unica_sem_prompt_usa_tres_chamadas(orchestrator):
+    antes = _chamadas_llm()
+
+    resultado = orchestrator.executar_fluxo_analise_cliente(CLIENTE, MES_ANALISE, METRICAS, usar_cache=False, chamada_unica=True)
+
+    assert "file_path" in resultado
+    assert _chamadas_llm() - antes == 3
+    assert any(SINGLE_CALL_PROMPT in aviso for aviso in resultado["errors"])
+
+def test_conector_escolhido_por_plataforma(orchestrator):
+    llm_service = orchestrator.llm_service
+    planilha, arquivo = ConectorSintetico(), ConectorSintetico()
+    orchestrator.media_agent = MediaAgent(llm_service, data_connector=planilha)
+    orchestrator.file_media_agent = MediaAgent(llm_service, data_connector=arquivo)
+
+    resultado = orchestrator.executar_fluxo_analise_cliente(
+        {**CLIENTE, "google_ads_file_path": "google_ads.csv"}, MES_ANALISE, METRICAS, usar_cache=False
+    )
+
+    assert resultado.get("errors") is None
+    assert arquivo.lidas == ['google_ads']
+    assert planilha.lidas == ['meta_ads']
@@ -0,0 +1,40 @@
+"""Cache de prompts: leituras de prompts ausentes."""
+import pytest
+
+from app.utils.custom_exceptions import PromptTemplateError
+from app.utils.prompt_loader import PromptCache
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = PromptCache(str(tmp_path / "prompts.version"))
+    cache.cargas = 0
+    carregar = cache.load_all
+    def contar():
+        cache.cargas += 1
+        return carregar()
+    monkeypatch.setattr(cache, "load_all", contar)
+    return cache
+
+def test_prompt_ausente_nao_recarrega_o_banco_a_cada_leitura(cache):
+    for _ in range(5):
+        with pytest.raises(PromptTemplateError):
+            cache.get("prompt_inexistente_opcional")
+    # Carga inicial e uma releitura para confirmar a ausência
+    assert cache.cargas == 2
+
+def test_mudanca_de_versao_limpa_as_ausencias(cache, tmp_path):
+    with pytest.raises(PromptTemplateError):
+        cache.get("prompt_inexistente_opcional")
+    cargas = cache.cargas
+
+    # Outro worker publica uma nova versão
+    (tmp_path / "prompts.version").write_text("42", encoding="utf-8")
+    with pytest.raises(PromptTemplateError):
+        cache.get("prompt_inexistente_opcional")
+    assert cache.cargas == cargas + 2
+
+def test_prompt_gravado_deixa_de_ser_ausente(cache):
+    with pytest.raises(PromptTemplateError):
+        cache.get("prompt_inexistente_opcional")
+    cache.put("prompt_inexistente_opcional", "conteúdo")
+    assert cache.get("prompt_inexistente_opcional") == "conteúdo"
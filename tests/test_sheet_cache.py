@@ -0,0 +1,31 @@
+import threading
+
+import pandas as pd
+
+from app.core.connectors.sheet_cache import SheetCache
+
+def test_escritas_concorrentes_mantem_dados_e_versao_consistentes(tmp_path):
+    cache = SheetCache(str(tmp_path))
+    versoes = {f"v{i}": pd.DataFrame({'Data': ['01/05/2025'] * (i + 1), 'Spend': [str(i)] * (i + 1)}) for i in range(8)}
+
+    barreira = threading.Barrier(len(versoes))
+    def gravar(versao, df):
+        barreira.wait()
+        for _ in range(5):
+            cache.put('planilha', 'aba', versao, df)
+    threads = [threading.Thread(target=gravar, args=item) for item in versoes.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    acertos = {versao: cache.get('planilha', 'aba', versao) for versao in versoes}
+    [(versao, df)] = [(versao, df) for versao, df in acertos.items() if df is not None]
+    pd.testing.assert_frame_equal(df, versoes[versao])
+    assert not list(tmp_path.glob('*.tmp'))
+
+def test_versao_diferente_nao_e_reaproveitada(tmp_path):
+    cache = SheetCache(str(tmp_path))
+    cache.put('planilha', 'aba', 'v1', pd.DataFrame({'Spend': ['1']}))
+    assert cache.get('planilha', 'aba', 'v2') is None
+    assert cache.get('planilha', 'aba', 'v1')['Spend'].tolist() == ['1']
@@ -0,0 +1,64 @@
+import os
+import threading
+
+from app.core.connectors import sheet_sync_store
+from app.core.connectors.sheet_sync_store import SheetSyncStore
+
+HEADERS = ['Data', 'Spend']
+
+def _linhas(inicio, fim):
+    return [[f"2025-05-{(i % 28) + 1:02d}", str(i)] for i in range(inicio, fim)]
+
+def test_appends_concorrentes_com_o_mesmo_estado_nao_duplicam_linhas(tmp_path):
+    store = SheetSyncStore(str(tmp_path))
+    store.replace('planilha', 'aba', [HEADERS] + _linhas(0, 10))
+    estado = store.get_state('planilha', 'aba')
+
+    resultados = []
+    barreira = threading.Barrier(4)
+    def sincronizar():
+        barreira.wait()
+        resultados.append(store.append('planilha', 'aba', estado, _linhas(10, 15)))
+    threads = [threading.Thread(target=sincronizar) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(resultados) == [False, False, False, True]
+    df = store.read('planilha', 'aba')
+    assert df['Spend'].tolist() == [str(i) for i in range(15)]
+    assert store.get_state('planilha', 'aba')['last_row'] == 16
+
+def test_compactacao_mantem_as_linhas_e_remove_arquivos_antigos(tmp_path, monkeypatch):
+    monkeypatch.setattr(sheet_sync_store, 'MAX_PARTS_BEFORE_COMPACTION', 3)
+    store = SheetSyncStore(str(tmp_path))
+    store.replace('planilha', 'aba', [HEADERS] + _linhas(0, 2))
+    for inicio in range(2, 12, 2):
+        assert store.append('planilha', 'aba', store.get_state('planilha', 'aba'), _linhas(inicio, inicio + 2))
+
+    estado = store.get_state('planilha', 'aba')
+    entrada = store._entry_dir('planilha', 'aba')
+    assert sorted(nome for nome in os.listdir(entrada) if nome.startswith('part-')) == sorted(estado['parts'])
+    assert len(estado['parts']) <= 3
+    assert store.read('planilha', 'aba')['Spend'].tolist() == [str(i) for i in range(12)]
+
+def test_falha_ao_gravar_o_estado_preserva_os_dados_anteriores(tmp_path, monkeypatch):
+    store = SheetSyncStore(str(tmp_path))
+    store.replace('planilha', 'aba', [HEADERS] + _linhas(0, 5))
+    estado = store.get_state('planilha', 'aba')
+
+    def falhar(*args, **kwargs):
+        raise OSError("disco cheio")
+    monkeypatch.setattr(store, '_write_state', falhar)
+    try:
+        store.append('planilha', 'aba', estado, _linhas(5, 8))
+    except OSError:
+        pass
+    monkeypatch.undo()
+
+    assert store.get_state('planilha', 'aba') == estado
+    assert store.read('planilha', 'aba')['Spend'].tolist() == [str(i) for i in range(5)]
+    # A próxima sincronização parte da mesma marca d'água e descarta o arquivo órfão
+    assert store.append('planilha', 'aba', estado, _linhas(5, 8))
+    assert store.read('planilha', 'aba')['Spend'].tolist() == [str(i) for i in range(8)]
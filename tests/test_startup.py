@@ -0,0 +1,13 @@
+"""Ordem das tarefas de inicialização da aplicação."""
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.core.job_queue import AnalysisJobQueue
+
+def test_catalogo_de_relatorios_e_indexado_antes_de_retomar_jobs(monkeypatch):
+    ordem = []
+    monkeypatch.setattr(main_module, "backfill_reports", lambda: ordem.append("backfill_reports"))
+    monkeypatch.setattr(AnalysisJobQueue, "resume_pending", lambda self: ordem.append("resume_pending"))
+    with TestClient(main_module.app):
+        pass
+    assert ordem == ["backfill_reports", "resume_pending"]